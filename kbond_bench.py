@@ -0,0 +1,91 @@
+import argparse
+import cProfile
+import json
+import pstats
+import re
+import tempfile
+import time
+from src.kbond_monitor import KBondMonitor
+from src.sim_kbond import SimulatedKBond, SimTraffic
+
+MESSAGE_ID = re.compile(r'msg-\d{8}')
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KBond capture benchmark against the simulated backend")
+    parser.add_argument('--rooms', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=200.0, help="messages per second across all rooms")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--history', type=int, default=2000, help="existing lines per room")
+    parser.add_argument('--latency', type=float, default=0.0, help="per-read window latency (seconds)")
+    parser.add_argument('--hung', type=int, default=0, help="number of rooms that never answer")
+    parser.add_argument('--mode', choices=['polling', 'event'], default=None)
+    parser.add_argument('--profile', action='store_true', help="profile the run with cProfile")
+    args = parser.parse_args()
+
+    with open('config.json', 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    # Keep benchmark checkpoints out of the real output directory
+    config.setdefault('checkpoint', {})['directory'] = tempfile.mkdtemp(prefix="kbond_bench_")
+    if args.mode:
+        config['kbond']['capture_mode'] = args.mode
+
+    sim = SimulatedKBond(latency=args.latency)
+    for i in range(args.rooms):
+        history = "\r\n".join(f"홍길동 (09:00:00) 지난 메시지 {i}-{n}" for n in range(args.history))
+        room = sim.open_room(f"채권 데스크 {i:02d}", history)
+        if i < args.hung:
+            sim.set_hung(room)
+
+    traffic = SimTraffic(sim, rate=args.rate, seed=1)
+    latencies = []
+    received = set()
+
+    def on_message(msg):
+        now = time.time()
+        for msg_id in MESSAGE_ID.findall(msg['text']):
+            sent_at = traffic.sent.get(msg_id)
+            if sent_at is not None and msg_id not in received:
+                latencies.append(now - sent_at)
+                received.add(msg_id)
+
+    monitor = KBondMonitor(on_message, config, backend=sim)
+    profiler = cProfile.Profile() if args.profile else None
+
+    monitor.start()
+    time.sleep(1.0)  # let the first capture settle the existing history
+    if profiler:
+        profiler.enable()
+    traffic.start()
+    time.sleep(args.duration)
+    traffic.stop()
+    time.sleep(1.0)  # drain
+    if profiler:
+        profiler.disable()
+    monitor.stop()
+
+    hung_rooms = set(sim.rooms()[:args.hung])
+    expected = len(traffic.sent)
+    print("=" * 50)
+    print(f"Backend: {sim.name}, mode: {monitor.capture_mode}, rooms: {args.rooms} ({args.hung} hung)")
+    print(f"Sent: {expected}, captured: {len(received)}, throughput: {len(received) / args.duration:.1f} msg/s")
+    print(f"Latency p50: {percentile(latencies, 50) * 1000:.1f}ms, "
+          f"p99: {percentile(latencies, 99) * 1000:.1f}ms, max: {max(latencies, default=0) * 1000:.1f}ms")
+    print(f"Window reads: {sim.stats}")
+    print(f"Dedup: {monitor._history.stats()}")
+    if hung_rooms:
+        print("Messages sent to hung rooms are expected to be missing.")
+    print("=" * 50)
+    if profiler:
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@ import time
 import sys
 import os
 from src.kbond_monitor import KBondMonitor
-from src.message_writer import AsyncMessageWriter
+from src.message_writer import create_writer
+from src.metrics_server import create_metrics_server
+from src.diagnostics import create_diagnostics
+from src.stage_latency import enable_stage_latency
+from src.span_tracer import enable_tracing, dump_on_exit
 
 def main():
     # Load config
@@ -12,20 +16,41 @@ def main():
     
     # Update filename for KBond
     config['output']['filename_format'] = "kbond_messages_{timestamp}.txt"
+
+    # Per-stage latency (capture -> diff -> queue -> disk), reported on exit
+    latency = enable_stage_latency(config)
+
+    # Span tracer (ring buffer, saved as Chrome trace JSON on Ctrl+Break / hotkey)
+    enable_tracing(config)
     
     # Initialize writer
-    writer = AsyncMessageWriter(config)
+    writer = create_writer(config)
     writer.start()
     
     def on_message(msg):
         # Format the message for display and saving
-        display_text = f"[{msg['window']}] {msg['text']}"
+        if msg.get('sender'):
+            # Parsed record: continuation lines are indented under the header
+            body = msg['text'].replace("\n", "\n    ")
+            clock = msg['source_time'].strftime('%H:%M:%S') if msg.get('source_time') else "--:--:--"
+            display_text = f"[{msg['window']}] {msg['sender']} ({clock}) {body}"
+        else:
+            display_text = f"[{msg['window']}] {msg['text']}"
         print(f"\n[NEW] {display_text}")
         
-        # Save message
+        # Save message (structured formats keep the original body and record fields)
         writer.write_message({
             'timestamp': msg['timestamp'],
-            'text': display_text
+            'text': display_text,
+            'window': msg['window'],
+            'body': msg['text'],
+            'sender': msg.get('sender'),
+            'source_time': msg.get('source_time'),
+            'seq': msg.get('seq'),
+            'hash': msg.get('hash'),
+            'type': msg.get('type', 'line'),
+            'continued': msg.get('continued', False),
+            'trace': msg.get('trace')
         })
 
     # Initialize monitor
@@ -38,6 +63,12 @@ def main():
     print("="*50)
     
     monitor.start()
+
+    # Optional localhost OpenMetrics endpoint
+    metrics = create_metrics_server(config, monitor=monitor, writer=writer, latency=latency)
+
+    # Optional on-demand profiler / memory reports (localhost control socket)
+    diagnostics = create_diagnostics(config, monitor=monitor, writer=writer)
     
     try:
         while True:
@@ -45,8 +76,15 @@ def main():
     except KeyboardInterrupt:
         print("\nStopping...")
     finally:
+        if diagnostics:
+            diagnostics.stop()
+        if metrics:
+            metrics.stop()
         monitor.stop()
         writer.stop()
+        if latency:
+            latency.print_report()
+        dump_on_exit(config)
 
 if __name__ == "__main__":
     main()
@@ -8,8 +8,12 @@ import signal
 import sys
 from pathlib import Path
 from src.kakao_monitor import KakaoMonitor
-from src.message_writer import AsyncMessageWriter, SyncMessageWriter
+from src.message_writer import create_writer
+from src.metrics_server import create_metrics_server
+from src.diagnostics import create_diagnostics
 from src.performance_monitor import PerformanceMonitor
+from src.stage_latency import enable_stage_latency
+from src.span_tracer import enable_tracing, dump_on_exit
 
 
 class KakaoMessageReader:
@@ -24,20 +28,29 @@ class KakaoMessageReader:
         
         # 성능 모니터
         self.perf_monitor = PerformanceMonitor(
-            max_response_time=self.config['performance']['max_response_time']
+            max_response_time=self.config['performance']['max_response_time'],
+            window=self.config['performance'].get('stats_window', 60.0),
+            report_interval=self.config['performance'].get('violation_report_interval', 10.0)
         )
         
-        # 파일 쓰기 (비동기/동기 선택)
-        if self.config['performance']['use_async']:
-            self.writer = AsyncMessageWriter(self.config)
-        else:
-            self.writer = SyncMessageWriter(self.config)
+        # 단계별 지연 측정: 켜져 있으면 응답 시간은 캡처부터 디스크 기록까지로 잼
+        self.stage_latency = enable_stage_latency(self.config)
+        if self.stage_latency:
+            self.stage_latency.listeners.append(self.perf_monitor.record_response_time)
+        
+        # 구간 추적 (켜져 있으면 Ctrl+Break/단축키로 Chrome trace JSON 저장)
+        enable_tracing(self.config)
+        
+        # 파일 쓰기 (그룹 커밋/비동기/동기 선택)
+        self.writer = create_writer(self.config)
         
         # 카카오톡 모니터
         self.monitor = KakaoMonitor(
             callback=self.on_message_received,
             config=self.config
         )
+        self.metrics = None
+        self.diagnostics = None
         
         # 종료 시그널 핸들러
         signal.signal(signal.SIGINT, self.signal_handler)
@@ -55,9 +68,10 @@ class KakaoMessageReader:
         # 메시지를 파일에 쓰기
         self.writer.write_message(message)
         
-        # 응답 시간 측정
+        # 응답 시간 측정 (단계별 측정이 꺼져 있으면 큐에 넣는 시간만)
         response_time = time.time() - start_time
-        self.perf_monitor.record_response_time(response_time)
+        if not self.stage_latency:
+            self.perf_monitor.record_response_time(response_time)
         
         # 콘솔 출력
         print(f"[MSG] [{message['timestamp'].strftime('%H:%M:%S')}] {message['text'][:50]}... "
@@ -90,6 +104,12 @@ class KakaoMessageReader:
             print("  3. Is KakaoTalk window open?")
             return False
         
+        # 메트릭 엔드포인트 (설정 시)
+        self.metrics = create_metrics_server(self.config, monitor=self.monitor, writer=self.writer,
+                                             latency=self.stage_latency, perf_monitor=self.perf_monitor)
+        # 진단 (프로파일/메모리 보고서, 설정 시)
+        self.diagnostics = create_diagnostics(self.config, monitor=self.monitor, writer=self.writer)
+        
         print("\n[OK] Monitoring started!")
         print("INFO: Press Ctrl+C to stop.\n")
         print("-"*60)
@@ -98,6 +118,13 @@ class KakaoMessageReader:
     
     def stop(self):
         """프로그램 종료"""
+        if self.diagnostics:
+            self.diagnostics.stop()
+            self.diagnostics = None
+        if self.metrics:
+            self.metrics.stop()
+            self.metrics = None
+        
         # 모니터링 중지
         self.monitor.stop()
         
@@ -106,6 +133,9 @@ class KakaoMessageReader:
         
         # 통계 출력
         self.perf_monitor.print_statistics()
+        if self.stage_latency:
+            self.stage_latency.print_report()
+        dump_on_exit(self.config)
         
         print("[OK] Program terminated.")
     
@@ -4,18 +4,20 @@ import signal
 import sys
 from pathlib import Path
 from src.multi_kakao_monitor import MultiKakaoMonitor
-from src.message_writer import AsyncMessageWriter
+from src.message_writer import create_writer
+from src.diagnostics import create_diagnostics
 
 class MultiWindowApp:
     def __init__(self, config_path: str = "config.json"):
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = json.load(f)
         
-        self.writer = AsyncMessageWriter(self.config)
+        self.writer = create_writer(self.config)
         self.monitor = MultiKakaoMonitor(
             callback=self.on_new_message,
             config=self.config
         )
+        self.diagnostics = None
         
         signal.signal(signal.SIGINT, self.handle_exit)
 
@@ -29,6 +31,8 @@ class MultiWindowApp:
 
     def handle_exit(self, sig, frame):
         print("\n[INFO] Stopping...")
+        if self.diagnostics:
+            self.diagnostics.stop()
         self.monitor.stop()
         self.writer.stop()
         sys.exit(0)
@@ -41,6 +45,7 @@ class MultiWindowApp:
         
         self.writer.start()
         if self.monitor.start():
+            self.diagnostics = create_diagnostics(self.config, monitor=self.monitor, writer=self.writer)
             print("[OK] Monitoring is active. Press Ctrl+C to stop.")
             while True:
                 time.sleep(1)
@@ -0,0 +1,82 @@
+"""
+방별 읽기 위치 체크포인트
+재시작 시 과거 내역을 다시 내보내거나 전체를 다시 해시하지 않도록
+텍스트 길이, 꼬리 지문, 마지막 순번을 주기적으로 원자적으로 저장
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict
+
+from .dedup_store import FINGERPRINT_ALGORITHM
+
+
+class CheckpointStore:
+    VERSION = 1
+
+    def __init__(self, path: Path, interval: float = 5.0):
+        """
+        Args:
+            path: 체크포인트 파일 경로
+            interval: 저장 주기 (초)
+        """
+        self.path = Path(path)
+        self.interval = interval
+        self._rooms: Dict[str, dict] = {}
+        self._dirty = False
+        self._last_save = time.time()
+
+    def load(self) -> Dict[str, dict]:
+        """저장된 체크포인트 로드 (없거나 형식이 다르면 빈 dict)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable checkpoint {self.path}: {e}")
+            return {}
+
+        if data.get('version') != self.VERSION or data.get('algorithm') != FINGERPRINT_ALGORITHM:
+            print(f"[WARN] Checkpoint {self.path} was written with a different format, ignoring it")
+            return {}
+
+        self._rooms = data.get('rooms', {})
+        print(f"[INFO] Checkpoint loaded: {len(self._rooms)} rooms ({self.path})")
+        return dict(self._rooms)
+
+    def get(self, room: str) -> dict:
+        return self._rooms.get(room, {})
+
+    def update(self, room: str, **fields):
+        entry = self._rooms.setdefault(room, {})
+        entry.update(fields)
+        self._dirty = True
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체하여 중간에 끊겨도 이전 체크포인트가 남도록 함"""
+        if not self._dirty:
+            return
+        data = {
+            'version': self.VERSION,
+            'algorithm': FINGERPRINT_ALGORITHM,
+            'saved_at': time.time(),
+            'rooms': self._rooms,
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            print(f"[ERROR] Checkpoint save error: {e}")
+        self._last_save = time.time()
+
+    def maybe_save(self):
+        if self._dirty and time.time() - self._last_save >= self.interval:
+            self.save()
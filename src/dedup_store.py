@@ -0,0 +1,171 @@
+"""
+메시지 중복 제거 저장소
+md5 hex 문자열 set 대신 64비트 지문을 방별 open-addressing 배열에 보관
+방마다 용량 상한이 있으며, 가득 차면 가장 오래된 지문부터 제거 (FIFO 윈도우)
+"""
+import hashlib
+from array import array
+from typing import Dict
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+FINGERPRINT_ALGORITHM = "xxh3_64" if xxhash else "md5_64"
+
+
+def fingerprint(text: str) -> int:
+    """텍스트의 64비트 지문 (0은 빈 슬롯 표시용이라 사용하지 않음)"""
+    data = text.encode('utf-8')
+    if xxhash:
+        fp = xxhash.xxh3_64_intdigest(data)
+    else:
+        fp = int.from_bytes(hashlib.md5(data).digest()[:8], 'little')
+    return fp or 1
+
+
+class RoomFingerprints:
+    """한 방의 지문 집합 - 선형 탐사 해시 테이블 + 삽입 순서 링 버퍼"""
+
+    __slots__ = ('capacity', '_table', '_mask', '_ring', '_head', 'size')
+
+    def __init__(self, capacity: int, initial_slots: int = 64):
+        self.capacity = capacity
+        self._table = array('Q', bytes(8 * initial_slots))
+        self._mask = initial_slots - 1
+        self._ring = array('Q')  # 용량에 도달하기 전까지는 append, 이후 순환
+        self._head = 0
+        self.size = 0
+
+    def _find(self, fp: int) -> int:
+        table, mask = self._table, self._mask
+        i = fp & mask
+        while True:
+            v = table[i]
+            if v == fp or v == 0:
+                return i
+            i = (i + 1) & mask
+
+    def __contains__(self, fp: int) -> bool:
+        return self._table[self._find(fp)] == fp
+
+    def _grow(self):
+        old = self._table
+        slots = len(old) * 2
+        self._table = array('Q', bytes(8 * slots))
+        self._mask = slots - 1
+        for v in old:
+            if v:
+                self._table[self._find(v)] = v
+
+    def _remove(self, fp: int):
+        # backward-shift 삭제: tombstone 없이 탐사 체인 유지
+        table, mask = self._table, self._mask
+        i = self._find(fp)
+        if table[i] != fp:
+            return
+        j = i
+        while True:
+            j = (j + 1) & mask
+            v = table[j]
+            if v == 0:
+                break
+            home = v & mask
+            if (i < j and (home <= i or home > j)) or (i > j and home <= i and home > j):
+                table[i] = v
+                i = j
+        table[i] = 0
+
+    def add(self, fp: int) -> bool:
+        """새 지문이면 추가 후 True, 이미 있으면 False"""
+        i = self._find(fp)
+        if self._table[i] == fp:
+            return False
+
+        if self.size >= self.capacity:
+            # 링이 가득 찼으므로 _head가 가장 오래된 지문
+            self._remove(self._ring[self._head])
+            self.size -= 1
+            i = self._find(fp)
+        elif (self.size + 1) * 2 > len(self._table):
+            self._grow()
+            i = self._find(fp)
+
+        self._table[i] = fp
+        if len(self._ring) < self.capacity:
+            self._ring.append(fp)
+        else:
+            self._ring[self._head] = fp
+            self._head = (self._head + 1) % self.capacity
+        self.size += 1
+        return True
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._table.itemsize * len(self._table) + self._ring.itemsize * len(self._ring)
+
+
+class DedupStore:
+    def __init__(self, capacity_per_room: int = 100000):
+        """
+        Args:
+            capacity_per_room: 방별로 기억하는 지문 개수 상한
+        """
+        self.capacity_per_room = capacity_per_room
+        self._rooms: Dict[str, RoomFingerprints] = {}
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def __contains__(self, room: str) -> bool:
+        return room in self._rooms
+
+    def _room(self, room: str) -> RoomFingerprints:
+        fps = self._rooms.get(room)
+        if fps is None:
+            fps = self._rooms[room] = RoomFingerprints(self.capacity_per_room)
+        return fps
+
+    def seen(self, room: str, fp: int) -> bool:
+        fps = self._rooms.get(room)
+        self.lookups += 1
+        if fps is not None and fp in fps:
+            self.hits += 1
+            return True
+        return False
+
+    def check_and_add(self, room: str, fp: int) -> bool:
+        """처음 보는 지문이면 기록하고 True 반환"""
+        fps = self._room(room)
+        self.lookups += 1
+        full = fps.size >= fps.capacity
+        if fps.add(fp):
+            if full:
+                self.evictions += 1
+            return True
+        self.hits += 1
+        return False
+
+    def add(self, room: str, fp: int):
+        fps = self._room(room)
+        full = fps.size >= fps.capacity
+        if fps.add(fp) and full:
+            self.evictions += 1
+
+    def forget(self, room: str):
+        self._rooms.pop(room, None)
+
+    def stats(self) -> dict:
+        """메모리 사용량 및 적중률 통계"""
+        rooms = list(self._rooms.values())
+        return {
+            'algorithm': FINGERPRINT_ALGORITHM,
+            'rooms': len(rooms),
+            'entries': sum(fps.size for fps in rooms),
+            'memory_bytes': sum(fps.memory_bytes for fps in rooms),
+            'lookups': self.lookups,
+            'hits': self.hits,
+            'hit_rate': (self.hits / self.lookups * 100) if self.lookups > 0 else 0,
+            'evictions': self.evictions,
+        }
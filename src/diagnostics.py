@@ -0,0 +1,446 @@
+"""
+실행 중 진단 (재시작 없이 CPU/메모리 조사)
+    profile [초]   모든 스레드(캡처, 읽기 작업, writer, 훅 작업)를 주기적으로 표본 추출해 함수별 비중 보고
+                   (대기 중인 표본은 CPU 비중에서 빼고 따로 집계, 길이는 최대 MAX_PROFILE_SECONDS초)
+    memory         tracemalloc 스냅샷을 찍어 직전 스냅샷 대비 증가량을 할당 위치/모듈별로 보고하고,
+                   등록된 구성 요소(_history, _window_snapshots 등)의 실제 크기 변화도 함께 기록
+    trace          구간 추적기가 켜져 있으면 Chrome trace JSON 저장
+    status         스레드 목록과 tracemalloc 상태
+
+트리거: localhost 제어 소켓(한 연결에 명령 한 줄) 또는 설정(profile_on_start, memory_interval)
+보고서는 출력 폴더의 diagnostics/ 아래에 저장
+
+    python -m src.diagnostics profile 30     # 실행 중인 에이전트에 명령 보내기 (config.json의 포트 사용)
+"""
+import gc
+import json
+import linecache
+import math
+import re
+import socket
+import sys
+import threading
+import time
+import tracemalloc
+import types
+from collections import Counter, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .span_tracer import tracer
+
+# 크기를 셀 때 따라가지 않는 객체 (함수/메서드를 따라가면 소유 객체 전체를 세게 됨)
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType,
+           types.CodeType, types.FrameType, threading.Thread)
+
+
+MAX_PROFILE_SECONDS = 300.0
+
+# 맨 위 파이썬 프레임이 이 함수면 C 대기 호출(락, 소켓, select 등) 안에 있는 표본
+_WAIT_FUNCTIONS = {
+    ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'),
+    ('queue.py', 'get'), ('queue.py', 'put'),
+    ('socket.py', 'accept'), ('socket.py', 'readinto'), ('selectors.py', 'select'),
+    ('thread.py', '_worker'),  # concurrent.futures 작업 스레드가 작업 큐에서 대기
+    ('connection.py', '_recv'), ('connection.py', '_poll'), ('connection.py', 'wait'),
+}
+# 또는 맨 위 프레임의 현재 줄이 대기 호출이면 (time.sleep, Event.wait, GetMessageW 등 C 함수는 프레임이 없음)
+_WAIT_CALL = re.compile(r'\b(?:sleep|wait|GetMessageW|MsgWaitForMultipleObjects\w*|WaitFor(?:Single|Multiple)Objects\w*|'
+                        r'select|accept|recv|recv_into)\(|\.get\(\s*(?:\)|block|timeout|True)')
+
+
+def _is_waiting(filename: str, name: str, line: int) -> bool:
+    if (Path(filename).name, name) in _WAIT_FUNCTIONS:
+        return True
+    source = linecache.getline(filename, line)
+    return bool(_WAIT_CALL.search(source))
+
+
+def deep_size(root) -> Tuple[int, int]:
+    """root에서 닿는 객체들의 (총 바이트, 객체 수). 다른 스레드가 바꾸는 중이면 RuntimeError"""
+    seen = set()
+    stack = [root]
+    total = 0
+    count = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _OPAQUE):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        count += 1
+        if isinstance(obj, (str, bytes, bytearray, int, float, bool)) or obj is None:
+            continue
+        if isinstance(obj, dict):
+            for key, value in list(obj.items()):
+                stack.append(key)
+                stack.append(value)
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(list(obj))
+        else:
+            if hasattr(obj, '__dict__'):
+                stack.append(obj.__dict__)
+            for cls in type(obj).__mro__:
+                for name in getattr(cls, '__slots__', ()):
+                    if hasattr(obj, name):
+                        stack.append(getattr(obj, name))
+    return total, count
+
+
+def _resolve(owner, path: str):
+    for name in path.split('.'):
+        owner = owner[int(name)] if name.isdigit() else getattr(owner, name)
+    return owner
+
+
+class SamplingProfiler:
+    """
+    sys._current_frames()로 모든 스레드의 호출 스택을 interval마다 표본 추출
+    맨 위 프레임이 대기 호출(_is_waiting)인 표본은 CPU 표본과 나눠 집계
+    """
+
+    def __init__(self, interval: float = 0.005, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+
+    def run(self, duration: float, stop: threading.Event = None) -> dict:
+        own = threading.get_ident()
+        stacks = Counter()  # (스레드 이름, 스택) -> CPU 표본 수
+        waits = Counter()  # (스레드 이름, 스택) -> 대기 중 표본 수
+        waiting = {}  # 맨 위 프레임 -> 대기 호출인지 (줄마다 한 번만 판정)
+        samples = 0
+        names: Dict[int, str] = {}
+        started = time.perf_counter()
+        deadline = started + duration
+        while time.perf_counter() < deadline and not (stop and stop.is_set()):
+            names.update((thread.ident, thread.name) for thread in threading.enumerate())
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append((code.co_filename, code.co_name, frame.f_lineno))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                leaf = stack[0]
+                if leaf not in waiting:
+                    waiting[leaf] = _is_waiting(*leaf)
+                key = (names.get(ident, str(ident)), tuple(reversed(stack)))
+                if waiting[leaf]:
+                    waits[key] += 1
+                else:
+                    stacks[key] += 1
+            samples += 1
+            time.sleep(self.interval)
+        return {'duration': time.perf_counter() - started, 'samples': samples, 'stacks': stacks, 'waits': waits}
+
+    @staticmethod
+    def report(result: dict, top: int = 15) -> str:
+        stacks = result['stacks']
+        waits = result.get('waits', Counter())
+        samples = max(1, result['samples'])
+        per_thread = Counter()  # 스레드 -> CPU 표본 수
+        waited = Counter()  # 스레드 -> 대기 표본 수
+        leaf = Counter()  # (스레드, 파일:줄 함수) -> 표본 수 (자기 시간)
+        cumulative = Counter()  # 함수 -> 스택에 나타난 표본 수
+        wait_sites = Counter()  # 대기 위치 -> 표본 수
+        for (thread, stack), n in stacks.items():
+            per_thread[thread] += n
+            filename, name, line = stack[-1]
+            leaf[(thread, f"{name} ({_short(filename)}:{line})")] += n
+            for function in {(filename, name) for filename, name, _ in stack}:
+                cumulative[function] += n
+        for (thread, stack), n in waits.items():
+            waited[thread] += n
+            # 대기 위치는 표준 라이브러리 프레임 바깥의 호출 지점이 더 알아보기 쉬움
+            caller = next((frame for frame in reversed(stack) if not _is_stdlib(frame[0])), stack[-1])
+            wait_sites[f"{caller[1]} ({_short(caller[0])}:{caller[2]})"] += n
+
+        threads = set(per_thread) | set(waited)
+        lines = [f"Sampling profile: {result['duration']:.1f}s, {result['samples']} samples, "
+                 f"{len(threads)} threads (waiting samples are excluded from CPU shares)", ""]
+        for thread in sorted(threads, key=lambda t: (-per_thread[t], t)):
+            n = per_thread[thread]
+            total = n + waited[thread]
+            lines.append(f"[{thread}] {n} CPU samples, {waited[thread] / total * 100:.0f}% waiting")
+            rows = sorted(((count, frame) for (t, frame), count in leaf.items() if t == thread), reverse=True)
+            for count, frame in rows[:5]:
+                lines.append(f"    {count / n * 100:5.1f}%  {frame}")
+        lines += ["", f"Top functions (inclusive, % of sampled time on CPU in any thread):"]
+        for (filename, name), n in cumulative.most_common(top):
+            lines.append(f"    {n / samples * 100:6.1f}%  {name} ({_short(filename)})")
+        if wait_sites:
+            lines += ["", "Top wait sites (% of sampled time, summed over threads):"]
+            for site, n in wait_sites.most_common(top):
+                lines.append(f"    {n / samples * 100:6.1f}%  {site}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def folded(result: dict, waiting: bool = False) -> str:
+        """flamegraph.pl / speedscope용 접힌 스택 (스레드;함수;... 표본 수, 기본은 CPU 표본만)"""
+        lines = []
+        for (thread, stack), n in result['waits' if waiting else 'stacks'].most_common():
+            frames = [thread] + [f"{name} ({_short(filename)}:{line})" for filename, name, line in stack]
+            lines.append(f"{';'.join(frame.replace(';', ':') for frame in frames)} {n}")
+        return "\n".join(lines) + "\n"
+
+
+_STDLIB = str(Path(threading.__file__).parent)
+
+
+def _is_stdlib(filename: str) -> bool:
+    return filename.startswith(_STDLIB) and 'site-packages' not in filename
+
+
+def _short(filename: str) -> str:
+    parts = Path(filename).parts
+    return "/".join(parts[-2:]) if len(parts) > 1 else filename
+
+
+class Diagnostics:
+    """진단 명령 실행과 보고서 저장, 선택적 제어 소켓"""
+
+    def __init__(self, directory: Path, sample_interval: float = 0.005, profile_seconds: float = 10.0,
+                 tracemalloc_frames: int = 1):
+        """
+        Args:
+            directory: 보고서 폴더
+            sample_interval: 프로파일 표본 간격 (초)
+            profile_seconds: profile 명령의 기본 길이 (초)
+            tracemalloc_frames: 할당마다 저장할 호출 스택 깊이 (클수록 정확하지만 느림)
+        """
+        self.directory = Path(directory)
+        self.profiler = SamplingProfiler(sample_interval)
+        self.profile_seconds = profile_seconds
+        self.tracemalloc_frames = tracemalloc_frames
+        self.components: Dict[str, Tuple[object, str]] = {}  # 이름 -> (소유 객체, 속성 경로)
+        self._previous = None  # (시각, tracemalloc 스냅샷, 구성 요소 크기)
+        self._lock = threading.Lock()  # 명령은 한 번에 하나씩
+        self._server = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def add_components(self, prefix: str, owner, paths):
+        """owner의 속성(점으로 이어진 경로 가능)을 메모리 보고서의 구성 요소로 등록"""
+        for path in paths:
+            self.components[f"{prefix}.{path}"] = (owner, path)
+
+    def _path(self, kind: str, suffix: str) -> Path:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return self.directory / f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{suffix}"
+
+    # ----- 명령 -----
+
+    def profile(self, seconds: float = None) -> str:
+        seconds = self.profile_seconds if seconds is None else seconds
+        if not math.isfinite(seconds) or seconds <= 0:
+            return f"profile length must be between 0 and {MAX_PROFILE_SECONDS:.0f} seconds"
+        # 프로파일 중에는 다른 명령이 기다리므로 길이를 제한
+        seconds = min(seconds, MAX_PROFILE_SECONDS)
+        with self._lock:
+            print(f"[INFO] Diagnostics: profiling all threads for {seconds:.0f}s...")
+            result = self.profiler.run(seconds, self._stop)
+            report = self._path("profile", ".txt")
+            report.write_text(SamplingProfiler.report(result), encoding='utf-8')
+            report.with_suffix('.folded').write_text(SamplingProfiler.folded(result), encoding='utf-8')
+        print(f"[INFO] Diagnostics: profile saved to {report}")
+        return str(report)
+
+    def component_sizes(self) -> Dict[str, Tuple[int, int]]:
+        sizes = {}
+        for name, (owner, path) in self.components.items():
+            for _ in range(3):
+                try:
+                    sizes[name] = deep_size(_resolve(owner, path))
+                    break
+                except RuntimeError:
+                    continue  # 다른 스레드가 바꾸는 중
+                except AttributeError:
+                    break
+        return sizes
+
+    def memory(self, top: int = 25) -> str:
+        with self._lock:
+            started_now = not tracemalloc.is_tracing()
+            if started_now:
+                tracemalloc.start(self.tracemalloc_frames)
+            gc.collect()
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*"),
+            ))
+            sizes = self.component_sizes()
+            now = time.time()
+            current, peak = tracemalloc.get_traced_memory()
+
+            lines = [f"Memory snapshot {datetime.fromtimestamp(now).isoformat(timespec='seconds')}",
+                     f"tracemalloc: {current / 1024 / 1024:.1f} MiB traced (peak {peak / 1024 / 1024:.1f} MiB)"]
+            try:
+                import psutil
+                lines.append(f"process RSS: {psutil.Process().memory_info().rss / 1024 / 1024:.1f} MiB")
+            except ImportError:
+                pass
+            if started_now:
+                lines.append("tracemalloc started now: allocations made before this point are not traced")
+            previous = self._previous
+            lines += ["", "Components (reachable size, change since the previous snapshot):"]
+            for name, (size, count) in sorted(sizes.items(), key=lambda item: -item[1][0]):
+                delta = _signed(size - previous[2][name][0]) if previous and name in previous[2] else " " * 14
+                lines.append(f"    {size / 1024:12,.1f} KiB  {delta}  {count:>10,} objects  {name}")
+
+            if previous:
+                lines += ["", f"Growth since {datetime.fromtimestamp(previous[0]).isoformat(timespec='seconds')} "
+                              f"({now - previous[0]:.0f}s) by module:"]
+                for stat in snapshot.compare_to(previous[1], 'filename')[:10]:
+                    lines.append(f"    {_signed(stat.size_diff)}  {stat.count_diff:+,} blocks  "
+                                 f"{_short(stat.traceback[0].filename)}")
+                lines += ["", "Growth by allocation site:"]
+                for stat in snapshot.compare_to(previous[1], 'lineno')[:top]:
+                    frame = stat.traceback[0]
+                    lines.append(f"    {_signed(stat.size_diff)}  {stat.count_diff:+,} blocks  "
+                                 f"{_short(frame.filename)}:{frame.lineno}")
+            else:
+                lines += ["", "Largest allocation sites (run 'memory' again to see growth):"]
+                for stat in snapshot.statistics('lineno')[:top]:
+                    frame = stat.traceback[0]
+                    lines.append(f"    {stat.size / 1024:12,.1f} KiB  {stat.count:>10,} blocks  "
+                                 f"{_short(frame.filename)}:{frame.lineno}")
+
+            self._previous = (now, snapshot, sizes)
+            report = self._path("memory", ".txt")
+            report.write_text("\n".join(lines) + "\n", encoding='utf-8')
+        print(f"[INFO] Diagnostics: memory report saved to {report}")
+        return str(report)
+
+    def status(self) -> str:
+        threads = ", ".join(sorted(thread.name for thread in threading.enumerate()))
+        traced = tracemalloc.is_tracing()
+        return f"threads: {threads}\ntracemalloc: {'on' if traced else 'off'}"
+
+    def execute(self, line: str) -> str:
+        parts = line.split()
+        if not parts:
+            return "commands: profile [seconds], memory, trace, status"
+        command, args = parts[0].lower(), parts[1:]
+        if command == 'profile':
+            return self.profile(float(args[0]) if args else None)
+        if command == 'memory':
+            return self.memory()
+        if command == 'trace':
+            t = tracer()
+            if t is None:
+                return "tracing is not enabled"
+            return str(t.dump())
+        if command == 'status':
+            return self.status()
+        return f"unknown command: {command}"
+
+    # ----- 제어 소켓 / 주기 실행 -----
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), name="diagnostics-command", daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        with conn:
+            try:
+                conn.settimeout(5.0)
+                line = conn.makefile('r', encoding='utf-8').readline().strip()
+                conn.settimeout(None)
+                reply = self.execute(line)
+            except Exception as e:
+                reply = f"error: {type(e).__name__}: {e}"
+            try:
+                conn.sendall((reply + "\n").encode('utf-8'))
+            except OSError:
+                pass
+
+    def _every(self, interval: float, action):
+        while not self._stop.wait(interval):
+            try:
+                action()
+            except Exception as e:
+                print(f"[WARN] Diagnostics: {e}")
+
+    def start(self, host: str = None, port: int = 0, memory_interval: float = 0, profile_on_start: bool = False):
+        if port:
+            try:
+                self._server = socket.create_server((host or "127.0.0.1", port))
+                self._server.settimeout(0.5)
+                self._threads.append(threading.Thread(target=self._serve, name="diagnostics-control", daemon=True))
+                print(f"[INFO] Diagnostics control: {host or '127.0.0.1'}:{port} "
+                      f"(python -m src.diagnostics profile|memory|trace|status)")
+            except OSError as e:
+                print(f"[WARN] Diagnostics control socket could not bind {host}:{port}: {e}")
+        if memory_interval:
+            self._threads.append(threading.Thread(target=self._every, args=(memory_interval, self.memory),
+                                                  name="diagnostics-memory", daemon=True))
+        if profile_on_start:
+            self._threads.append(threading.Thread(target=self.profile, name="diagnostics-profile", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+
+def _signed(size: int) -> str:
+    return f"{'+' if size >= 0 else '-'}{abs(size) / 1024:,.1f} KiB".rjust(14)
+
+
+def create_diagnostics(config: dict, monitor=None, writer=None) -> Optional[Diagnostics]:
+    """diagnostics 설정으로 진단 도구를 만들고 구성 요소를 등록해 시작 (비활성화 시 None)"""
+    diag_config = config.get('diagnostics', {})
+    if not diag_config.get('enabled', False):
+        return None
+    output_dir = config.get('output', {}).get('directory', "output")
+    diagnostics = Diagnostics(
+        directory=Path(diag_config.get('directory') or Path(output_dir) / "diagnostics"),
+        sample_interval=diag_config.get('sample_interval_ms', 5) / 1000,
+        profile_seconds=diag_config.get('profile_seconds', 10.0),
+        tracemalloc_frames=diag_config.get('tracemalloc_frames', 1),
+    )
+    if monitor is not None:
+        diagnostics.add_components(type(monitor).__name__, monitor, getattr(monitor, 'diagnostic_components', ()))
+    if writer is not None:
+        paths = [path for path in ('message_queue', 'spool') if getattr(writer, path, None) is not None]
+        paths += [f"workers.{i}.message_queue" for i in range(len(getattr(writer, 'workers', ())))]
+        diagnostics.add_components("writer", writer, paths)
+    if diag_config.get('tracemalloc_on_start', False):
+        tracemalloc.start(diagnostics.tracemalloc_frames)
+    diagnostics.start(
+        host=diag_config.get('host', "127.0.0.1"),
+        port=diag_config.get('port', 9465),
+        memory_interval=diag_config.get('memory_interval', 0),
+        profile_on_start=diag_config.get('profile_on_start', False),
+    )
+    return diagnostics
+
+
+def send_command(command: str, host: str = "127.0.0.1", port: int = 9465, timeout: float = 600.0) -> str:
+    """실행 중인 에이전트의 제어 소켓에 명령 한 줄을 보내고 응답을 받음"""
+    with socket.create_connection((host, port), timeout=timeout) as conn:
+        conn.sendall((command.strip() + "\n").encode('utf-8'))
+        return conn.makefile('r', encoding='utf-8').read().strip()
+
+
+if __name__ == "__main__":
+    settings = {}
+    if Path("config.json").exists():
+        with open("config.json", 'r', encoding='utf-8') as f:
+            settings = json.load(f).get('diagnostics', {})
+    print(send_command(" ".join(sys.argv[1:]) or "status",
+                       settings.get('host', "127.0.0.1"), settings.get('port', 9465)))
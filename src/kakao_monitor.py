@@ -1,6 +1,6 @@
 import time
 import threading
-import hashlib
+from collections import Counter
 from datetime import datetime
 from typing import Optional, Callable, List, Dict
 import psutil
@@ -9,16 +9,25 @@ import win32con
 import win32process
 import pyperclip
 from pywinauto import Application
+from .dedup_store import DedupStore, fingerprint
+from .stage_latency import StageTrace, stage_latency
+from .span_tracer import complete, span
 
 class KakaoMonitor:
+    # 진단 memory 명령에서 크기를 보고할 상태
+    diagnostic_components = ('_history', '_last_clipboard', 'emitted')
+
     def __init__(self, callback: Callable[[Dict], None], config: dict):
         self.callback = callback
         self.config = config
         self.is_running = False
-        self._history = set()
+        self._history = DedupStore(config.get('dedup', {}).get('capacity_per_room', 100000))
         self._last_clipboard = ""
         self.target_string = "target_message_가나다"
         self.app = None
+        self.latency = stage_latency()
+        self.room_count = 0
+        self.emitted = Counter()  # 방 이름 -> 새 메시지 수
 
     def find_kakao_process(self) -> Optional[int]:
         for proc in psutil.process_iter(['pid', 'name']):
@@ -71,14 +80,13 @@ class KakaoMonitor:
             if self.target_string in line:
                 print(f"\nSUCCESS - Found Target: {line}")
             
-            msg_hash = hashlib.md5(f"{window_title}_{line}".encode('utf-8')).hexdigest()
-            if msg_hash not in self._history:
+            msg_hash = fingerprint(line)
+            if self._history.check_and_add(window_title, msg_hash):
                 messages.append({
                     'text': f"[{window_title}] {line}",
                     'timestamp': datetime.now(),
-                    'hash': msg_hash
+                    'hash': f"{msg_hash:016x}"
                 })
-                self._history.add(msg_hash)
         
         return messages
 
@@ -87,9 +95,17 @@ class KakaoMonitor:
         
         while self.is_running:
             try:
+                cycle_started = time.perf_counter()
                 win = self.find_chat_window("조항섭")
-                if win and win.exists():
-                    raw_text = self.capture_via_clipboard(win)
+                enumerated = time.perf_counter()
+                self.room_count = 1 if win and win.exists() else 0
+                if self.room_count:
+                    with span('clipboard_capture', 'capture') as s:
+                        raw_text = self.capture_via_clipboard(win)
+                        s.set(chars=len(raw_text or ''))
+                    trace = None
+                    if self.latency is not None:
+                        trace = StageTrace(cycle_started, [('enumerate', enumerated), ('read', time.perf_counter())])
                     
                     if raw_text:
                         if raw_text != self._last_clipboard:
@@ -98,12 +114,25 @@ class KakaoMonitor:
                         
                         new_msgs = self.process_raw_text(raw_text, "조항섭")
                         for m in new_msgs:
+                            if trace is not None:
+                                m['trace'] = trace.fork()
+                                m['trace'].mark('diff')
+                            self.emitted["조항섭"] += 1
                             self.callback(m)
+                complete('cycle', 'capture', int(cycle_started * 1e9), rooms=self.room_count)
                 
                 time.sleep(self.config['kakao']['monitoring_interval'])
             except Exception as e:
                 time.sleep(1)
 
+    def stats(self) -> dict:
+        """메트릭용 방/메시지/중복 제거 통계 (다른 스레드에서 읽어도 되는 사본)"""
+        return {
+            'rooms': self.room_count,
+            'emitted': dict(self.emitted),
+            'dedup': self._history.stats(),
+        }
+
     def start(self):
         if not self.connect():
             print("ERROR: Failed to connect to KakaoTalk.")
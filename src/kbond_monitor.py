@@ -1,125 +1,605 @@
-import win32gui
-import win32con
-import ctypes
 import time
 import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
-import hashlib
 import sys
+from pathlib import Path
+from .kbond_topology import KBondTopology
+from .window_backend import create_backend, ES_READONLY, EVENT_OBJECT_VALUECHANGE, EVENT_OBJECT_CONTENTSCROLLED
+from .dedup_store import DedupStore, fingerprint
+from .transcript_differ import TranscriptDiffer
+from .checkpoint import CheckpointStore
+from .kbond_parser import KBondTranscriptParser
+from .stage_latency import StageTrace, stage_latency
+from .span_tracer import complete, span
 
 # Ensure Korean output works
 if sys.stdout.encoding != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8')
 
+
+def to_crlf(text):
+    """Paragraph breaks as CRLF (WM_GETTEXT style); EM_GETTEXTRANGE returns bare CRs."""
+    return text.replace('\r\n', '\r').replace('\r', '\r\n')
+
+
+def richedit_len(text):
+    """Length in RichEdit character positions, where a paragraph break counts once."""
+    return len(text) - text.count('\r\n')
+
+
+def complete_lines(text):
+    """Text up to and including the last paragraph break; the rest may still be being written."""
+    return text[:max(text.rfind('\r'), text.rfind('\n')) + 1]
+
+
+class PollScheduler:
+    """
+    Per-room poll deadlines. Rooms with new text drop to the fast interval,
+    idle rooms back off exponentially up to max_interval, and priority rooms
+    always stay in the fast lane. Each tick only takes as many due rooms as
+    fit in the latency budget, judged by each room's recent read cost.
+    """
+
+    def __init__(self, min_interval, max_interval, backoff=2.0, budget=0.5, priority_rooms=(), parallelism=1):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self.budget = budget
+        self.priority_rooms = list(priority_rooms)
+        self.parallelism = max(1, parallelism)
+        self._deadline = {} # hwnd -> next poll time
+        self._interval = {} # hwnd -> current poll interval
+        self._cost = {} # hwnd -> smoothed read cost (seconds)
+        self._priority = {} # hwnd -> bool
+
+    def is_priority(self, title):
+        return any(name in title for name in self.priority_rooms)
+
+    def sync(self, rooms, now):
+        current = {hwnd for hwnd, _ in rooms}
+        for hwnd in list(self._deadline):
+            if hwnd not in current:
+                for d in (self._deadline, self._interval, self._cost, self._priority):
+                    d.pop(hwnd, None)
+        for hwnd, title in rooms:
+            if hwnd not in self._deadline:
+                self._deadline[hwnd] = now
+                self._interval[hwnd] = self.min_interval
+                self._cost[hwnd] = 0.0
+            self._priority[hwnd] = self.is_priority(title)
+
+    def due(self, now):
+        """Due rooms, priority first then most overdue, trimmed to the latency budget."""
+        due = [hwnd for hwnd, deadline in self._deadline.items() if deadline <= now]
+        due.sort(key=lambda hwnd: (not self._priority[hwnd], self._deadline[hwnd]))
+        planned = []
+        spent = 0.0
+        for hwnd in due:
+            cost = self._cost[hwnd]
+            if planned and not self._priority[hwnd] and spent + cost > self.budget:
+                break  # left due; picked up first next tick
+            planned.append(hwnd)
+            spent += cost / self.parallelism
+        return planned
+
+    def report(self, hwnd, active, cost, now):
+        if hwnd not in self._deadline:
+            return
+        self._cost[hwnd] = cost if self._cost[hwnd] == 0.0 else 0.8 * self._cost[hwnd] + 0.2 * cost
+        if active or self._priority[hwnd]:
+            interval = self.min_interval
+        else:
+            interval = min(self._interval[hwnd] * self.backoff, self.max_interval)
+        self._interval[hwnd] = interval
+        self._deadline[hwnd] = now + interval
+
+    def defer(self, hwnd, delay, now):
+        """Push a room back without touching its interval or cost (its last read is still running)."""
+        if hwnd in self._deadline:
+            self._deadline[hwnd] = max(self._deadline[hwnd], now + delay)
+
+    def next_deadline(self):
+        return min(self._deadline.values()) if self._deadline else None
+
+
 class KBondMonitor:
-    def __init__(self, callback, config):
+    # Per-room state reported by the diagnostics memory command
+    diagnostic_components = ('_history', 'differ', '_last_text_len', '_read_offset', '_tail_text',
+                             '_resume_points', '_seq', 'emitted', 'hung_reads', 'timed_out_reads',
+                             'parser', 'checkpoint._rooms', 'topology._rooms', 'topology._history_ctrl')
+
+    def __init__(self, callback, config, backend=None):
         self.callback = callback
         self.config = config
+        # Window access goes through a backend so the capture path also runs against the simulator
+        self.backend = backend or create_backend(config.get('kbond', {}).get('backend', 'win32'))
         self.is_running = False
-        self._history = {} # window_title -> set of message hashes
+        self._history = DedupStore(config.get('dedup', {}).get('capacity_per_room', 100000)) # window_title -> line fingerprints
+        self.differ = TranscriptDiffer(config.get('dedup', {}).get('anchor_lines', 4))
         self._last_text_len = {} # window_title -> last seen text length
+        self._read_offset = {} # window_title -> character position where the anchor lines start
+        self._tail_text = {} # window_title -> text from _read_offset to the end at the last read
         self.target_class = "TfrmDccChat"
+        self.read_mode = config.get('kbond', {}).get('read_mode', 'incremental')
+        self.topology = KBondTopology(
+            self.target_class, self.find_chat_windows, self.backend,
+            sweep_interval=config.get('kbond', {}).get('topology_sweep_interval', 10.0)
+        )
+        self.capture_mode = config.get('kbond', {}).get('capture_mode', 'polling')
+        kbond_config = config.get('kbond', {})
+        interval = kbond_config.get('monitoring_interval', 1.0)
+        budget = config.get('performance', {}).get('max_response_time', interval)
+        self.read_timeout = kbond_config.get('read_timeout', 0.2)
+        self.capture_workers = kbond_config.get('capture_workers', 4)
+        self.scheduler = PollScheduler(
+            min_interval=kbond_config.get('min_poll_interval', interval),
+            max_interval=kbond_config.get('max_poll_interval', budget),
+            backoff=kbond_config.get('poll_backoff', 2.0),
+            budget=budget,
+            priority_rooms=kbond_config.get('priority_rooms', []),
+            parallelism=self.capture_workers
+        )
+        self.pool = None
+        self._in_flight = {} # hwnd -> Future of a read that has not finished yet
+        self._in_flight_lock = threading.Lock()
+        self._dirty = set() # chat hwnds signalled by value-change events
+        self._dirty_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._change_hook = None
+        checkpoint_config = config.get('checkpoint', {})
+        checkpoint_dir = checkpoint_config.get('directory', config.get('output', {}).get('directory', 'output'))
+        self.checkpoint = CheckpointStore(Path(checkpoint_dir) / "kbond_checkpoint.json",
+                                          checkpoint_config.get('interval', 5.0))
+        self.history_policy = checkpoint_config.get('history_policy', 'backfill')
+        self._resume_points = {} # window_title -> checkpoint entry not yet confirmed against the window
+        self._seq = {} # window_title -> sequence number of the last emitted line
+        self.parser = None
+        if kbond_config.get('parse_messages', False):
+            self.parser = KBondTranscriptParser(kbond_config.get('header_patterns'), kbond_config.get('date_patterns'))
+        # Per-stage latency: each emitted message carries a trace that the writer finishes
+        self.latency = stage_latency()
+        # Health counters (read by the metrics endpoint from another thread)
+        self.room_count = 0
+        self.emitted = Counter() # window_title -> lines emitted
+        self.hung_reads = Counter() # window_title -> reads skipped because the window was hung
+        self.timed_out_reads = Counter() # window_title -> reads that missed the capture deadline
         self.thread = None
 
-    def get_text_safe(self, hwnd):
-        try:
-            length = win32gui.SendMessage(hwnd, win32con.WM_GETTEXTLENGTH, 0, 0)
-            if length > 0:
-                buffer = ctypes.create_unicode_buffer(length + 1)
-                win32gui.SendMessage(hwnd, win32con.WM_GETTEXT, length + 1, buffer)
-                return buffer.value
-        except Exception:
-            pass
-        return ""
+    @property
+    def timeout_ms(self):
+        return int(self.read_timeout * 1000)
+
+    def get_text_length(self, hwnd):
+        with span('WM_GETTEXTLENGTH', 'win32', hwnd=hwnd):
+            return self.backend.text_length(hwnd, self.timeout_ms)
+
+    def get_text_safe(self, hwnd, length=None):
+        """Full WM_GETTEXT read; None if the control did not answer in time."""
+        if length is None:
+            length = self.get_text_length(hwnd)
+        with span('WM_GETTEXT', 'win32', hwnd=hwnd, chars=length):
+            return self.backend.get_text(hwnd, length, self.timeout_ms)
 
     def find_chat_windows(self):
-        windows = []
-        def enum_cb(hwnd, param):
-            if win32gui.IsWindowVisible(hwnd):
-                cls = win32gui.GetClassName(hwnd)
-                if cls == self.target_class:
-                    title = win32gui.GetWindowText(hwnd)
-                    windows.append((hwnd, title))
-            return True
-        win32gui.EnumWindows(enum_cb, None)
-        return windows
+        backend = self.backend
+        return [
+            (hwnd, backend.window_text(hwnd))
+            for hwnd in backend.top_level_windows()
+            if backend.is_visible(hwnd) and backend.class_name(hwnd) == self.target_class
+        ]
 
     def find_history_controls(self, parent_hwnd):
-        controls = []
-        def enum_cb(hwnd, param):
-            cls = win32gui.GetClassName(hwnd)
-            if "RichEdit" in cls:
-                controls.append(hwnd)
-            return True
-        win32gui.EnumChildWindows(parent_hwnd, enum_cb, None)
-        return controls
+        with span('EnumChildWindows', 'win32', hwnd=parent_hwnd):
+            return [hwnd for hwnd in self.backend.child_windows(parent_hwnd) if "RichEdit" in self.backend.class_name(hwnd)]
 
-    def process_window(self, hwnd, title):
+    def get_history_control(self, hwnd):
+        ctrl = self.topology.history_control(hwnd)
+        if ctrl is not None:
+            return ctrl
         controls = self.find_history_controls(hwnd)
         if not controls:
-            return
+            return None
+        # The history pane is the read-only RichEdit (the input box is editable);
+        # among those, the one holding the most text.
+        def rank(h):
+            readonly = bool(self.backend.style(h) & ES_READONLY)
+            return (readonly, self.get_text_length(h))
+        ctrl = max(controls, key=rank)
+        if rank(ctrl) != (False, 0):
+            self.topology.set_history_control(hwnd, ctrl)
+        return ctrl
+
+    def _tail_state(self, length, base_offset, text):
+        # Keep the differ's anchor lines and any unterminated remainder around:
+        # they are re-read next time so the differ can anchor on them and the
+        # prefix doubles as a rewrite check. The remainder is never emitted.
+        complete = complete_lines(text)
+        cut = len(complete)
+        found = 0
+        for part in reversed(complete.splitlines(True)):
+            if part.strip():
+                if found == self.differ.anchor_lines:
+                    break
+                found += 1
+            cut -= len(part)
+        # WM_GETTEXT reports paragraph breaks as CRLF, RichEdit positions count them once
+        return (length, base_offset + cut - text.count('\r\n', 0, cut), text[cut:])
+
+    def _resync(self, ctrl, length):
+        text = self.get_text_safe(ctrl, length)
+        if text is None:
+            return None, None, True
+        text = to_crlf(text)
+        return complete_lines(text), self._tail_state(length, 0, text), True
+
+    def read_incremental(self, ctrl, state):
+        """
+        Returns (text, new read state, is full text). Text is None if nothing
+        changed or the control did not answer; the caller keeps its old state
+        then. state is (text length, read offset, tail text) from the previous read.
+        Text ends at the last paragraph break: a line KBond is still writing
+        stays in the tail and is emitted once it is terminated.
+        """
+        length = self.get_text_length(ctrl)
+        if length == 0:
+            return None, None, False  # empty, or the probe timed out
+        if state is not None and length == state[0]:
+            return None, None, False
+        if state is None or length < state[0]:
+            return self._resync(ctrl, length)
+
+        last, offset, prev_tail = state
+        # WM_GETTEXTLENGTH counts CRLF as two characters, so the growth is an upper bound
+        # and the range can reach into text appended after the probe
+        end = offset + richedit_len(prev_tail) + (length - last)
+        with span('EM_GETTEXTRANGE', 'win32', hwnd=ctrl, chars=end - offset):
+            tail = self.backend.get_text_range(ctrl, offset, end, self.timeout_ms)
+        if tail is not None:
+            # The range comes back with bare CRs; the kept tail is CRLF like WM_GETTEXT
+            tail = to_crlf(tail)
+        if tail is None or not tail.startswith(prev_tail):
+            # EM_GETTEXTRANGE unavailable or the history was rewritten
+            return self._resync(ctrl, length)
+        return complete_lines(tail), self._tail_state(length, offset, tail), False
+
+    def _resume_state(self, ctrl, entry):
+        # Only a length probe and a read of the saved tail: the room resumes
+        # where the last run stopped if that tail is still in place.
+        try:
+            last, offset, tail_chars = entry['text_len'], entry['read_offset'], entry['tail_chars']
+        except KeyError:
+            return None
+        if self.get_text_length(ctrl) < last:
+            return None
+        # tail_chars counts RichEdit positions; the fingerprint was taken over the CRLF form
+        tail = self.backend.get_text_range(ctrl, offset, offset + tail_chars, self.timeout_ms) if tail_chars else ""
+        if tail is None:
+            return None
+        tail = to_crlf(tail)
+        if richedit_len(tail) != tail_chars or fingerprint(tail) != entry.get('tail_fp'):
+            return None
+        return (last, offset, tail)
 
-        # Usually TJvRichEdit is the main one. Let's find the one with the most text.
-        best_text = ""
-        for ctrl in controls:
-            text = self.get_text_safe(ctrl)
-            if len(text) > len(best_text):
-                best_text = text
+    def _snapshot_state(self, title):
+        if title not in self._last_text_len:
+            return None
+        return (self._last_text_len[title], self._read_offset[title], self._tail_text[title])
 
+    def read_room(self, hwnd, title, state, resume=None):
+        """Window I/O only (runs on a worker thread); never touches monitor state."""
+        with span('read_room', 'capture', room=title) as s:
+            result = self._read_room(hwnd, title, state, resume)
+            s.set(hung=result['hung'], chars=len(result['text'] or ''))
+        return result
+
+    def _read_room(self, hwnd, title, state, resume):
+        started = time.time()
+        result = {'hwnd': hwnd, 'title': title, 'text': None, 'state': None, 'full': True}
+        ctrl = self.get_history_control(hwnd)
+        result['hung'] = ctrl is not None and self.backend.is_hung(ctrl)
+        if ctrl is not None and not result['hung']:
+            if self.read_mode == 'incremental':
+                if state is None and resume is not None:
+                    state = self._resume_state(ctrl, resume)
+                result['text'], result['state'], result['full'] = self.read_incremental(ctrl, state)
+                if result['state'] is None and resume is not None:
+                    result['state'] = state
+            else:
+                result['text'] = self.get_text_safe(ctrl)
+        result['cost'] = time.time() - started
+        return result
+
+    def apply_read(self, result, cycle=None):
+        """
+        Commits a finished read on the monitor thread and emits new lines.
+        cycle is (cycle start, rooms enumerated) on the perf_counter clock when
+        stage latency is measured.
+        """
+        applied = time.perf_counter()
+        title = result['title']
+        if result.get('hung'):
+            self.hung_reads[title] += 1
+        if result['state'] is not None:
+            self._last_text_len[title], self._read_offset[title], self._tail_text[title] = result['state']
+
+        best_text = result['text']
         if not best_text:
-            return
+            if result['state'] is not None:
+                self._resume_points.pop(title, None)
+                self._save_room(title)
+            return False
 
-        # Check if we've seen this window before
-        if title not in self._history:
-            self._history[title] = set()
-            # On first encounter, we might want to skip existing history 
-            # or process all of it. Let's process all for now.
+        lines = [line.strip() for line in best_text.splitlines() if line.strip()]
+        # A full read starts at line 0; an incremental tail starts at the anchor
+        start = 0 if result['full'] else self.differ.anchor_start(title)
+        resuming = self._resume_points.pop(title, None) is not None
+
+        # Check if we've seen this window before (in this run or a checkpoint)
+        first_sighting = title not in self.differ
+        if first_sighting:
             print(f"INFO: Monitoring new window: {title}")
+        appended = None if first_sighting else self.differ.diff(title, lines, start)
+
+        if appended is None and self.history_policy == 'skip' and (first_sighting or resuming):
+            # Existing history is treated as already captured
+            self.differ.reset(title, lines, start)
+            for line in lines:
+                self._history.add(title, fingerprint(line))
+            self._save_room(title)
+            return False
+
+        if first_sighting:
+            # Backfill: with no anchor yet every line is new
+            appended = self.differ.diff(title, lines, start)
+        if appended is None:
+            # Anchor lost (history cleared or rewritten): fall back to fingerprint dedup
+            appended = []
+            for line in lines:
+                fp = fingerprint(line)
+                if self._history.check_and_add(title, fp):
+                    appended.append((line, fp))
+            self.differ.reset(title, lines, start)
+        else:
+            for _, fp in appended:
+                self._history.add(title, fp)
+
+        seq = self._seq.get(title, 0)
+        self._seq[title] = seq + len(appended)
+        self._save_room(title)
 
-        lines = best_text.splitlines()
-            
-        new_messages = []
-        for line in lines:
-            line = line.strip()
-            if not line: continue
-            
-            # Use hash of the line to identify uniqueness within this window
-            msg_hash = hashlib.md5(line.encode('utf-8')).hexdigest()
-            if msg_hash not in self._history[title]:
-                self._history[title].add(msg_hash)
-                new_messages.append({
-                    'window': title,
-                    'text': line,
-                    'timestamp': datetime.now()
-                })
-        
-        for msg in new_messages:
+        now = datetime.now()
+        messages = (
+            {'window': title, 'text': line, 'timestamp': now, 'hash': f"{fp:016x}", 'seq': seq + i}
+            for i, (line, fp) in enumerate(appended, 1)
+        )
+        if self.parser is not None:
+            # Group lines into sender/time/body records; a batch never waits for the next read
+            messages = self.parser.parse_lines(title, ((msg['text'], msg) for msg in messages))
+        trace = None
+        if self.latency is not None and cycle is not None:
+            trace = StageTrace(cycle[0], [('enumerate', cycle[1]), ('read', applied)])
+        for msg in messages:
+            if trace is not None:
+                msg['trace'] = trace.fork()
+                msg['trace'].mark('diff')
+            self.emitted[title] += 1
             self.callback(msg)
+        return bool(appended)
 
-    def monitoring_loop(self):
-        interval = self.config.get('kbond', {}).get('monitoring_interval', 1.0)
+    def _save_room(self, title):
+        fields = {
+            'anchor': self.differ.anchor(title),
+            'line_count': self.differ.line_count(title),
+            'seq': self._seq.get(title, 0),
+        }
+        if title in self._last_text_len:
+            tail = self._tail_text[title]
+            fields.update(text_len=self._last_text_len[title], read_offset=self._read_offset[title],
+                          tail_chars=richedit_len(tail), tail_fp=fingerprint(tail))
+        self.checkpoint.update(title, **fields)
+
+    def load_checkpoint(self):
+        for title, entry in self.checkpoint.load().items():
+            if entry.get('anchor'):
+                self.differ.set_anchor(title, entry['anchor'], entry.get('line_count'))
+            self._seq[title] = entry.get('seq', 0)
+            self._resume_points[title] = entry
+
+    def process_window(self, hwnd, title):
+        return self.apply_read(self.read_room(hwnd, title, self._snapshot_state(title),
+                                              self._resume_points.get(title)))
+
+    def _forget_in_flight(self, hwnd, future):
+        with self._in_flight_lock:
+            if self._in_flight.get(hwnd) is future:
+                del self._in_flight[hwnd]
+        if self.capture_mode == 'event':
+            # A change that arrived while this read hung is still pending
+            with self._dirty_lock:
+                if hwnd in self._dirty:
+                    self._wake.set()
+
+    def capture_rooms(self, rooms, cycle=None):
+        """
+        Reads rooms on the worker pool and applies the results in order.
+        A read that misses its deadline is left running and its result is
+        dropped; the room is skipped until that read returns.
+        Returns ([(hwnd, active, cost)] for every room that was attempted,
+        [(hwnd, title)] for rooms skipped because their read is still running).
+        """
+        started = time.time()
+        submitted = []
+        skipped = []
+        for hwnd, title in rooms:
+            with self._in_flight_lock:
+                if hwnd in self._in_flight:
+                    skipped.append((hwnd, title))
+                    continue
+                future = self.pool.submit(self.read_room, hwnd, title, self._snapshot_state(title),
+                                          self._resume_points.get(title))
+                self._in_flight[hwnd] = future
+            future.add_done_callback(lambda f, h=hwnd: self._forget_in_flight(h, f))
+            submitted.append((hwnd, title, future))
+        if not submitted:
+            return [], skipped
+
+        waves = -(-len(submitted) // self.capture_workers)
+        wait([f for _, _, f in submitted], timeout=self.read_timeout * waves)
+        elapsed = time.time() - started
+
+        outcomes = []
+        for hwnd, title, future in submitted:
+            if not future.done():
+                self.timed_out_reads[title] += 1
+                outcomes.append((hwnd, False, elapsed))
+                continue
+            try:
+                result = future.result()
+                with span('apply_read', 'capture', room=title):
+                    active = self.apply_read(result, cycle)
+                cost = result['cost']
+            except Exception:
+                active, cost = False, elapsed
+            outcomes.append((hwnd, active, cost))
+        return outcomes, skipped
+
+    def _on_change_event(self, event, hwnd, id_object, id_child):
+        # Runs on the hook thread: only record which room changed and wake the loop.
+        room = self.topology.room_of_control(hwnd)
+        if room is None:
+            # History control not resolved yet; the event may come from any child of the room
+            room = self.backend.root(hwnd)
+            if not self.topology.is_room(room):
+                return
+        with self._dirty_lock:
+            self._dirty.add(room)
+        self._wake.set()
+
+    def _take_dirty(self):
+        with self._dirty_lock:
+            dirty = self._dirty
+            self._dirty = set()
+        return dirty
+
+    def polling_loop(self):
         while self.is_running:
             try:
-                windows = self.find_chat_windows()
-                for hwnd, title in windows:
-                    self.process_window(hwnd, title)
-                time.sleep(interval)
+                cycle_started = time.perf_counter()
+                self.topology.maybe_sweep()
+                rooms = self.topology.rooms()
+                cycle = (cycle_started, time.perf_counter())
+                titles = dict(rooms)
+                self.room_count = len(titles)
+                now = time.time()
+                self.scheduler.sync(rooms, now)
+                due = self.scheduler.due(now)
+                outcomes, skipped = self.capture_rooms([(hwnd, titles[hwnd]) for hwnd in due], cycle)
+                finished = time.time()
+                for hwnd, active, cost in outcomes:
+                    self.scheduler.report(hwnd, active, cost, finished)
+                for hwnd, _ in skipped:
+                    # Otherwise the room stays due and the loop spins until the hung read returns
+                    self.scheduler.defer(hwnd, self.read_timeout, finished)
+                self.checkpoint.maybe_save()
+                complete('cycle', 'capture', int(cycle_started * 1e9), rooms=len(titles), read=len(outcomes))
+
+                next_deadline = self.scheduler.next_deadline()
+                if next_deadline is None:
+                    next_deadline = time.time() + self.scheduler.max_interval
+                # _wake is only set by stop() in polling mode
+                self._wake.wait(timeout=max(0.0, min(next_deadline, time.time() + self.scheduler.max_interval) - time.time()))
             except Exception as e:
                 # print(f"Error in monitoring loop: {e}")
                 time.sleep(2)
 
+    def event_loop(self):
+        # Rooms are read only when they signal a change; a slow full sweep
+        # covers rooms whose events were missed.
+        safety_interval = self.config.get('kbond', {}).get('safety_poll_interval', 5.0)
+        seen = set()
+        next_safety_poll = 0.0
+        while self.is_running:
+            try:
+                self._wake.wait(timeout=max(0.0, next_safety_poll - time.time()))
+                self._wake.clear()
+                cycle_started = time.perf_counter()
+                dirty = self._take_dirty()
+                self.topology.maybe_sweep()
+                full_sweep = time.time() >= next_safety_poll
+                targets = []
+                rooms = self.topology.rooms()
+                self.room_count = len(rooms)
+                for hwnd, title in rooms:
+                    if full_sweep or hwnd in dirty or hwnd not in seen:
+                        seen.add(hwnd)
+                        targets.append((hwnd, title))
+                _, skipped = self.capture_rooms(targets, (cycle_started, time.perf_counter()))
+                if skipped:
+                    # Read again once the hung read returns (_forget_in_flight wakes the loop)
+                    with self._dirty_lock:
+                        self._dirty.update(hwnd for hwnd, _ in skipped)
+                self.checkpoint.maybe_save()
+                complete('cycle', 'capture', int(cycle_started * 1e9), rooms=len(rooms), read=len(targets),
+                         dirty=len(dirty))
+                if full_sweep:
+                    next_safety_poll = time.time() + safety_interval
+            except Exception as e:
+                time.sleep(2)
+
+    def monitoring_loop(self):
+        if self.capture_mode == 'event':
+            self._change_hook = self.backend.event_hook(self._on_change_event)
+            self._change_hook.add_range(EVENT_OBJECT_VALUECHANGE)
+            self._change_hook.add_range(EVENT_OBJECT_CONTENTSCROLLED)
+            if self._change_hook.start():
+                self.event_loop()
+                return
+            print("[WARN] Change events unavailable, falling back to polling")
+            self._change_hook.stop()
+        self.polling_loop()
+
+    def stats(self):
+        """Room, emitted-line, hung-read and dedup counters (copies; safe from any thread)."""
+        return {
+            'rooms': self.room_count,
+            'emitted': dict(self.emitted),
+            'hung_reads': dict(self.hung_reads),
+            'timed_out_reads': dict(self.timed_out_reads),
+            'dedup': self._history.stats(),
+        }
+
     def start(self):
         if self.is_running:
             return
         self.is_running = True
+        self.load_checkpoint()
+        self.pool = ThreadPoolExecutor(max_workers=self.capture_workers, thread_name_prefix="kbond-read")
+        self.topology.start()
         self.thread = threading.Thread(target=self.monitoring_loop, daemon=True)
         self.thread.start()
         print("KBond Monitor Started.")
 
     def stop(self):
         self.is_running = False
+        self._wake.set()
+        stopped = True
         if self.thread:
-            self.thread.join(timeout=1)
+            # The loop may still be applying a read; save only once it has stopped
+            self.thread.join(timeout=5)
+            stopped = not self.thread.is_alive()
+        if self._change_hook:
+            self._change_hook.stop()
+        if self.pool:
+            # Reads stuck on a hung window are bounded by SendMessageTimeout
+            self.pool.shutdown(wait=False)
+        if stopped:
+            self.checkpoint.save()
+        else:
+            print("[WARN] Monitoring thread did not stop in time; checkpoint not saved (the last periodic save is kept)")
+        self.topology.stop()
+        self.backend.close()
         print("KBond Monitor Stopped.")
 
 if __name__ == "__main__":
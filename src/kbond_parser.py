@@ -0,0 +1,182 @@
+"""
+KBond 대화 내역 스트리밍 파서
+RichEdit 텍스트 줄을 발신자, KBond 표시 시각, 본문을 가진 메시지 레코드로 변환
+여러 줄 메시지는 다음 헤더가 나올 때까지 한 레코드로 묶음
+"""
+import re
+from datetime import date, datetime, time as dtime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_TIME = r'(?:오전|오후|AM|PM)?\s*\d{1,2}:\d{2}(?::\d{2})?'
+_TIME_SECONDS = r'(?:오전|오후|AM|PM)?\s*\d{1,2}:\d{2}:\d{2}'
+
+# 헤더 줄 패턴 (sender, time 그룹 필수 / body 그룹 선택)
+# 본문에 '(14:00)' 같은 괄호 시각이 들어가도 헤더로 보지 않도록 헤더 모양 전체에 맞춤
+DEFAULT_HEADER_PATTERNS = [
+    # [홍길동] (오후 2:35)  - 본문은 다음 줄부터
+    r'^\[(?P<sender>[^\[\]()]+)\]\s*\((?P<time>' + _TIME + r')\)\s*$',
+    # 홍길동 (14:35:12) 본문  - 발신자는 한 단어, 시각은 초까지
+    r'^(?P<sender>[^\s\[\]()]+)\s*\((?P<time>' + _TIME_SECONDS + r')\)\s*:?\s*(?P<body>.*)$',
+    # [14:35:12] 홍길동 : 본문
+    r'^\[(?P<time>' + _TIME + r')\]\s*(?P<sender>[^:\[\]]+?)\s*:\s*(?P<body>.*)$',
+    # [홍길동] [오후 2:35] 본문
+    r'^\[(?P<sender>[^\]]+)\]\s*\[(?P<time>' + _TIME + r')\]\s*(?P<body>.*)$',
+]
+
+# 날짜 구분선 패턴 (year, month, day 그룹)
+DEFAULT_DATE_PATTERNS = [
+    r'^[\s\-=─]*(?P<year>\d{4})\s*[년./-]\s*(?P<month>\d{1,2})\s*[월./-]\s*(?P<day>\d{1,2})\s*일?'
+    r'\s*(?:\(?[월화수목금토일]\)?(?:요일)?)?[\s\-=─]*$',
+]
+
+_CLOCK = re.compile(r'(?P<ampm>오전|오후|AM|PM)?\s*(?P<h>\d{1,2}):(?P<m>\d{2})(?::(?P<s>\d{2}))?')
+_LINE = re.compile(r'[^\r\n]+')
+
+
+def parse_clock(text: str) -> Optional[dtime]:
+    """'14:35:12', '오후 2:35' 형식의 시각 파싱"""
+    m = _CLOCK.search(text)
+    if not m:
+        return None
+    hour = int(m.group('h'))
+    ampm = m.group('ampm')
+    if ampm in ('오후', 'PM') and hour < 12:
+        hour += 12
+    elif ampm in ('오전', 'AM') and hour == 12:
+        hour = 0
+    try:
+        return dtime(hour, int(m.group('m')), int(m.group('s') or 0))
+    except ValueError:
+        return None
+
+
+class KBondTranscriptParser:
+    def __init__(self, header_patterns: List[str] = None, date_patterns: List[str] = None):
+        """
+        Args:
+            header_patterns: 헤더 줄 정규식 목록 (기본값: DEFAULT_HEADER_PATTERNS)
+            date_patterns: 날짜 구분선 정규식 목록 (기본값: DEFAULT_DATE_PATTERNS)
+        """
+        self.header_patterns = [re.compile(p) for p in (header_patterns or DEFAULT_HEADER_PATTERNS)]
+        self.date_patterns = [re.compile(p) for p in (date_patterns or DEFAULT_DATE_PATTERNS)]
+        # room -> 배치를 넘어 이어지는 상태 (현재 날짜, 마지막 발신자/시각)
+        self._rooms: Dict[str, dict] = {}
+
+    def _match_header(self, line: str):
+        for pattern in self.header_patterns:
+            m = pattern.match(line)
+            if m:
+                return m
+        return None
+
+    def _match_date(self, line: str) -> Optional[date]:
+        for pattern in self.date_patterns:
+            m = pattern.match(line)
+            if m:
+                try:
+                    return date(int(m.group('year')), int(m.group('month')), int(m.group('day')))
+                except ValueError:
+                    return None
+        return None
+
+    @staticmethod
+    def _record(room: str, kind: str, meta: dict, sender=None, source_time=None, continued=False) -> dict:
+        return {
+            'window': room,
+            'type': kind,
+            'sender': sender,
+            'source_time': source_time,
+            'body': [],
+            'timestamp': meta.get('timestamp') or datetime.now(),
+            'seq': meta.get('seq'),
+            'hash': meta.get('hash'),
+            'continued': continued,
+        }
+
+    @staticmethod
+    def _finish(record: dict) -> dict:
+        body = record.pop('body')
+        record['text'] = "\n".join(body)
+        record['line_count'] = len(body) or 1
+        return record
+
+    def _source_time(self, state: dict, clock: Optional[dtime], meta: dict) -> Optional[datetime]:
+        if clock is None:
+            return None
+        day = state['date'] or (meta.get('timestamp') or datetime.now()).date()
+        return datetime.combine(day, clock)
+
+    def parse_lines(self, room: str, items: Iterable[Tuple[str, dict]]) -> Iterator[dict]:
+        """
+        (줄, 메타) 스트림을 메시지 레코드 스트림으로 변환
+
+        메타에는 캡처 시각(timestamp), 순번(seq), 지문(hash)이 들어가며 레코드는
+        첫 줄의 메타를 이어받음. 마지막 레코드는 입력이 끝나면 바로 내보내고,
+        다음 배치가 헤더 없이 시작하면 같은 발신자의 이어지는 레코드(continued)로 처리.
+        """
+        state = self._rooms.setdefault(room, {'date': None, 'sender': None, 'clock': None})
+        current = None
+        for line, meta in items:
+            m = self._match_header(line)
+            if m:
+                if current is not None:
+                    yield self._finish(current)
+                clock = parse_clock(m.group('time'))
+                state['sender'], state['clock'] = m.group('sender').strip(), clock
+                current = self._record(room, 'message', meta, state['sender'],
+                                       self._source_time(state, clock, meta))
+                body = m.groupdict().get('body')
+                if body:
+                    current['body'].append(body)
+                continue
+
+            day = self._match_date(line)
+            if day is not None:
+                if current is not None:
+                    yield self._finish(current)
+                    current = None
+                state['date'] = day
+                record = self._record(room, 'date', meta)
+                record['body'].append(line)
+                yield self._finish(record)
+                continue
+
+            if current is None:
+                if state['sender'] is None:
+                    # 헤더를 본 적 없는 방(알 수 없는 형식): 줄마다 한 레코드
+                    record = self._record(room, 'text', meta)
+                    record['body'].append(line)
+                    yield self._finish(record)
+                    continue
+                current = self._record(room, 'message', meta, state['sender'],
+                                       self._source_time(state, state['clock'], meta), continued=True)
+            current['body'].append(line)
+
+        if current is not None:
+            yield self._finish(current)
+
+    def parse_text(self, room: str, chunks: Iterable[str], timestamp: datetime = None) -> Iterator[dict]:
+        """
+        큰 텍스트(백필, 저장된 내역)를 청크 단위로 한 번에 훑어 레코드로 변환
+        청크 경계에 걸친 줄은 다음 청크와 이어 붙임
+        """
+        meta = {'timestamp': timestamp or datetime.now()}
+
+        def lines():
+            carry = ""
+            for chunk in chunks:
+                if carry:
+                    chunk = carry + chunk
+                    carry = ""
+                end = len(chunk)
+                if chunk and chunk[-1] not in '\r\n':
+                    end = max(chunk.rfind('\r'), chunk.rfind('\n')) + 1
+                    carry = chunk[end:]
+                for m in _LINE.finditer(chunk, 0, end):
+                    line = m.group().strip()
+                    if line:
+                        yield line, meta
+            if carry.strip():
+                yield carry.strip(), meta
+
+        return self.parse_lines(room, lines())
@@ -24,6 +24,7 @@ from .utils import (
     get_room_name
 )
 from .menu import show_tkinter_menu
+from ..span_tracer import span, instant
 
 def ts():
     """밀리초 타임스탬프 반환"""
@@ -133,6 +134,10 @@ def run_with_timeout(func, args=(), timeout=OPERATION_TIMEOUT):
 
 def queue_menu_request():
     """저장된 데이터를 Queue에 넣어 메인 스레드에서 메뉴를 표시하도록 요청합니다."""
+    with span('queue_menu_request', 'hook'):
+        _queue_menu_request()
+
+def _queue_menu_request():
     global pending_data
     time.sleep(0.15)  # KBond 메뉴가 완전히 뜰 때까지 대기
     
@@ -158,6 +163,11 @@ def queue_menu_request():
 
 def prefetch_data(hwnd, x, y):
     """텍스트 데이터를 미리 가져옵니다."""
+    with span('prefetch_data', 'hook', hwnd=hwnd) as s:
+        _prefetch_data(hwnd, x, y)
+        s.set(is_kbond=pending_data['is_kbond'], room=pending_data['room_name'])
+
+def _prefetch_data(hwnd, x, y):
     global pending_data, last_kbond_hwnd, last_kbond_room
     
     try:
@@ -191,7 +201,8 @@ def prefetch_data(hwnd, x, y):
             print(f"[{ts()}] Pre-fetching text (WM_GETTEXT only, no EM_* calls)...")
             
             # 전체 텍스트를 '딱 한 번'만 읽어옴
-            all_text = get_all_text(hwnd)
+            with span('WM_GETTEXT', 'win32', hwnd=hwnd):
+                all_text = get_all_text(hwnd)
             
             # 텍스트 가져온 후 창 상태 다시 확인
             info_after = get_window_info(hwnd)
@@ -227,8 +238,10 @@ def prefetch_data(hwnd, x, y):
 
 def prepare_and_fetch(x, y):
     """별도 스레드에서 API 호출 수행 - 후킹 콜백 부하 최소화"""
-    global last_kbond_hwnd
-    
+    with span('prepare_and_fetch', 'hook', x=x, y=y):
+        _prepare_and_fetch(x, y)
+
+def _prepare_and_fetch(x, y):
     # 새 클릭 전 마지막 창 상태 확인
     check_last_window_health()
     
@@ -254,9 +267,11 @@ def mouse_handler(nCode, wParam, lParam):
     try:
         if wParam == win32con.WM_RBUTTONDOWN:
             data = ctypes.cast(lParam, ctypes.POINTER(MSLLHOOKSTRUCT)).contents
+            instant('WM_RBUTTONDOWN', 'hook', x=data.pt.x, y=data.pt.y)
             # 모든 API 호출을 스레드로 분리
             threading.Thread(target=lambda: prepare_and_fetch(data.pt.x, data.pt.y), daemon=True).start()
         elif wParam == win32con.WM_RBUTTONUP:
+            instant('WM_RBUTTONUP', 'hook')
             print(f"[{ts()}] ========== RIGHT-CLICK UP ==========")
             # 메뉴 표시 요청을 Queue에 넣음 (별도 스레드에서)
             threading.Thread(target=queue_menu_request, daemon=True).start()
@@ -296,9 +311,10 @@ def start_hook():
                 data = menu_queue.get_nowait()
                 if data:
                     print(f"[{ts()}] Processing menu request for room \"{data['room']}\"...")
-                    check_last_window_health()
-                    show_tkinter_menu(data['x'], data['y'], data['sentence'], data['all_text'])
-                    check_last_window_health()
+                    with span('show_menu', 'hook', room=data['room']):
+                        check_last_window_health()
+                        show_tkinter_menu(data['x'], data['y'], data['sentence'], data['all_text'])
+                        check_last_window_health()
                     print(f"[{ts()}] Menu closed.")
             except queue.Empty:
                 pass
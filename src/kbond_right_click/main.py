@@ -1,6 +1,9 @@
+import json
 import time
 import sys
+from pathlib import Path
 from .hook import start_hook, stop_hook
+from ..span_tracer import enable_tracing, dump_on_exit
 
 def run():
     print("="*50)
@@ -10,6 +13,13 @@ def run():
     print("Requirement: Run as Administrator")
     print("Press Ctrl+C to stop")
     print("="*50)
+
+    # config.json의 tracing 설정 (있을 때만)
+    config = {}
+    if Path("config.json").exists():
+        with open("config.json", 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    enable_tracing(config)
     
     try:
         start_hook()
@@ -17,6 +27,7 @@ def run():
         print("\nStopping tool...")
     finally:
         stop_hook()
+        dump_on_exit(config)
 
 if __name__ == "__main__":
     run()
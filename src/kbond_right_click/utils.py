@@ -1,31 +1,35 @@
-import win32gui
-import win32con
 import ctypes
 from ctypes import wintypes
 import time
 
+from ..window_backend import create_backend
+
 # SendMessageTimeout 설정
-user32 = ctypes.windll.user32
 SMTO_ABORTIFHUNG = 0x0002
 SMTO_BLOCK = 0x0001
 
+# 창 조작 백엔드 (기본값 Win32, set_backend로 시뮬레이터 등으로 교체 가능)
+_backend = None
+
+def set_backend(backend):
+    """창 백엔드 교체"""
+    global _backend
+    _backend = backend
+
+def get_backend():
+    """현재 창 백엔드 (처음 호출 시 Win32 백엔드 생성)"""
+    global _backend
+    if _backend is None:
+        _backend = create_backend("win32")
+    return _backend
+
 def ts():
     """밀리초 타임스탬프 반환"""
     return time.strftime("%H:%M:%S") + f".{int((time.time() % 1) * 1000):03d}"
 
 def send_message_timeout(hwnd, msg, wparam, lparam, timeout_ms=100):
     """SendMessageTimeout wrapper - 타임아웃을 100ms로 단축"""
-    if not win32gui.IsWindow(hwnd):
-        return 0
-    result = ctypes.c_ulong()
-    success = user32.SendMessageTimeoutW(
-        hwnd, msg, wparam, lparam,
-        SMTO_ABORTIFHUNG, timeout_ms,
-        ctypes.byref(result)
-    )
-    if success:
-        return result.value
-    return 0
+    return get_backend().send_message(hwnd, msg, wparam, lparam, timeout_ms)
 
 class POINT(ctypes.Structure):
     _fields_ = [("x", wintypes.LONG), ("y", wintypes.LONG)]
@@ -33,19 +37,20 @@ class POINT(ctypes.Structure):
 def get_window_at_pos(x, y):
     """Returns the window handle at the given screen coordinates."""
     try:
-        return win32gui.WindowFromPoint((x, y))
+        return get_backend().window_from_point(x, y)
     except:
         return None
 
 def get_room_name(hwnd):
     """TfrmDccChat 창의 제목(채팅방 이름)을 가져옵니다."""
     try:
-        parent = win32gui.GetParent(hwnd)
+        backend = get_backend()
+        parent = backend.parent(hwnd)
         while parent:
-            p_cls = win32gui.GetClassName(parent)
+            p_cls = backend.class_name(parent)
             if p_cls == "TfrmDccChat":
-                return win32gui.GetWindowText(parent)
-            parent = win32gui.GetParent(parent)
+                return backend.window_text(parent)
+            parent = backend.parent(parent)
         return "Unknown"
     except:
         return "Unknown"
@@ -67,9 +72,10 @@ def get_window_info(hwnd):
     try:
         if not hwnd:
             return info
+        backend = get_backend()
             
         # 창이 유효한지 확인
-        if not win32gui.IsWindow(hwnd):
+        if not backend.is_window(hwnd):
             print(f"[{ts()}] WARN: Window {hwnd} is no longer valid!")
             return info
         
@@ -77,22 +83,17 @@ def get_window_info(hwnd):
         
         # 클래스명
         try:
-            info['class'] = win32gui.GetClassName(hwnd)
+            info['class'] = backend.class_name(hwnd)
         except:
             pass
         
         # 창 제목 (타임아웃으로 안전하게)
         try:
-            title_len = send_message_timeout(hwnd, win32con.WM_GETTEXTLENGTH, 0, 0, 50)
+            title_len = backend.text_length(hwnd, 50)
             if title_len > 0 and title_len < 256:
-                buffer = ctypes.create_unicode_buffer(title_len + 1)
-                result = ctypes.c_ulong()
-                success = user32.SendMessageTimeoutW(
-                    hwnd, win32con.WM_GETTEXT, title_len + 1, buffer,
-                    SMTO_ABORTIFHUNG, 100, ctypes.byref(result)
-                )
-                if success:
-                    info['title'] = buffer.value
+                title = backend.get_text(hwnd, title_len, 100)
+                if title is not None:
+                    info['title'] = title
         except:
             pass
         
@@ -104,15 +105,15 @@ def get_window_info(hwnd):
         
         # Visible / Enabled 상태
         try:
-            info['visible'] = bool(win32gui.IsWindowVisible(hwnd))
-            info['enabled'] = bool(win32gui.IsWindowEnabled(hwnd))
+            info['visible'] = backend.is_visible(hwnd)
+            info['enabled'] = backend.is_enabled(hwnd)
         except:
             pass
         
         # 응답 여부 확인 (핵심 crash 지표!)
         try:
             # IsHungAppWindow는 창이 응답하지 않으면 True 반환
-            is_hung = user32.IsHungAppWindow(hwnd)
+            is_hung = backend.is_hung(hwnd)
             info['responding'] = not bool(is_hung)
             if is_hung:
                 print(f"[{ts()}] ⚠️ CRITICAL: Window {hwnd} is NOT RESPONDING!")
@@ -121,7 +122,7 @@ def get_window_info(hwnd):
         
         # 창 스타일
         try:
-            info['style'] = win32gui.GetWindowLong(hwnd, win32con.GWL_STYLE)
+            info['style'] = backend.style(hwnd)
         except:
             pass
             
@@ -148,26 +149,27 @@ def log_window_status(hwnd, context=""):
 def is_kbond_chat_history(hwnd):
     """Checks if the hwnd is a ReadOnly RichEdit inside a KBond chat window."""
     try:
-        if not hwnd or not win32gui.IsWindow(hwnd):
+        backend = get_backend()
+        if not hwnd or not backend.is_window(hwnd):
             return False
             
-        cls = win32gui.GetClassName(hwnd)
+        cls = backend.class_name(hwnd)
         if "RichEdit" not in cls:
             return False
         
         # Check if it's read-only (ES_READONLY = 0x800)
-        style = win32gui.GetWindowLong(hwnd, win32con.GWL_STYLE)
+        style = backend.style(hwnd)
         is_readonly = bool(style & 0x800)
         if not is_readonly:
             return False
         
         # 모든 부모 창을 순회하며 TfrmDccChat 찾기 (원래 로직 복구!)
-        parent = win32gui.GetParent(hwnd)
+        parent = backend.parent(hwnd)
         while parent:
-            p_cls = win32gui.GetClassName(parent)
+            p_cls = backend.class_name(parent)
             if p_cls == "TfrmDccChat":
                 return True
-            parent = win32gui.GetParent(parent)
+            parent = backend.parent(parent)
         
         return False
     except:
@@ -176,11 +178,10 @@ def is_kbond_chat_history(hwnd):
 def is_text_selected(hwnd):
     """Checks if any text is currently selected."""
     try:
-        if not hwnd or not win32gui.IsWindow(hwnd):
+        backend = get_backend()
+        if not hwnd or not backend.is_window(hwnd):
             return False
-        result = send_message_timeout(hwnd, win32con.EM_GETSEL, 0, 0, 50)
-        start = result & 0xFFFF
-        end = (result >> 16) & 0xFFFF
+        start, end = backend.get_selection(hwnd, 50)
         return start != end
     except:
         return False
@@ -207,27 +208,22 @@ def extract_sentence_from_text(hwnd, all_text, x, y):
 def get_all_text(hwnd):
     """Extracts all text from the RichEdit control using SendMessageTimeout."""
     try:
-        if not hwnd or not win32gui.IsWindow(hwnd):
+        backend = get_backend()
+        if not hwnd or not backend.is_window(hwnd):
             return ""
         
         # 먼저 창이 응답하는지 확인
-        is_hung = user32.IsHungAppWindow(hwnd)
+        is_hung = backend.is_hung(hwnd)
         if is_hung:
             print(f"[{ts()}] ⚠️ get_all_text: Window is HUNG, skipping!")
             return ""
             
-        length = send_message_timeout(hwnd, win32con.WM_GETTEXTLENGTH, 0, 0, 100)
+        length = backend.text_length(hwnd, 100)
         if 0 < length < 1000000:  # 1MB 이상의 텍스트는 무시 (안전)
-            buffer = ctypes.create_unicode_buffer(length + 1)
             # WM_GETTEXT with timeout
-            result = ctypes.c_ulong()
-            success = user32.SendMessageTimeoutW(
-                hwnd, win32con.WM_GETTEXT, length + 1, buffer,
-                SMTO_ABORTIFHUNG, 200,
-                ctypes.byref(result)
-            )
-            if success:
-                return buffer.value
+            text = backend.get_text(hwnd, length, 200)
+            if text is not None:
+                return text
         return ""
     except Exception as e:
         print(f"[{ts()}] get_all_text error: {e}")
@@ -0,0 +1,150 @@
+"""
+KBond 채팅창 토폴로지 캐시
+TfrmDccChat hwnd → 방 제목 → RichEdit 대화 내역 hwnd 매핑을 WinEvent로 갱신
+매 주기 EnumWindows/EnumChildWindows 전체 순회를 피하기 위해 사용
+"""
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .window_backend import (
+    WindowBackend, EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY,
+    EVENT_OBJECT_HIDE, EVENT_OBJECT_NAMECHANGE,
+    OBJID_WINDOW, CHILDID_SELF
+)
+from .span_tracer import span
+
+
+class KBondTopology:
+    def __init__(self, target_class: str,
+                 enumerate_rooms: Callable[[], List[Tuple[int, str]]],
+                 backend: WindowBackend,
+                 sweep_interval: float = 10.0):
+        """
+        Args:
+            target_class: 채팅창 클래스명 (TfrmDccChat)
+            enumerate_rooms: 전체 순회로 (hwnd, title) 목록을 돌려주는 함수 (일관성 검사용)
+            backend: 창 백엔드
+            sweep_interval: 전체 순회로 캐시를 검증하는 주기 (초)
+        """
+        self.target_class = target_class
+        self.enumerate_rooms = enumerate_rooms
+        self.backend = backend
+        self.sweep_interval = sweep_interval
+
+        self._lock = threading.Lock()
+        self._rooms: Dict[int, str] = {}  # chat hwnd -> title
+        self._history_ctrl: Dict[int, int] = {}  # chat hwnd -> RichEdit history hwnd
+        self._ctrl_owner: Dict[int, int] = {}  # RichEdit history hwnd -> chat hwnd
+        self._last_sweep = 0.0
+
+        self.hook = backend.event_hook(self._on_event)
+        self.hook.add_range(EVENT_OBJECT_CREATE, EVENT_OBJECT_HIDE)
+        self.hook.add_range(EVENT_OBJECT_NAMECHANGE)
+
+    def start(self):
+        if not self.hook.start():
+            # 훅 설치 실패 시 매 주기 전체 순회 (기존 동작)
+            print("[WARN] WinEvent hook unavailable, falling back to full window enumeration")
+            self.sweep_interval = 0.0
+        self.sweep()
+
+    def stop(self):
+        self.hook.stop()
+
+    def _drop_room(self, hwnd: int):
+        self._rooms.pop(hwnd, None)
+        ctrl = self._history_ctrl.pop(hwnd, None)
+        if ctrl is not None:
+            self._ctrl_owner.pop(ctrl, None)
+
+    def _drop_history_ctrl(self, ctrl: int):
+        owner = self._ctrl_owner.pop(ctrl, None)
+        if owner is not None:
+            self._history_ctrl.pop(owner, None)
+
+    def _on_event(self, event, hwnd, id_object, id_child):
+        """훅 스레드에서 실행 - 캐시만 갱신하고 즉시 반환"""
+        if id_object != OBJID_WINDOW or id_child != CHILDID_SELF or not hwnd:
+            return
+
+        if event in (EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE):
+            with self._lock:
+                if hwnd in self._rooms:
+                    self._drop_room(hwnd)
+                elif hwnd in self._ctrl_owner:
+                    self._drop_history_ctrl(hwnd)
+            return
+
+        if event == EVENT_OBJECT_NAMECHANGE:
+            with self._lock:
+                if hwnd not in self._rooms:
+                    return
+            title = self.backend.window_text(hwnd)
+            with self._lock:
+                if hwnd in self._rooms:
+                    self._rooms[hwnd] = title
+            return
+
+        # CREATE / SHOW
+        cls = self.backend.class_name(hwnd)
+        if cls == self.target_class:
+            if self.backend.is_visible(hwnd):
+                title = self.backend.window_text(hwnd)
+                with self._lock:
+                    self._rooms[hwnd] = title
+        elif "RichEdit" in cls:
+            # 알려진 방에 새 RichEdit가 생기면 대화 내역 컨트롤을 다시 고름
+            root = self.backend.root(hwnd)
+            with self._lock:
+                ctrl = self._history_ctrl.get(root)
+                if ctrl is not None and ctrl != hwnd:
+                    self._drop_history_ctrl(ctrl)
+
+    def sweep(self):
+        """전체 순회로 캐시 보정 (이벤트 유실 대비)"""
+        with span('EnumWindows', 'capture') as s:
+            windows = self.enumerate_rooms()
+            s.set(rooms=len(windows))
+        seen = {hwnd for hwnd, _ in windows}
+        with self._lock:
+            for hwnd in list(self._rooms):
+                if hwnd not in seen:
+                    self._drop_room(hwnd)
+            for hwnd, title in windows:
+                self._rooms[hwnd] = title
+            for ctrl in list(self._ctrl_owner):
+                if not self.backend.is_window(ctrl):
+                    self._drop_history_ctrl(ctrl)
+        self._last_sweep = time.time()
+
+    def maybe_sweep(self):
+        if time.time() - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+
+    def rooms(self) -> List[Tuple[int, str]]:
+        """현재 알려진 (hwnd, title) 목록"""
+        with self._lock:
+            return list(self._rooms.items())
+
+    def is_room(self, hwnd: int) -> bool:
+        with self._lock:
+            return hwnd in self._rooms
+
+    def history_control(self, hwnd: int) -> Optional[int]:
+        with self._lock:
+            return self._history_ctrl.get(hwnd)
+
+    def room_of_control(self, ctrl: int) -> Optional[int]:
+        with self._lock:
+            return self._ctrl_owner.get(ctrl)
+
+    def set_history_control(self, hwnd: int, ctrl: int):
+        with self._lock:
+            if hwnd not in self._rooms:
+                return
+            old = self._history_ctrl.get(hwnd)
+            if old is not None:
+                self._ctrl_owner.pop(old, None)
+            self._history_ctrl[hwnd] = ctrl
+            self._ctrl_owner[ctrl] = hwnd
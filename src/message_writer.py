@@ -6,9 +6,64 @@ import os
 import time
 import queue
 import threading
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
+
+from .write_queue import create_write_queue, drain_queue
+from .spool import create_spool
+from .rotation import create_rotating_output
+from .sharding import create_sharded_output
+from .stream_compression import create_compressed_stream, print_stream_summary
+from .record_format import create_formatter, with_format_extension
+from .sqlite_sink import SQLiteMessageWriter
+from .sink_registry import FanOutWriter
+from .stage_latency import mark, mark_batch, finish, finish_batch
+from .process_writer import ProcessWriter
+from .span_tracer import span
+
+
+def create_output_layout(config: dict, output_file: Path, timestamp: str):
+    """
+    output.sharding / output.rotation / output.stream_compression 설정으로 (rotation, shards, stream) 생성
+    둘 이상 켜져 있으면 방별 파일(sharding), 회전, 스트리밍 압축 순으로 하나만 사용
+    """
+    stream = create_compressed_stream(config, output_file)
+    shards = create_sharded_output(config, timestamp)
+    if shards is not None:
+        if config['output'].get('rotation', {}).get('enabled', False):
+            print("[WARN] output.sharding is enabled, output.rotation is ignored")
+        if stream is not None:
+            print("[WARN] output.sharding is enabled, output.stream_compression is ignored")
+        return None, shards, None
+    rotation = create_rotating_output(config, output_file)
+    if rotation is not None and stream is not None:
+        print("[WARN] output.rotation is enabled, output.stream_compression is ignored")
+        stream = None
+    return rotation, None, stream
+
+
+def saved_location(writer):
+    if writer.rotation:
+        return writer.rotation.manifest_path
+    if writer.shards:
+        return writer.output_dir
+    if writer.stream:
+        return writer.stream.path
+    return writer.output_file
+
+
+def print_shard_summary(shards):
+    stats = shards.stats()
+    print(f"[INFO] Output sharding: {stats['shards']} room files, {stats['opens']} opens, "
+          f"{stats['evictions']} evictions (max {shards.max_open} open)")
+
+
+def print_rotation_summary(rotation):
+    stats = rotation.stats()
+    print(f"[INFO] Output rotation: {stats['segments']} segments ({stats['rotations']} rotations), "
+          f"compressed {stats['compressed']} ({stats['bytes_in']} -> {stats['bytes_out']} bytes)")
 
 
 class AsyncMessageWriter:
@@ -21,15 +76,24 @@ class AsyncMessageWriter:
         self.output_dir = Path(config['output']['directory'])
         self.encoding = config['output']['encoding']
         self.append_mode = config['output']['append_mode']
+        self.formatter = create_formatter(config)
         
-        # 비동기 큐
-        self.message_queue = queue.Queue(maxsize=config['performance']['buffer_size'])
         self.is_running = False
         self.writer_thread = None
         
         # 출력 파일 경로
         self.output_file = None
         self._prepare_output_file()
+
+        # 비동기 큐 (가득 차면 output.overflow_policy에 따라 처리), 항목은 (메시지, 넣은 시각, 스풀 seq)
+        self.message_queue = create_write_queue(config, self.output_file)
+        # 비정상 종료 대비 쓰기 전 기록 (output.spool.enabled)
+        self.spool = create_spool(config, self.output_dir)
+        self.drain_timeout = config['output'].get('drain_timeout', 10.0)
+        self._replay = []
+        # 크기/시간 단위 회전, 방별 파일 또는 스트리밍 압축 (쓰기 스레드만 사용)
+        self.rotation, self.shards, self.stream = create_output_layout(config, self.output_file, self.timestamp)
+        self._unflushed = []  # 압축기에만 들어가 있어 sync flush 후에 ack할 스풀 seq
         
     def _prepare_output_file(self):
         """출력 파일 준비"""
@@ -37,58 +101,103 @@ class AsyncMessageWriter:
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
         # 파일명 생성
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.timestamp = timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = self.config['output']['filename_format'].format(timestamp=timestamp)
         self.output_file = self.output_dir / filename
         
         print(f"[INFO] Output file: {self.output_file}")
     
-    def format_message(self, message: Dict) -> str:
-        """메시지를 텍스트 포맷으로 변환"""
-        timestamp = message['timestamp'].strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        text = message['text']
-        
-        return f"[{timestamp}] {text}\n"
+    def format_message(self, message: Dict):
+        """메시지를 output.format 형식으로 변환 (text/jsonl은 str, binary는 bytes)"""
+        return self.formatter.encode(message)
+
+    def _open_output(self, mode: str):
+        if self.formatter.binary:
+            return open(self.output_file, mode + 'b')
+        return open(self.output_file, mode, encoding=self.encoding)
     
     def write_message(self, message: Dict):
         """
-        메시지를 큐에 추가 (빠른 응답을 위해 즉시 반환)
+        메시지를 큐에 추가 (호출 스레드에서는 파일 I/O를 하지 않음)
         
         Args:
             message: 메시지 딕셔너리
         """
-        try:
-            # 큐가 가득 찬 경우 즉시 파일에 쓰기
-            if self.message_queue.full():
-                self._write_to_file(message)
-            else:
-                self.message_queue.put_nowait(message)
-        except queue.Full:
-            # 큐가 가득 찬 경우 직접 쓰기
-            self._write_to_file(message)
+        mark(message, 'callback')
+        seq = self.spool.append(message) if self.spool else 0
+        if not self.message_queue.put((message, time.time(), seq), message.get('window', '')) and self.spool:
+            # 정책에 따라 버려진 메시지는 다음 시작 때 다시 내보내지 않음
+            self.spool.ack(seq, flush=False)
     
-    def _write_to_file(self, message: Dict):
+    def _write_to_file(self, message: Dict) -> bool:
         """실제 파일 쓰기 작업"""
         try:
             formatted_text = self.format_message(message)
-            mode = 'a' if self.append_mode else 'w'
-            
-            with open(self.output_file, mode, encoding=self.encoding) as f:
-                f.write(formatted_text)
-                f.flush()  # 즉시 디스크에 쓰기
+            mark(message, 'format')
+            if self.rotation:
+                self.rotation.write(formatted_text, message['timestamp'], message['timestamp'])
+                self.rotation.flush()
+            elif self.shards:
+                self.shards.write(message.get('window', ''), formatted_text)
+                self.shards.flush()
+            elif self.stream:
+                # flush는 sync flush 지점에서만 (writer_loop)
+                self.stream.write(formatted_text)
+            else:
+                mode = 'a' if self.append_mode else 'w'
+                with self._open_output(mode) as f:
+                    f.write(formatted_text)
+                    f.flush()  # 즉시 디스크에 쓰기
+            mark(message, 'write')
+            finish(message)
+            return True
                 
         except Exception as e:
             print(f"[ERROR] File write error: {e}")
+            return False
     
+    def _ack(self, seq: int):
+        if self.stream:
+            self._unflushed.append(seq)
+        else:
+            self.spool.ack(seq)
+
+    def _sync_stream(self):
+        """압축 스트림의 sync flush 지점을 만들고 그때까지 기록한 메시지를 ack"""
+        try:
+            self.stream.flush()
+        except Exception as e:
+            print(f"[ERROR] File write error: {e}")
+            return
+        if self.spool and self._unflushed:
+            for seq in self._unflushed:
+                self.spool.ack(seq, flush=False)
+            self.spool.flush_acks()
+        self._unflushed = []
+
     def writer_loop(self):
         """비동기 쓰기 루프"""
+        # 지난 실행에서 기록되지 못한 메시지를 먼저 기록
+        for seq, message in self._replay:
+            if self._write_to_file(message):
+                self._ack(seq)
+        self._replay = []
+
         while self.is_running:
             try:
                 # 큐에서 메시지 가져오기 (최대 0.1초 대기)
-                message = self.message_queue.get(timeout=0.1)
-                self._write_to_file(message)
+                message, _, seq = self.message_queue.get(timeout=0.1)
+                mark(message, 'queue')
+                if self._write_to_file(message) and self.spool:
+                    self._ack(seq)
+                if self.stream and self.stream.due():
+                    self._sync_stream()
                 self.message_queue.task_done()
             except queue.Empty:
+                if self.stream and self.stream.dirty:
+                    self._sync_stream()
+                if self.spool:
+                    self.spool.flush_acks()
                 continue
             except Exception as e:
                 print(f"[ERROR] Writer loop error: {e}")
@@ -98,23 +207,48 @@ class AsyncMessageWriter:
         if self.is_running:
             return
         
+        if self.rotation:
+            self.rotation.open()
+        if self.shards:
+            self.shards.open()
+        if self.stream:
+            self.stream.open()
+        if self.spool:
+            self._replay = self.spool.recover()
+            self.spool.start()
         self.is_running = True
         self.writer_thread = threading.Thread(target=self.writer_loop, daemon=True)
         self.writer_thread.start()
         print("[INFO] Async writer started")
     
     def stop(self):
-        """비동기 쓰기 중지 (큐의 모든 메시지 처리 후)"""
+        """비동기 쓰기 중지 (큐의 메시지를 drain_timeout 안에서 처리 후)"""
         print("[INFO] Saving remaining messages...")
         
-        # 큐의 모든 메시지 처리 대기
-        self.message_queue.join()
+        # 큐의 모든 메시지 처리 대기 (스레드가 죽었거나 시간이 넘으면 스풀에 맡김)
+        if not drain_queue(self.message_queue, self.writer_thread, self.drain_timeout):
+            where = "kept in the spool for the next start" if self.spool else "lost"
+            print(f"[WARN] Writer did not drain within {self.drain_timeout}s; remaining messages {where}")
         
         self.is_running = False
         if self.writer_thread:
             self.writer_thread.join(timeout=2)
+        self.message_queue.close()
+        self.message_queue.print_summary()
+        if self.rotation:
+            self.rotation.close()
+            print_rotation_summary(self.rotation)
+        if self.shards:
+            self.shards.close()
+            print_shard_summary(self.shards)
+        if self.stream:
+            self._sync_stream()
+            self.stream.close()
+            print_stream_summary(self.stream)
+        if self.spool:
+            self.spool.close()
         
-        print(f"[INFO] All messages saved: {self.output_file}")
+        print(f"[INFO] All messages saved: {saved_location(self)}")
 
 
 class SyncMessageWriter:
@@ -125,6 +259,7 @@ class SyncMessageWriter:
         self.output_dir = Path(config['output']['directory'])
         self.encoding = config['output']['encoding']
         self.append_mode = config['output']['append_mode']
+        self.formatter = create_formatter(config)
         self.output_file = None
         self._prepare_output_file()
         
@@ -136,21 +271,28 @@ class SyncMessageWriter:
         self.output_file = self.output_dir / filename
         print(f"[INFO] Output file: {self.output_file}")
     
-    def format_message(self, message: Dict) -> str:
-        """메시지를 텍스트 포맷으로 변환"""
-        timestamp = message['timestamp'].strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        text = message['text']
-        return f"[{timestamp}] {text}\n"
+    def format_message(self, message: Dict):
+        """메시지를 output.format 형식으로 변환 (text/jsonl은 str, binary는 bytes)"""
+        return self.formatter.encode(message)
+
+    def _open_output(self, mode: str):
+        if self.formatter.binary:
+            return open(self.output_file, mode + 'b')
+        return open(self.output_file, mode, encoding=self.encoding)
     
     def write_message(self, message: Dict):
         """메시지 즉시 파일에 쓰기"""
+        mark(message, 'callback')
         try:
             formatted_text = self.format_message(message)
+            mark(message, 'format')
             mode = 'a' if self.append_mode else 'w'
-            
-            with open(self.output_file, mode, encoding=self.encoding) as f:
+
+            with self._open_output(mode) as f:
                 f.write(formatted_text)
                 f.flush()
+            mark(message, 'write')
+            finish(message)
         except Exception as e:
             print(f"[ERROR] File write error: {e}")
     
@@ -161,3 +303,323 @@ class SyncMessageWriter:
     def stop(self):
         """동기 쓰기는 중지 작업 없음"""
         print(f"[INFO] Saved: {self.output_file}")
+
+
+class GroupCommitWriter:
+    """
+    그룹 커밋 방식 파일 쓰기
+    파일 핸들을 열어 둔 채로 큐에 쌓인 메시지를 배치 단위로 꺼내 한 번의 write로 기록
+
+    durability 정책:
+        flush: 배치마다 flush (OS 페이지 캐시까지, 기본값)
+        fsync_interval: 배치마다 flush, fsync_interval_ms마다 fsync
+        fsync: 배치마다 flush + fsync
+    """
+
+    DURABILITY_POLICIES = ('flush', 'fsync_interval', 'fsync')
+
+    def __init__(self, config: dict):
+        """
+        Args:
+            config: 출력 설정
+        """
+        self.config = config
+        output_config = config['output']
+        self.output_dir = Path(output_config['directory'])
+        self.encoding = output_config['encoding']
+        self.append_mode = output_config['append_mode']
+        self.formatter = create_formatter(config)
+        self._join = b"".join if self.formatter.binary else "".join
+        self.durability = output_config.get('durability', 'flush')
+        if self.durability not in self.DURABILITY_POLICIES:
+            print(f"[WARN] Unknown durability policy '{self.durability}', using 'flush'")
+            self.durability = 'flush'
+        self.fsync_interval = output_config.get('fsync_interval_ms', 1000) / 1000
+        self.max_batch = output_config.get('max_batch', 1024)
+
+        self.is_running = False
+        self.writer_thread = None
+        self._file = None
+        self._last_fsync = time.time()
+        self._unsynced = False
+
+        # 통계
+        self.batches = 0
+        self.messages = 0
+        self.max_batch_seen = 0
+        self.fsyncs = 0
+        self.commit_times = deque(maxlen=1000)  # 배치 write~flush/fsync 소요 시간
+        self.message_latencies = deque(maxlen=1000)  # 큐에 넣은 뒤 커밋까지 걸린 시간
+
+        self.output_file = None
+        self._prepare_output_file()
+
+        # (메시지, 큐에 넣은 시각, 스풀 seq) - 가득 차면 output.overflow_policy에 따라 처리
+        self.message_queue = create_write_queue(config, self.output_file)
+        self.spool = create_spool(config, self.output_dir)
+        self.drain_timeout = output_config.get('drain_timeout', 10.0)
+        self._replay = []
+        self.rotation, self.shards, self.stream = create_output_layout(config, self.output_file, self.timestamp)
+        self._unflushed = []  # 압축기에만 들어가 있어 sync flush 후에 ack할 스풀 seq
+
+    def _prepare_output_file(self):
+        """출력 파일 준비"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.timestamp = timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = self.config['output']['filename_format'].format(timestamp=timestamp)
+        self.output_file = self.output_dir / filename
+        print(f"[INFO] Output file: {self.output_file}")
+
+    def format_message(self, message: Dict):
+        """메시지를 output.format 형식으로 변환 (text/jsonl은 str, binary는 bytes)"""
+        return self.formatter.encode(message)
+
+    def _open_output(self, mode: str):
+        if self.formatter.binary:
+            return open(self.output_file, mode + 'b')
+        return open(self.output_file, mode, encoding=self.encoding)
+
+    def write_message(self, message: Dict):
+        """메시지를 큐에 추가 (파일 핸들은 쓰기 스레드만 사용)"""
+        mark(message, 'callback')
+        seq = self.spool.append(message) if self.spool else 0
+        if not self.message_queue.put((message, time.time(), seq), message.get('window', '')) and self.spool:
+            self.spool.ack(seq, flush=False)
+
+    def _drain(self, first) -> List:
+        batch = [first]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.message_queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _fsync(self):
+        if self.shards:
+            self.shards.sync()
+        else:
+            os.fsync(self._file.fileno())
+        self._last_fsync = time.time()
+        self._unsynced = False
+        self.fsyncs += 1
+
+    def open_sink(self):
+        """출력 파일(또는 회전/방별 출력)을 엶 (sink로 쓸 때는 쓰기 스레드 없이 이것만 사용)"""
+        if self.rotation:
+            # RotatingOutput도 flush/fileno/close를 제공하므로 같은 경로로 fsync/종료
+            self.rotation.open()
+            self._file = self.rotation
+        elif self.shards:
+            # ShardedOutput은 flush/close를 제공하고 fsync는 _fsync에서 shards.sync()로 처리
+            self.shards.open()
+            self._file = self.shards
+        elif self.stream:
+            # CompressedStream도 write/flush/fileno/close를 제공 (flush는 sync flush)
+            self._file = self.stream.open()
+        else:
+            mode = 'a' if self.append_mode else 'w'
+            self._file = self._open_output(mode)
+
+    def close_sink(self):
+        """fsync 후 출력 파일 닫기"""
+        if self._file:
+            try:
+                self._file.flush()
+                self._fsync()
+            finally:
+                self._file.close()
+                self._file = None
+        self._ack_flushed()
+        if self.rotation:
+            print_rotation_summary(self.rotation)
+        if self.stream:
+            print_stream_summary(self.stream)
+        if self.shards:
+            print_shard_summary(self.shards)
+
+    def idle_sink(self):
+        """유휴 중에도 마지막 배치가 압축 스트림에서 나오고 fsync_interval 안에 디스크에 닿도록 함"""
+        if self.stream and self.stream.dirty:
+            try:
+                self.stream.flush()
+                self._ack_flushed()
+            except Exception as e:
+                print(f"[ERROR] File write error: {e}")
+        if (self.durability == 'fsync_interval' and self._unsynced
+                and time.time() - self._last_fsync >= self.fsync_interval):
+            try:
+                self._fsync()
+            except Exception as e:
+                print(f"[ERROR] fsync error: {e}")
+
+    def write_batch(self, messages: List[Dict]):
+        """메시지 목록을 한 번의 write로 기록하고 durability 정책에 따라 flush/fsync (실패 시 예외)"""
+        if self.shards:
+            # 방별로 모아 파일마다 write 한 번
+            rooms = {}
+            for message in messages:
+                rooms.setdefault(message.get('window', ''), []).append(self.format_message(message))
+            mark_batch(messages, 'format')
+            for room, texts in rooms.items():
+                self.shards.write(room, self._join(texts), len(texts))
+        else:
+            text = self._join(self.format_message(message) for message in messages)
+            mark_batch(messages, 'format')
+            if self.rotation:
+                self.rotation.write(text, messages[0]['timestamp'], messages[-1]['timestamp'], len(messages))
+            else:
+                self._file.write(text)
+        if not self.stream or self.stream.due():
+            self._file.flush()
+        self._unsynced = True
+        if self.durability == 'fsync' or (
+            self.durability == 'fsync_interval' and time.time() - self._last_fsync >= self.fsync_interval
+        ):
+            self._fsync()
+        mark_batch(messages, 'write')
+
+    def _commit(self, batch: List):
+        """(메시지, 넣은 시각, 스풀 seq) 배치를 기록하고 스풀에 ack"""
+        started = time.time()
+        messages = [message for message, _, _ in batch]
+        mark_batch(messages, 'queue')
+        try:
+            with span('write_batch', 'writer', messages=len(messages)):
+                self.write_batch(messages)
+            finish_batch(messages)
+            if self.spool:
+                self._unflushed.extend(seq for _, _, seq in batch)
+                if not (self.stream and self.stream.dirty):
+                    self._ack_flushed()
+        except Exception as e:
+            print(f"[ERROR] File write error: {e}")
+        committed = time.time()
+
+        self.batches += 1
+        self.messages += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.commit_times.append(committed - started)
+        for _, enqueued, _ in batch:
+            self.message_latencies.append(committed - enqueued)
+
+    def _ack_flushed(self):
+        """파일까지 나간 배치(압축 스트림이면 sync flush 이전 기록)를 스풀에 ack"""
+        if self.spool and self._unflushed:
+            for seq in self._unflushed:
+                self.spool.ack(seq, flush=False)
+            self.spool.flush_acks()
+        self._unflushed = []
+
+    def writer_loop(self):
+        """배치 쓰기 루프"""
+        # 지난 실행에서 기록되지 못한 메시지를 먼저 기록
+        now = time.time()
+        for i in range(0, len(self._replay), self.max_batch):
+            self._commit([(message, now, seq) for seq, message in self._replay[i:i + self.max_batch]])
+        self._replay = []
+
+        while self.is_running:
+            try:
+                first = self.message_queue.get(timeout=0.1)
+            except queue.Empty:
+                self.idle_sink()
+                continue
+            batch = self._drain(first)
+            self._commit(batch)
+            for _ in batch:
+                self.message_queue.task_done()
+
+    def start(self):
+        """파일을 열고 쓰기 스레드 시작"""
+        if self.is_running:
+            return
+        self.open_sink()
+        if self.spool:
+            self._replay = self.spool.recover()
+            self.spool.start()
+        self.is_running = True
+        self.writer_thread = threading.Thread(target=self.writer_loop, daemon=True)
+        self.writer_thread.start()
+        print(f"[INFO] Group-commit writer started (durability: {self.durability})")
+
+    def stop(self):
+        """큐의 메시지를 drain_timeout 안에서 기록하고 fsync 후 파일 닫기"""
+        print("[INFO] Saving remaining messages...")
+        if not drain_queue(self.message_queue, self.writer_thread, self.drain_timeout):
+            where = "kept in the spool for the next start" if self.spool else "lost"
+            print(f"[WARN] Writer did not drain within {self.drain_timeout}s; remaining messages {where}")
+
+        self.is_running = False
+        if self.writer_thread:
+            self.writer_thread.join(timeout=2)
+        self.message_queue.close()
+        self.message_queue.print_summary()
+        self.close_sink()
+        if self.spool:
+            self.spool.close()
+
+        stats = self.get_statistics()
+        if stats['batches']:
+            print(f"[INFO] Writer: {stats['messages']} messages in {stats['batches']} batches "
+                  f"(avg {stats['avg_batch']:.1f}, max {stats['max_batch']}), "
+                  f"commit p50 {stats['commit_p50_ms']:.2f}ms / p99 {stats['commit_p99_ms']:.2f}ms, "
+                  f"message p99 {stats['latency_p99_ms']:.2f}ms, fsyncs {stats['fsyncs']}")
+        print(f"[INFO] All messages saved: {saved_location(self)}")
+
+    def get_statistics(self) -> dict:
+        """배치 크기 및 커밋 지연 통계"""
+        commits = sorted(self.commit_times)
+        latencies = sorted(self.message_latencies)
+
+        def pct(values, p):
+            return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else 0.0
+
+        return {
+            'durability': self.durability,
+            'batches': self.batches,
+            'messages': self.messages,
+            'avg_batch': (self.messages / self.batches) if self.batches else 0,
+            'max_batch': self.max_batch_seen,
+            'fsyncs': self.fsyncs,
+            'commit_p50_ms': pct(commits, 0.5),
+            'commit_p99_ms': pct(commits, 0.99),
+            'commit_max_ms': commits[-1] * 1000 if commits else 0.0,
+            'latency_p50_ms': pct(latencies, 0.5),
+            'latency_p99_ms': pct(latencies, 0.99),
+        }
+
+
+def create_writer(config: dict):
+    """
+    설정에 맞는 writer 생성
+    sinks가 설정되어 있으면 FanOutWriter (sink마다 별도 큐/스레드),
+    output.process.enabled면 ProcessWriter (서식화/I/O를 별도 프로세스에서),
+    output.writer_mode가 group_commit이면 GroupCommitWriter, sqlite면 SQLiteMessageWriter,
+    아니면 performance.use_async에 따라 AsyncMessageWriter / SyncMessageWriter
+    (회전/방별 파일/스트리밍 압축/스풀이 켜져 있으면 use_async와 관계없이 AsyncMessageWriter)
+    """
+    if config.get('sinks'):
+        return FanOutWriter(config)
+    # jsonl / binary 형식이면 기본 확장자(.txt)를 형식에 맞게 변경
+    filename_format = with_format_extension(config['output']['filename_format'], create_formatter(config))
+    if filename_format != config['output']['filename_format']:
+        config = dict(config, output=dict(config['output'], filename_format=filename_format))
+    if config['output'].get('process', {}).get('enabled', False):
+        return ProcessWriter(config)
+    if config['output'].get('writer_mode') == 'sqlite':
+        return SQLiteMessageWriter(config)
+    if config['output'].get('writer_mode', 'per_message') == 'group_commit':
+        return GroupCommitWriter(config)
+    if config['performance'].get('use_async', True):
+        return AsyncMessageWriter(config)
+    output_config = config['output']
+    needs_thread = [name for name in ('rotation', 'sharding', 'spool') if output_config.get(name, {}).get('enabled', False)]
+    if output_config.get('stream_compression', {}).get('codec', 'none') not in (None, 'none', False):
+        needs_thread.append('stream_compression')
+    if needs_thread:
+        # SyncMessageWriter는 파일 하나에 바로 씀 (회전/방별 파일/압축/스풀은 쓰기 스레드가 처리)
+        print(f"[WARN] output.{', output.'.join(needs_thread)} need the writer thread; "
+              "performance.use_async=false is ignored")
+        return AsyncMessageWriter(config)
+    return SyncMessageWriter(config)
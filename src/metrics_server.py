@@ -0,0 +1,308 @@
+"""
+OpenMetrics / Prometheus 메트릭 엔드포인트 (localhost HTTP)
+백그라운드 스레드가 refresh_interval마다 등록된 수집 함수를 불러 응답 본문을 미리 만들어 두고,
+HTTP 요청은 그 본문을 그대로 돌려주기만 함 (스크레이프가 캡처/쓰기 스레드를 기다리게 하지 않음)
+
+    GET /metrics   Accept에 application/openmetrics-text가 있으면 OpenMetrics 1.0, 아니면 Prometheus 텍스트 0.0.4
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence
+
+# 히스토그램 버킷 상한 (밀리초)
+DEFAULT_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricFamily:
+    """같은 이름의 샘플 묶음 (kind: gauge / counter / histogram)"""
+
+    __slots__ = ('name', 'kind', 'help', 'samples')
+
+    def __init__(self, name: str, kind: str, help_text: str):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.samples = []  # [(접미사, 레이블, 값)]
+
+    def add(self, value, labels: Dict[str, str] = None):
+        self.samples.append(('_total' if self.kind == 'counter' else '', labels or {}, value))
+        return self
+
+    def add_histogram(self, histogram, bounds: Sequence[float], labels: Dict[str, str] = None):
+        """LatencyHistogram을 누적 버킷 + _sum/_count로 추가 (bounds는 초)"""
+        labels = labels or {}
+        for bound, count in zip(bounds, histogram.cumulative(bounds)):
+            self.samples.append(('_bucket', dict(labels, le=_format_value(bound)), count))
+        self.samples.append(('_bucket', dict(labels, le='+Inf'), histogram.count))
+        self.samples.append(('_sum', labels, histogram.total))
+        self.samples.append(('_count', labels, histogram.count))
+        return self
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int):
+        return str(value)
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def render(families: List[MetricFamily], openmetrics: bool = True) -> bytes:
+    lines = []
+    for family in families:
+        # Prometheus 0.0.4는 TYPE 줄의 이름이 샘플 이름과 같아야 함
+        type_name = family.name if openmetrics or family.kind != 'counter' else family.name + '_total'
+        lines.append(f"# HELP {type_name} {family.help}")
+        lines.append(f"# TYPE {type_name} {family.kind}")
+        for suffix, labels, value in family.samples:
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+            lines.append(f"{family.name}{suffix}{{{label_text}}} {_format_value(value)}" if label_text
+                         else f"{family.name}{suffix} {_format_value(value)}")
+    if openmetrics:
+        lines.append("# EOF")
+    return ("\n".join(lines) + "\n").encode('utf-8')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "MessengerMetrics/1.0"
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+        body = self.server.metrics.payload(openmetrics)
+        self.send_response(200)
+        self.send_header('Content-Type', OPENMETRICS_TYPE if openmetrics else PROMETHEUS_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MetricsServer:
+    """수집 함수들을 주기적으로 불러 렌더링해 두고 HTTP로 내보내는 서버"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464, refresh_interval: float = 1.0,
+                 buckets_ms: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """
+        Args:
+            host: 바인드 주소 (기본은 이 PC에서만 접근)
+            port: 포트
+            refresh_interval: 본문을 다시 만드는 간격 (초)
+            buckets_ms: 지연 히스토그램 버킷 상한 (밀리초)
+        """
+        self.host = host
+        self.port = port
+        self.refresh_interval = refresh_interval
+        self.bounds = [b / 1000 for b in sorted(buckets_ms)]
+        self.sources: List = []  # [(이름, 수집 함수)]
+        self.collect_errors: Dict[str, int] = {}
+        self._payloads = (b"# EOF\n", b"")
+        self._httpd = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def add_source(self, name: str, collect: Callable[[List[float]], List[MetricFamily]]):
+        """collect(bounds)는 MetricFamily 목록을 반환 (예외는 건너뛰고 오류 수로 셈)"""
+        self.sources.append((name, collect))
+
+    def payload(self, openmetrics: bool = True) -> bytes:
+        return self._payloads[0 if openmetrics else 1]
+
+    def refresh(self):
+        started = time.perf_counter()
+        families = []
+        for name, collect in self.sources:
+            try:
+                families.extend(collect(self.bounds))
+            except Exception as e:
+                if name not in self.collect_errors:
+                    print(f"[WARN] Metrics source '{name}' failed: {e}")
+                self.collect_errors[name] = self.collect_errors.get(name, 0) + 1
+        errors = MetricFamily('messenger_metrics_collect_errors', 'counter', "Failed metric collections by source")
+        for name, _ in self.sources:
+            errors.add(self.collect_errors.get(name, 0), {'source': name})
+        families.append(errors)
+        families.append(MetricFamily('messenger_metrics_render_seconds', 'gauge',
+                                     "Time spent collecting the previous snapshot")
+                        .add(time.perf_counter() - started))
+        self._payloads = (render(families, True), render(families, False))
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def start(self) -> bool:
+        try:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        except OSError as e:
+            print(f"[WARN] Metrics endpoint could not bind {self.host}:{self.port}, disabled: {e}")
+            return False
+        self._httpd.daemon_threads = True
+        self._httpd.metrics = self
+        self.refresh()
+        self._threads = [
+            threading.Thread(target=self._httpd.serve_forever, kwargs={'poll_interval': 0.5},
+                             name="metrics-http", daemon=True),
+            threading.Thread(target=self._refresh_loop, name="metrics-refresh", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        print(f"[INFO] Metrics endpoint: http://{self.host}:{self.port}/metrics")
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+
+# ----- 수집 함수 (각 구성 요소의 통계 사본만 읽음) -----
+
+def monitor_metrics(monitor) -> Callable:
+    """KBondMonitor / KakaoMonitor의 stats(): 방 수, 방별 메시지 수, 응답 없는 창, 중복 제거 메모리"""
+    def collect(bounds):
+        stats = monitor.stats()
+        dedup = stats['dedup']
+        families = [
+            MetricFamily('messenger_rooms', 'gauge', "Chat rooms found in the last capture cycle").add(stats['rooms']),
+            _per_room('messenger_messages', "Messages emitted per room", stats['emitted']),
+        ]
+        if 'hung_reads' in stats:
+            families.append(_per_room('messenger_hung_reads', "Reads skipped because the window was not responding",
+                                      stats['hung_reads']))
+            families.append(_per_room('messenger_read_timeouts', "Reads that missed the capture deadline",
+                                      stats['timed_out_reads']))
+        families += [
+            MetricFamily('messenger_dedup_rooms', 'gauge', "Rooms with dedup fingerprints").add(dedup['rooms']),
+            MetricFamily('messenger_dedup_entries', 'gauge', "Dedup fingerprints held").add(dedup['entries']),
+            MetricFamily('messenger_dedup_memory_bytes', 'gauge', "Memory used by dedup fingerprints")
+            .add(dedup['memory_bytes']),
+            MetricFamily('messenger_dedup_lookups', 'counter', "Dedup lookups").add(dedup['lookups']),
+            MetricFamily('messenger_dedup_hits', 'counter', "Dedup lookups that found a duplicate").add(dedup['hits']),
+            MetricFamily('messenger_dedup_evictions', 'counter', "Fingerprints evicted at room capacity")
+            .add(dedup['evictions']),
+        ]
+        return families
+    return collect
+
+
+def _per_room(name: str, help_text: str, counts: Dict[str, int]) -> MetricFamily:
+    family = MetricFamily(name, 'counter', help_text)
+    for room, count in sorted(counts.items()):
+        family.add(count, {'room': room})
+    return family
+
+
+def writer_metrics(writer) -> Callable:
+    """쓰기 큐 길이/spill 크기, 배치 크기, 스풀 미확인 수 (writer 종류마다 있는 통계만)"""
+    if hasattr(writer, 'workers'):
+        queues = [(worker.name, worker.message_queue) for worker in writer.workers]
+    elif hasattr(writer, 'message_queue'):
+        queues = [('main', writer.message_queue)]
+    else:
+        queues = []  # SyncMessageWriter는 큐 없이 바로 씀
+
+    def collect(bounds):
+        depth = MetricFamily('messenger_writer_queue_depth', 'gauge', "Messages queued or being written")
+        spill = MetricFamily('messenger_writer_spill_bytes', 'gauge', "Unread bytes in the overflow spill segment")
+        spilled = MetricFamily('messenger_writer_spilled', 'counter', "Messages sent to the overflow spill segment")
+        dropped = MetricFamily('messenger_writer_dropped', 'counter', "Messages dropped by the overflow policy")
+        for name, queue in queues:
+            stats = queue.stats()
+            labels = {'sink': name}
+            depth.add(stats['depth'], labels)
+            spill.add(stats['spill_bytes'], labels)
+            spilled.add(stats['spilled'], labels)
+            dropped.add(sum(stats['dropped'].values()), labels)
+        families = [depth, spill, spilled, dropped]
+
+        # 그룹 커밋/쓰기 프로세스는 batches/messages, SQLite는 transactions/rows
+        batches = getattr(writer, 'batches', getattr(writer, 'transactions', None))
+        if batches is not None:
+            messages = getattr(writer, 'messages', getattr(writer, 'rows', 0))
+            families.append(MetricFamily('messenger_writer_batches', 'counter', "Write batches committed").add(batches))
+            families.append(MetricFamily('messenger_writer_batch_messages', 'counter', "Messages in committed batches")
+                            .add(messages))
+            if hasattr(writer, 'max_batch_seen'):
+                families.append(MetricFamily('messenger_writer_batch_max', 'gauge', "Largest batch committed")
+                                .add(writer.max_batch_seen))
+        if hasattr(writer, 'restarts'):
+            families.append(MetricFamily('messenger_writer_restarts', 'counter', "Writer process restarts")
+                            .add(writer.restarts))
+        spool = getattr(writer, 'spool', None)
+        if spool:
+            families.append(MetricFamily('messenger_spool_unacked', 'gauge', "Spooled messages not yet written")
+                            .add(spool.stats()['unacked']))
+        return families
+    return collect
+
+
+def stage_latency_metrics(tracker) -> Callable:
+    """단계별 지연 히스토그램과 목표 초과 수"""
+    def collect(bounds):
+        family = MetricFamily('messenger_stage_latency_seconds', 'histogram',
+                              "Capture-to-disk latency by stage (end_to_end is the whole path)")
+        for stage, histogram in tracker.histograms().items():
+            family.add_histogram(histogram, bounds, {'stage': stage})
+        return [
+            family,
+            MetricFamily('messenger_latency_over_target', 'counter', "Messages over max_response_time")
+            .add(tracker.over_target),
+        ]
+    return collect
+
+
+def performance_metrics(perf_monitor) -> Callable:
+    """PerformanceMonitor 응답 시간 히스토그램"""
+    def collect(bounds):
+        lifetime, _ = perf_monitor.histogram.snapshot()
+        return [
+            MetricFamily('messenger_response_time_seconds', 'histogram', "Message response time")
+            .add_histogram(lifetime, bounds),
+            MetricFamily('messenger_response_time_violations', 'counter', "Responses over max_response_time")
+            .add(perf_monitor.violations),
+        ]
+    return collect
+
+
+def create_metrics_server(config: dict, monitor=None, writer=None, latency=None,
+                          perf_monitor=None) -> Optional[MetricsServer]:
+    """metrics 설정으로 엔드포인트를 만들고 주어진 구성 요소를 등록해 시작 (비활성화/바인드 실패 시 None)"""
+    metrics_config = config.get('metrics', {})
+    if not metrics_config.get('enabled', False):
+        return None
+    server = MetricsServer(
+        host=metrics_config.get('host', "127.0.0.1"),
+        port=metrics_config.get('port', 9464),
+        refresh_interval=metrics_config.get('refresh_interval', 1.0),
+        buckets_ms=metrics_config.get('buckets_ms', DEFAULT_BUCKETS_MS),
+    )
+    if monitor is not None:
+        server.add_source('monitor', monitor_metrics(monitor))
+    if writer is not None:
+        server.add_source('writer', writer_metrics(writer))
+    if latency is not None:
+        server.add_source('stage_latency', stage_latency_metrics(latency))
+    if perf_monitor is not None:
+        server.add_source('performance', performance_metrics(perf_monitor))
+    if not server.start():
+        return None
+    return server
@@ -1,7 +1,7 @@
 import time
 import threading
-import hashlib
 from datetime import datetime
+from pathlib import Path
 from typing import Optional, Callable, List, Dict
 import psutil
 from pywinauto import Application
@@ -9,16 +9,33 @@ import win32gui
 import win32process
 import win32con
 import pyperclip
+from .dedup_store import DedupStore, fingerprint
+from .transcript_differ import TranscriptDiffer
+from .checkpoint import CheckpointStore
 
 class MultiKakaoMonitor:
+    # 진단 memory 명령에서 크기를 보고할 상태
+    diagnostic_components = ('_history', 'differ', '_window_snapshots', '_seq', 'checkpoint._rooms')
+
     def __init__(self, callback: Callable[[Dict], None], config: dict):
         self.callback = callback
         self.config = config
         self.is_running = False
-        self._history = set()
+        self.thread = None
+        self._wake = threading.Event()  # stop()이 사이클 대기를 깨움
+        self._history = DedupStore(config.get('dedup', {}).get('capacity_per_room', 100000))
+        self.differ = TranscriptDiffer(config.get('dedup', {}).get('anchor_lines', 4))
         self.app = None
         self.process_name = "KakaoTalk.exe"
         self._window_snapshots = {}  # 각 창의 마지막 텍스트 상태 저장
+        self._seq = {}  # 창 제목 -> 마지막으로 내보낸 메시지 순번
+        
+        # 체크포인트 (재시작 시 앵커부터 이어서 감지)
+        checkpoint_config = config.get('checkpoint', {})
+        checkpoint_dir = checkpoint_config.get('directory', config.get('output', {}).get('directory', 'output'))
+        self.checkpoint = CheckpointStore(Path(checkpoint_dir) / "kakao_checkpoint.json",
+                                          checkpoint_config.get('interval', 5.0))
+        self.history_policy = checkpoint_config.get('history_policy', 'skip')
 
     def connect(self):
         try:
@@ -79,82 +96,99 @@ class MultiKakaoMonitor:
         except:
             return ""
 
+    def split_lines(self, text: str) -> List[str]:
+        """텍스트를 라인별로 분리 (빈 줄, 입력창/시스템 메시지 제외)"""
+        lines = [line.strip() for line in text.split('\r\n') if line.strip()]
+        return [line for line in lines
+                if not any(word in line for word in ["메시지 입력", "전송", "RichEdit Control"])]
+
     def extract_new_lines(self, current_text: str, window_title: str):
         """현재 텍스트와 이전 스냅샷을 비교하여 새로 추가된 라인만 추출합니다."""
         if not current_text:
             return []
         
         # 해시 생성 (전체 텍스트로 변경 감지)
-        text_hash = hashlib.md5(current_text.encode('utf-8')).hexdigest()
-        
-        # 이전 스냅샷과 비교
-        prev_snapshot = self._window_snapshots.get(window_title, {})
-        prev_hash = prev_snapshot.get('hash', '')
-        prev_lines = prev_snapshot.get('lines', set())
+        text_hash = fingerprint(current_text)
         
         # 텍스트가 변하지 않았으면 건너뛰기
-        if text_hash == prev_hash:
+        if text_hash == self._window_snapshots.get(window_title, {}).get('hash'):
+            return []
+        
+        # 현재 텍스트를 라인별로 분리 (입력창/시스템 메시지 필터링)
+        current_lines = self.split_lines(current_text)
+        
+        # 마지막으로 본 줄(앵커) 뒤에 붙은 줄만 추출 - 같은 내용의 반복 메시지도 유지
+        first_capture = window_title not in self._window_snapshots
+        known = window_title in self.differ
+        appended = self.differ.diff(window_title, current_lines, 0) if known else None
+        
+        # 이번 실행에서 처음 캡처한 창인데 이어갈 앵커가 없으면 기존 내역 정책 적용
+        if appended is None and first_capture and self.history_policy == 'skip':
+            self.differ.reset(window_title, current_lines)
+            for line in current_lines:
+                self._history.add(window_title, fingerprint(line))
+            self._window_snapshots[window_title] = {'hash': text_hash}
+            self._save_window(window_title)
             return []
         
-        # 현재 텍스트를 라인별로 분리
-        current_lines = [line.strip() for line in current_text.split('\r\n') if line.strip()]
-        current_lines_set = set(current_lines)
+        if not known:
+            appended = self.differ.diff(window_title, current_lines, 0)
+        if appended is None:
+            # 앵커를 찾지 못함(내역이 바뀜): 지문 기반 중복 제거로 대체
+            appended = []
+            for line in current_lines:
+                line_hash = fingerprint(line)
+                if self._history.check_and_add(window_title, line_hash):
+                    appended.append((line, line_hash))
+            self.differ.reset(window_title, current_lines)
+        else:
+            for _, line_hash in appended:
+                self._history.add(window_title, line_hash)
         
-        # 새로운 라인들만 추출 (이전에 없던 것)
         new_lines = []
-        for line in current_lines:
-            # 입력창/시스템 메시지 필터링
-            if any(word in line for word in ["메시지 입력", "전송", "RichEdit Control"]):
-                continue
-            
-            # 중복 체크
-            line_id = f"{window_title}_{line}"
-            line_hash = hashlib.md5(line_id.encode('utf-8')).hexdigest()
-            
-            if line_hash not in self._history and line not in prev_lines:
-                new_lines.append({
-                    'text': f"[{window_title}] {line}",
-                    'timestamp': datetime.now(),
-                    'hash': line_hash
-                })
-                self._history.add(line_hash)
+        seq = self._seq.get(window_title, 0)
+        for line, line_hash in appended:
+            seq += 1
+            new_lines.append({
+                'text': f"[{window_title}] {line}",
+                'timestamp': datetime.now(),
+                'hash': f"{line_hash:016x}",
+                'window': window_title,
+                'seq': seq
+            })
+        self._seq[window_title] = seq
         
         # 스냅샷 업데이트
-        self._window_snapshots[window_title] = {
-            'hash': text_hash,
-            'lines': current_lines_set
-        }
+        self._window_snapshots[window_title] = {'hash': text_hash}
+        self._save_window(window_title)
         
         return new_lines
 
+    def _save_window(self, window_title: str):
+        self.checkpoint.update(window_title,
+                               anchor=self.differ.anchor(window_title),
+                               line_count=self.differ.line_count(window_title),
+                               seq=self._seq.get(window_title, 0))
+
+    def load_checkpoint(self):
+        for title, entry in self.checkpoint.load().items():
+            if entry.get('anchor'):
+                self.differ.set_anchor(title, entry['anchor'], entry.get('line_count'))
+            self._seq[title] = entry.get('seq', 0)
+
     def monitoring_loop(self):
         print("[INFO] Fast clipboard-based multi-window monitoring started")
         print("[INFO] Window switching is minimized for better user experience")
         
-        # 초기화: 모든 창의 현재 상태를 스냅샷으로 저장 (첫 실행시 모든 메시지가 쏟아지지 않도록)
-        print("[INFO] Initializing window snapshots...")
-        windows = self.find_all_chat_windows()
-        for win_info in windows:
-            text = self.quick_capture_text(win_info['hwnd'])
-            if text:
-                self._window_snapshots[win_info['title']] = {
-                    'hash': hashlib.md5(text.encode('utf-8')).hexdigest(),
-                    'lines': set([line.strip() for line in text.split('\r\n') if line.strip()])
-                }
-                # 초기 히스토리에도 추가
-                for line in text.split('\r\n'):
-                    line = line.strip()
-                    if line:
-                        line_id = f"{win_info['title']}_{line}"
-                        self._history.add(hashlib.md5(line_id.encode('utf-8')).hexdigest())
-        
-        print(f"[INFO] Initialized {len(windows)} chat windows")
-        print("[OK] Monitoring for NEW messages only...\n")
+        # 초기화: 전체 창을 미리 캡처하지 않고, 체크포인트의 앵커만 복원
+        # 처음 보는 창은 첫 캡처 시 history_policy에 따라 처리
+        self.load_checkpoint()
+        print(f"[OK] Monitoring for NEW messages (existing history: {self.history_policy})...\n")
         
         while self.is_running:
             if not self.app:
                 if not self.connect():
-                    time.sleep(2)
+                    self._wake.wait(2)
                     continue
 
             windows = self.find_all_chat_windows()
@@ -179,17 +213,27 @@ class MultiKakaoMonitor:
                 # 창 전환 간격 (매우 짧게)
                 time.sleep(0.1)
             
+            self.checkpoint.maybe_save()
+            
             # 한 사이클이 끝나면 설정된 간격만큼 대기
-            time.sleep(self.config['kakao']['monitoring_interval'])
+            self._wake.wait(self.config['kakao']['monitoring_interval'])
 
     def start(self):
         if not self.connect():
             print("[ERROR] Failed to connect to KakaoTalk")
             return False
         self.is_running = True
+        self._wake.clear()
         self.thread = threading.Thread(target=self.monitoring_loop, daemon=True)
         self.thread.start()
         return True
 
     def stop(self):
         self.is_running = False
+        self._wake.set()
+        if self.thread:
+            # 진행 중인 창 캡처가 끝나야 루프가 멈추므로, 그 뒤에 체크포인트를 저장해야 마지막 앵커가 남음
+            self.thread.join(timeout=5)
+            if self.thread.is_alive():
+                print("[WARN] Monitoring thread did not stop in time; checkpoint may miss the last window")
+        self.checkpoint.save()
@@ -2,64 +2,101 @@
 성능 모니터링 유틸리티
 응답 시간 추적 및 성능 통계
 """
+import threading
 import time
-from collections import deque
 from typing import Optional
 
+from .latency_histogram import WindowedHistogram
+
 
 class PerformanceMonitor:
-    def __init__(self, max_response_time: float = 0.5):
+    def __init__(self, max_response_time: float = 0.5, window: float = 60.0, report_interval: float = 10.0):
         """
         Args:
             max_response_time: 최대 허용 응답 시간 (초)
+            window: 최근 구간 통계의 길이 (초)
+            report_interval: 응답 시간 초과를 콘솔에 알리는 최소 간격 (초)
         """
         self.max_response_time = max_response_time
-        self.response_times = deque(maxlen=1000)  # 최근 1000개 기록
+        self.report_interval = report_interval
+        # 전체 기간 + 최근 window초 히스토그램 (기록 O(1), 정렬 없음)
+        self.histogram = WindowedHistogram(window=window)
         self.violations = 0  # 응답 시간 초과 횟수
         self.total_messages = 0
-        
+
+        # 초과 알림은 report_interval마다 모아서 한 번만 출력
+        self._report_lock = threading.Lock()
+        self._last_report = 0.0
+        self._unreported = 0
+        self._unreported_worst = 0.0
+
     def record_response_time(self, response_time: float):
         """응답 시간 기록"""
-        self.response_times.append(response_time)
+        now = time.time()
+        self.histogram.record(response_time, now)
         self.total_messages += 1
-        
+
         if response_time > self.max_response_time:
             self.violations += 1
-            print(f"⚠️  응답 시간 초과: {response_time*1000:.1f}ms (목표: {self.max_response_time*1000:.1f}ms)")
-    
+            with self._report_lock:
+                self._unreported += 1
+                self._unreported_worst = max(self._unreported_worst, response_time)
+        if self._unreported and now - self._last_report >= self.report_interval:
+            # 초과가 없는 기록이 와도 간격이 지났으면 모아 둔 알림을 출력
+            self._report_violations(now)
+
+    def _report_violations(self, now: float, force: bool = False):
+        with self._report_lock:
+            if not self._unreported or (not force and now - self._last_report < self.report_interval):
+                return
+            count, worst = self._unreported, self._unreported_worst
+            self._unreported = 0
+            self._unreported_worst = 0.0
+            self._last_report = now
+        if count == 1:
+            print(f"⚠️  응답 시간 초과: {worst*1000:.1f}ms (목표: {self.max_response_time*1000:.1f}ms)")
+        else:
+            print(f"⚠️  응답 시간 초과 {count}회 (최대 {worst*1000:.1f}ms, 목표: {self.max_response_time*1000:.1f}ms)")
+
     def get_average_response_time(self) -> Optional[float]:
         """평균 응답 시간 계산"""
-        if not self.response_times:
+        lifetime, _ = self.histogram.snapshot()
+        if not lifetime.count:
             return None
-        return sum(self.response_times) / len(self.response_times)
-    
+        return lifetime.total / lifetime.count
+
     def get_statistics(self) -> dict:
-        """성능 통계 반환"""
-        if not self.response_times:
+        """성능 통계 반환 (전체 기간, window는 최근 구간)"""
+        lifetime, recent = self.histogram.snapshot()
+        if not lifetime.count:
             return {}
-        
-        times = list(self.response_times)
-        times.sort()
-        
+
+        stats = lifetime.summary()
+        window = recent.summary()
+
         return {
             'total_messages': self.total_messages,
-            'average_ms': self.get_average_response_time() * 1000,
-            'min_ms': min(times) * 1000,
-            'max_ms': max(times) * 1000,
-            'p50_ms': times[len(times)//2] * 1000,
-            'p95_ms': times[int(len(times)*0.95)] * 1000,
-            'p99_ms': times[int(len(times)*0.99)] * 1000,
+            'average_ms': stats['mean_ms'],
+            'min_ms': stats['min_ms'],
+            'max_ms': stats['max_ms'],
+            'p50_ms': stats['p50_ms'],
+            'p95_ms': stats['p95_ms'],
+            'p99_ms': stats['p99_ms'],
+            'p999_ms': stats['p999_ms'],
             'violations': self.violations,
-            'violation_rate': (self.violations / self.total_messages * 100) if self.total_messages > 0 else 0
+            'violation_rate': (self.violations / self.total_messages * 100) if self.total_messages > 0 else 0,
+            'window': dict(window, seconds=self.histogram.window),
         }
-    
+
     def print_statistics(self):
-        """통계 출력"""
+        """통계 출력 (아직 출력하지 않은 초과 알림을 먼저 출력)"""
+        self._report_violations(time.time(), force=True)
         stats = self.get_statistics()
         if not stats:
             print("📊 통계 데이터 없음")
             return
-        
+
+        window = stats['window']
         print("\n" + "="*60)
         print("📊 성능 통계")
         print("="*60)
@@ -70,5 +107,8 @@ class PerformanceMonitor:
         print(f"P50 (중앙값):     {stats['p50_ms']:.2f}ms")
         print(f"P95:              {stats['p95_ms']:.2f}ms")
         print(f"P99:              {stats['p99_ms']:.2f}ms")
+        print(f"P99.9:            {stats['p999_ms']:.2f}ms")
         print(f"목표 초과:        {stats['violations']:,}회 ({stats['violation_rate']:.1f}%)")
+        print(f"최근 {window['seconds']:.0f}초:        {window['count']:,}개, "
+              f"P50 {window['p50_ms']:.2f}ms / P99 {window['p99_ms']:.2f}ms")
         print("="*60 + "\n")
@@ -0,0 +1,366 @@
+"""
+별도 프로세스 writer
+캡처 스레드(문자열 분리, md5 등)와 같은 GIL을 쓰지 않도록 서식화/압축/디스크 I/O를
+자식 프로세스에서 처리하고, 부모는 메시지를 배치로 묶어 파이프로 보내기만 함
+
+부모 (캡처 프로세스):
+    write_message -> 스풀 기록 -> 큐 -> 감독 스레드가 배치로 묶어 전송, ack를 받으면 스풀 ack
+자식 (쓰기 프로세스):
+    GroupCommitWriter 또는 SQLiteMessageWriter를 sink로 열고 배치마다 write_batch 후 ack
+
+자식이 죽으면 감독 스레드가 백오프 후 다시 띄우고 ack받지 못한 배치를 순서대로 다시 보냄
+(같은 출력 파일에 이어 씀, 이미 기록된 배치가 다시 기록될 수 있음: at-least-once)
+자식이 기록에 실패한 배치는 그 뒤에 보낸 배치와 함께 백오프 후 순서대로 다시 보내며,
+그동안 새 배치는 보내지 않음 (순서 유지)
+"""
+import copy
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from .write_queue import create_write_queue, drain_queue
+from .spool import create_spool
+from .stage_latency import mark, mark_batch, finish_batch
+from .span_tracer import complete
+
+
+def _child_sink(config: dict):
+    """자식 프로세스에서 쓸 sink (open_sink / write_batch / close_sink / idle_sink)"""
+    from .message_writer import GroupCommitWriter
+    from .sqlite_sink import SQLiteMessageWriter
+    if config['output'].get('writer_mode') == 'sqlite':
+        return SQLiteMessageWriter(config)
+    return GroupCommitWriter(config)
+
+
+def _writer_process(config: dict, conn):
+    """자식 프로세스 본체: ('batch', id, messages)를 받아 기록하고 ('ack', id)로 응답"""
+    # Ctrl+C는 콘솔의 모든 프로세스에 전달되므로 종료는 부모의 'stop' 요청으로만 함
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sink = _child_sink(config)
+    sink.open_sink()
+    idle = getattr(sink, 'idle_sink', None)
+    try:
+        while True:
+            if not conn.poll(0.1):
+                if idle:
+                    idle()
+                continue
+            try:
+                request = conn.recv()
+            except EOFError:
+                break  # 부모가 종료됨
+            if request[0] == 'stop':
+                break
+            _, batch_id, messages = request
+            try:
+                sink.write_batch(messages)
+                conn.send(('ack', batch_id))
+            except Exception as e:
+                conn.send(('failed', batch_id, f"{type(e).__name__}: {e}"))
+    finally:
+        sink.close_sink()
+
+
+class ProcessWriter:
+    """
+    쓰기 프로세스로 메시지를 보내는 writer (다른 writer와 같은 start/write_message/stop 인터페이스)
+    자식 프로세스의 출력 방식은 output.writer_mode (group_commit 또는 sqlite)를 따름
+    """
+
+    def __init__(self, config: dict):
+        """
+        Args:
+            config: 출력 설정 (output.process)
+        """
+        self.config = config
+        output_config = config['output']
+        process_config = output_config.get('process', {})
+        self.output_dir = Path(output_config['directory'])
+        self.max_batch = process_config.get('max_batch', output_config.get('max_batch', 1024))
+        self.max_inflight = max(1, process_config.get('max_inflight_batches', 4))
+        self.restart_backoff = process_config.get('restart_backoff_ms', 500) / 1000
+        self.max_backoff = process_config.get('max_backoff_ms', 10000) / 1000
+        self.retry_backoff = process_config.get('retry_backoff_ms', 200) / 1000
+        self.drain_timeout = output_config.get('drain_timeout', 10.0)
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = output_config['filename_format'].format(timestamp=self.timestamp)
+        self.output_file = self.output_dir / filename
+        print(f"[INFO] Output file: {self.output_file} (writer process)")
+        self._child_config = self._make_child_config(config, filename)
+
+        # (메시지, 넣은 시각, 스풀 seq) - 부모에서는 큐와 스풀만 사용
+        self.message_queue = create_write_queue(config, self.output_file)
+        self.spool = create_spool(config, self.output_dir)
+
+        self._ctx = multiprocessing.get_context('spawn')  # Windows와 같은 방식으로 시작
+        self.process = None
+        self._conn = None
+        self._inflight: "OrderedDict[int, tuple]" = OrderedDict()  # 배치 id -> (배치, 큐에서 꺼냈는지, 보낸 시각 ns)
+        self._next_batch_id = 1
+        self._replay = []
+        self._retry: List[tuple] = []  # 자식이 기록하지 못한 (배치 id, 배치, 큐에서 꺼냈는지), id 순
+        self._retry_at = 0.0
+        self._retry_delay = self.retry_backoff
+        self._failing = False  # 실패가 이어지는 동안 로그를 한 번만 남김
+        self.is_running = False
+        self.supervisor = None
+
+        # 통계
+        self.batches = 0
+        self.messages = 0
+        self.failed_batches = 0
+        self.retries = 0
+        self.restarts = 0
+        self.last_error = None
+        self.message_latencies = deque(maxlen=1000)  # 큐에 넣은 뒤 자식의 ack까지 걸린 시간
+
+    @staticmethod
+    def _make_child_config(config: dict, filename: str) -> dict:
+        """자식용 설정: 파일명을 고정해 재시작해도 같은 파일(또는 회전 manifest)에 이어 씀"""
+        child = copy.deepcopy(config)
+        output = child['output']
+        output['filename_format'] = filename.replace('{', '{{').replace('}', '}}')
+        output['spool'] = {'enabled': False}  # 스풀은 부모가 관리
+        output['overflow_policy'] = 'block'
+        if output.get('writer_mode') not in ('group_commit', 'sqlite'):
+            output['writer_mode'] = 'group_commit'
+        return child
+
+    # ----- 자식 프로세스 관리 (감독 스레드) -----
+
+    def _spawn(self):
+        config = self._child_config
+        if self.restarts:
+            # 재시작한 자식이 이전 기록을 덮어쓰지 않게 함
+            config = copy.deepcopy(config)
+            config['output']['append_mode'] = True
+        parent_conn, child_conn = self._ctx.Pipe()
+        self.process = self._ctx.Process(target=_writer_process, args=(config, child_conn),
+                                         name="message-writer", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._conn = parent_conn
+        for batch_id, (batch, _, _) in self._inflight.items():
+            self._conn.send(('batch', batch_id, [message for message, _, _ in batch]))
+
+    def _restart(self, reason: str, backoff: float) -> float:
+        """자식을 정리하고 backoff초 뒤 다시 시작, 다음 백오프 반환"""
+        code = self.process.exitcode if self.process else None
+        print(f"[WARN] Writer process stopped ({reason}, exit code {code}); "
+              f"restarting in {backoff:.1f}s with {len(self._inflight)} unacknowledged batches")
+        self._close_process(timeout=0)
+        deadline = time.time() + backoff
+        while time.time() < deadline and self.is_running:
+            time.sleep(0.05)
+        self.restarts += 1
+        try:
+            self._spawn()
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"[ERROR] Writer process restart failed: {self.last_error}")
+        return min(backoff * 2, self.max_backoff)
+
+    def _close_process(self, timeout: float):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        if self.process is not None:
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(1)
+            self.process = None
+
+    def _send(self, batch: List, queued: bool):
+        batch_id = self._next_batch_id
+        self._next_batch_id += 1
+        self._inflight[batch_id] = (batch, queued, time.perf_counter_ns())
+        self._conn.send(('batch', batch_id, [message for message, _, _ in batch]))
+
+    def _handle(self, reply: tuple) -> bool:
+        """자식의 응답 처리. ack면 True"""
+        kind, batch_id = reply[0], reply[1]
+        batch, queued, sent = self._inflight.pop(batch_id, (None, False, 0))
+        if batch is None:
+            return False
+        acked = kind == 'ack'
+        complete('write_batch', 'writer', sent, messages=len(batch), process=True, acked=acked)
+        if acked:
+            if self._failing and not self._retry:
+                print("[INFO] Writer process recovered")
+                self._failing = False
+                self._retry_delay = self.retry_backoff
+            messages = [message for message, _, _ in batch]
+            mark_batch(messages, 'write')  # 전송 + 자식의 서식화/기록 포함
+            finish_batch(messages)
+            now = time.time()
+            self.batches += 1
+            self.messages += len(batch)
+            for _, enqueued, _ in batch:
+                self.message_latencies.append(now - enqueued)
+            if self.spool:
+                for _, _, seq in batch:
+                    self.spool.ack(seq, flush=False)
+                self.spool.flush_acks()
+        else:
+            # 기록하지 못한 배치는 백오프 후 다시 보냄 (큐 task_done과 스풀 ack는 기록된 뒤에)
+            self.failed_batches += 1
+            self.last_error = reply[2]
+            if not self._failing:
+                print(f"[ERROR] File write error (writer process, retrying): {self.last_error}")
+                self._failing = True
+            if not self._retry:
+                self._retry_at = time.time() + self._retry_delay
+                self._retry_delay = min(self._retry_delay * 2, self.max_backoff)
+            self._retry.append((batch_id, batch, queued))
+            # 뒤에 보낸 배치도 실패한 배치를 다시 보낸 뒤에 기록되도록 함께 다시 보냄
+            # (자식이 이미 기록했을 수 있음: at-least-once, 늦게 온 응답은 _inflight에 없어 무시됨)
+            for later in [i for i in self._inflight if i > batch_id]:
+                later_batch, later_queued, _ = self._inflight.pop(later)
+                self._retry.append((later, later_batch, later_queued))
+            self._retry.sort(key=lambda item: item[0])
+            return False
+        if queued:
+            for _ in batch:
+                self.message_queue.task_done()
+        return acked
+
+    def _next_batch(self):
+        """보낼 배치: 지난 실행의 재생 메시지를 먼저, 그 다음 큐 (없으면 None)"""
+        if self._replay:
+            now = time.time()
+            batch = [(message, now, seq) for seq, message in self._replay[:self.max_batch]]
+            del self._replay[:self.max_batch]
+            return batch, False
+        try:
+            batch = [self.message_queue.get(timeout=0.05)]
+        except queue.Empty:
+            return None
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.message_queue.get_nowait())
+            except queue.Empty:
+                break
+        mark_batch([message for message, _, _ in batch], 'queue')
+        return batch, True
+
+    def supervise(self):
+        """배치 전송, ack 수신, 자식 프로세스 감시 및 재시작"""
+        backoff = self.restart_backoff
+        pending = None
+        while self.is_running:
+            try:
+                if self._conn is None:
+                    raise EOFError("not running")
+                # 죽기 전에 보낸 ack를 먼저 받아 이미 기록된 배치를 다시 보내지 않게 함
+                while self._conn.poll():
+                    if self._handle(self._conn.recv()):
+                        backoff = self.restart_backoff
+                if not self.process.is_alive():
+                    raise EOFError("process exited")
+                if len(self._inflight) >= self.max_inflight:
+                    # 자식이 따라올 때까지 대기 (큐가 차면 overflow_policy가 적용됨)
+                    self._conn.poll(0.05)
+                    continue
+                if self._retry:
+                    # 실패한 배치를 먼저 다시 보내고, 그때까지 새 배치는 보내지 않음
+                    wait = self._retry_at - time.time()
+                    if wait > 0:
+                        self._conn.poll(min(wait, 0.05))
+                        continue
+                    _, batch, queued = self._retry.pop(0)
+                    self.retries += 1
+                    self._send(batch, queued)
+                    continue
+                if pending is None:
+                    pending = self._next_batch()
+                if pending is not None:
+                    batch, queued = pending
+                    pending = None
+                    self._send(batch, queued)
+            except (EOFError, OSError) as e:
+                backoff = self._restart(str(e) or type(e).__name__, backoff)
+        self._shutdown_child()
+
+    def _shutdown_child(self):
+        """남은 ack를 받고 자식에게 종료 요청 (자식은 파일을 fsync 후 닫음)"""
+        deadline = time.time() + 5
+        if self._conn is None:
+            return
+        try:
+            while self._inflight and time.time() < deadline and self._conn.poll(0.1):
+                self._handle(self._conn.recv())
+            self._conn.send(('stop',))
+        except (EOFError, OSError):
+            pass
+        self._close_process(timeout=max(1.0, deadline - time.time()))
+
+    # ----- 호출 스레드 -----
+
+    def write_message(self, message: Dict):
+        """메시지를 큐에 추가 (서식화와 파일 I/O는 쓰기 프로세스에서 함)"""
+        mark(message, 'callback')
+        seq = self.spool.append(message) if self.spool else 0
+        if not self.message_queue.put((message, time.time(), seq), message.get('window', '')) and self.spool:
+            self.spool.ack(seq, flush=False)
+
+    def start(self):
+        if self.is_running:
+            return
+        if self.spool:
+            self._replay = self.spool.recover()
+            self.spool.start()
+        self._spawn()
+        self.is_running = True
+        self.supervisor = threading.Thread(target=self.supervise, name="writer-supervisor", daemon=True)
+        self.supervisor.start()
+        print(f"[INFO] Writer process started (pid {self.process.pid})")
+
+    def stop(self):
+        """큐의 메시지를 drain_timeout 안에서 자식에게 넘겨 기록한 뒤 자식 프로세스 종료"""
+        print("[INFO] Saving remaining messages...")
+        if not drain_queue(self.message_queue, self.supervisor, self.drain_timeout):
+            where = "kept in the spool for the next start" if self.spool else "lost"
+            print(f"[WARN] Writer process did not drain within {self.drain_timeout}s; remaining messages {where}")
+        self.is_running = False
+        if self.supervisor:
+            self.supervisor.join(timeout=10)
+        self.message_queue.close()
+        self.message_queue.print_summary()
+        if self.spool:
+            self.spool.close()
+
+        stats = self.get_statistics()
+        print(f"[INFO] Writer process: {stats['messages']} messages in {stats['batches']} batches, "
+              f"failed batches {stats['failed_batches']} (retried {stats['retries']}), restarts {stats['restarts']}, "
+              f"message p50 {stats['latency_p50_ms']:.2f}ms / p99 {stats['latency_p99_ms']:.2f}ms")
+        print(f"[INFO] All messages saved under: {self.output_dir}")
+
+    def get_statistics(self) -> dict:
+        latencies = sorted(self.message_latencies)
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+        return {
+            'pid': self.process.pid if self.process else None,
+            'batches': self.batches,
+            'messages': self.messages,
+            'failed_batches': self.failed_batches,
+            'retries': self.retries,
+            'retry_batches': len(self._retry),
+            'restarts': self.restarts,
+            'inflight_batches': len(self._inflight),
+            'latency_p50_ms': pct(0.5),
+            'latency_p99_ms': pct(0.99),
+            'last_error': self.last_error,
+        }
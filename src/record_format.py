@@ -0,0 +1,244 @@
+"""
+메시지 출력 형식과 스트리밍 리더
+
+형식 (output.format):
+    text:   [캡처 시각] 텍스트 (기존 형식)
+    jsonl:  한 줄에 JSON 레코드 하나
+    binary: 길이 접두사가 붙은 고정 헤더 + UTF-8 문자열 (.kbr)
+
+레코드 필드: room, sender, captured, source_time, seq, hash, type, continued, text
+
+binary 레코드:
+    <I  나머지 길이
+    <d  captured (epoch 초)
+    <d  source_time (epoch 초, 없으면 NaN)
+    <q  seq (없으면 -1)
+    <Q  hash (64비트 지문, 없으면 0)
+    <B  type 코드, <B continued
+    <H  room 길이, <H sender 길이, <I text 길이
+    room, sender, text (UTF-8)
+"""
+import io
+import json
+import math
+import struct
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional, Set
+
+from .stream_compression import DecompressingReader
+
+Record = namedtuple('Record', 'room sender captured source_time seq hash type continued text')
+
+_LENGTH = struct.Struct('<I')
+_HEADER = struct.Struct('<ddqQBBHHI')
+_TYPES = ('line', 'message', 'date', 'text')
+_TYPE_CODES = {name: i for i, name in enumerate(_TYPES)}
+_READ_CHUNK = 4 * 1024 * 1024
+
+
+def _fingerprint(value) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value
+    try:
+        return int(value, 16)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _text_of(message: dict) -> str:
+    # kbond_main은 text에 표시용 문자열, body에 원문을 넣음
+    return message.get('body', message['text'])
+
+
+class TextFormat:
+    name = 'text'
+    extension = '.txt'
+    binary = False
+
+    def encode(self, message: dict) -> str:
+        timestamp = message['timestamp'].strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        return f"[{timestamp}] {message['text']}\n"
+
+
+class JsonlFormat:
+    name = 'jsonl'
+    extension = '.jsonl'
+    binary = False
+
+    def encode(self, message: dict) -> str:
+        source_time = message.get('source_time')
+        return json.dumps({
+            'room': message.get('window', ''),
+            'sender': message.get('sender'),
+            'captured': message['timestamp'].isoformat(),
+            'source_time': source_time.isoformat() if source_time else None,
+            'seq': message.get('seq'),
+            'hash': message.get('hash'),
+            'type': message.get('type', 'line'),
+            'continued': bool(message.get('continued')),
+            'text': _text_of(message),
+        }, ensure_ascii=False) + "\n"
+
+
+class BinaryFormat:
+    name = 'binary'
+    extension = '.kbr'
+    binary = True
+
+    def encode(self, message: dict) -> bytes:
+        room = message.get('window', '').encode('utf-8')
+        sender = (message.get('sender') or '').encode('utf-8')
+        text = _text_of(message).encode('utf-8')
+        source_time = message.get('source_time')
+        seq = message.get('seq')
+        header = _HEADER.pack(
+            message['timestamp'].timestamp(),
+            source_time.timestamp() if source_time else math.nan,
+            -1 if seq is None else seq,
+            _fingerprint(message.get('hash')),
+            _TYPE_CODES.get(message.get('type', 'line'), 0),
+            1 if message.get('continued') else 0,
+            len(room), len(sender), len(text),
+        )
+        body_length = _HEADER.size + len(room) + len(sender) + len(text)
+        return b"".join((_LENGTH.pack(body_length), header, room, sender, text))
+
+
+FORMATS = {cls.name: cls for cls in (TextFormat, JsonlFormat, BinaryFormat)}
+
+
+def create_formatter(config: dict):
+    """output.format 설정으로 형식 객체 생성 (기본값 text)"""
+    name = config['output'].get('format', 'text')
+    if name not in FORMATS:
+        print(f"[WARN] Unknown output format '{name}', using 'text'")
+        name = 'text'
+    return FORMATS[name]()
+
+
+def with_format_extension(filename_format: str, formatter) -> str:
+    """기본 확장자(.txt)를 형식에 맞는 확장자로 변경"""
+    if formatter.name != 'text' and filename_format.endswith('.txt'):
+        return filename_format[:-4] + formatter.extension
+    return filename_format
+
+
+# ----- 리더 -----
+
+def _open_binary(path: Path):
+    """압축된 세그먼트와 스트리밍 압축 출력(.gz / .zst, 기록 중인 파일 포함)도 그대로 읽을 수 있게 엶"""
+    if path.suffix in ('.gz', '.zst'):
+        return io.BufferedReader(DecompressingReader(path), _READ_CHUNK)
+    return open(path, 'rb')
+
+
+def _format_of(path: Path) -> str:
+    suffixes = path.suffixes
+    if suffixes and suffixes[-1] in ('.gz', '.zst'):
+        suffixes = suffixes[:-1]
+    ext = suffixes[-1] if suffixes else ''
+    for name, cls in FORMATS.items():
+        if cls.extension == ext:
+            return name
+    return 'text'
+
+
+def iter_binary(f, rooms: Optional[Set[str]] = None) -> Iterator[Record]:
+    """binary 레코드 스트림. rooms를 주면 다른 방의 레코드는 본문을 디코딩하지 않고 건너뜀"""
+    room_filter = {room.encode('utf-8') for room in rooms} if rooms else None
+    fromtimestamp = datetime.fromtimestamp
+    isnan = math.isnan
+    header_size = _HEADER.size
+    unpack_header = _HEADER.unpack_from
+    unpack_length = _LENGTH.unpack_from
+    buf = b""
+    pos = 0
+    while True:
+        chunk = f.read(_READ_CHUNK)
+        if not chunk:
+            break
+        buf = buf[pos:] + chunk
+        pos = 0
+        view = memoryview(buf)
+        end = len(buf)
+        while pos + 4 <= end:
+            (length,) = unpack_length(buf, pos)
+            record_end = pos + 4 + length
+            if record_end > end:
+                break
+            captured, source, seq, fingerprint, type_code, continued, room_len, sender_len, text_len = \
+                unpack_header(buf, pos + 4)
+            start = pos + 4 + header_size
+            room = view[start:start + room_len]
+            pos = record_end
+            if room_filter is not None and bytes(room) not in room_filter:
+                continue
+            sender_start = start + room_len
+            text_start = sender_start + sender_len
+            yield Record(
+                str(room, 'utf-8'),
+                str(view[sender_start:text_start], 'utf-8') or None,
+                fromtimestamp(captured),
+                None if isnan(source) else fromtimestamp(source),
+                None if seq < 0 else seq,
+                f"{fingerprint:016x}" if fingerprint else None,
+                _TYPES[type_code] if type_code < len(_TYPES) else 'line',
+                bool(continued),
+                str(view[text_start:text_start + text_len], 'utf-8'),
+            )
+        view.release()
+    # 끝에 남은 바이트는 기록 중이거나 잘린 레코드이므로 무시
+
+
+def iter_jsonl(f, rooms: Optional[Set[str]] = None) -> Iterator[Record]:
+    loads = json.loads
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            obj = loads(line)
+        except ValueError:
+            continue  # 기록 중인 마지막 줄
+        if rooms and obj.get('room') not in rooms:
+            continue
+        source_time = obj.get('source_time')
+        yield Record(
+            obj.get('room', ''), obj.get('sender'),
+            datetime.fromisoformat(obj['captured']),
+            datetime.fromisoformat(source_time) if source_time else None,
+            obj.get('seq'), obj.get('hash'), obj.get('type', 'line'),
+            bool(obj.get('continued')), obj.get('text', ''),
+        )
+
+
+def iter_records(path, rooms: Optional[Set[str]] = None) -> Iterator[Record]:
+    """
+    출력 파일(압축 세그먼트 포함)의 레코드를 순서대로 읽음
+
+    Args:
+        path: .jsonl / .kbr 파일 (.gz, .zst 가능)
+        rooms: 읽을 방 이름 집합 (None이면 전체)
+    """
+    path = Path(path)
+    kind = _format_of(path)
+    if kind == 'text':
+        raise ValueError(f"{path} is a text log; only jsonl and binary outputs carry records")
+    with _open_binary(path) as f:
+        if kind == 'binary':
+            yield from iter_binary(f, rooms)
+        else:
+            yield from iter_jsonl(io.TextIOWrapper(f, encoding='utf-8'), rooms)
+
+
+def iter_directory(directory, pattern: str = "*", rooms: Optional[Set[str]] = None) -> Iterator[Record]:
+    """디렉토리의 jsonl / binary 출력 파일을 이름 순으로 모두 읽음 (.part와 .manifest.json은 건너뜀)"""
+    for path in sorted(Path(directory).glob(pattern)):
+        if path.suffix in ('.part', '.tmp', '.json', '.overflow') or not path.is_file():
+            continue
+        if _format_of(path) == 'text':
+            continue
+        yield from iter_records(path, rooms)
@@ -0,0 +1,453 @@
+"""
+출력 파일 회전 (크기 / 시간 단위) 및 백그라운드 압축
+
+세그먼트 파일:
+    {stem}.{index:04d}{suffix}.part  기록 중
+    {stem}.{index:04d}{suffix}       봉인됨 (fsync 후 rename이므로 읽는 쪽은 완성된 파일만 봄)
+    {stem}.{index:04d}{suffix}.gz    압축됨 (zstandard가 있으면 .zst)
+
+{stem}.manifest.json에 세그먼트별 파일명, 상태, 첫/마지막 메시지 시각, 메시지 수, 크기를 기록
+{stem}.manifest.lock은 기록 중인 실행이 OS 파일 잠금을 쥐고 있음 (잠금이 풀린 manifest만 이전 실행으로 보고 정리)
+"""
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_CHUNK = 1024 * 1024
+_PERIODS = {'hour': "%Y%m%d%H", 'day': "%Y%m%d"}
+_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+_MANIFEST_SUFFIX = '.manifest.json'
+
+
+def _lower_thread_priority():
+    """현재 스레드 우선순위를 낮춤 (지원하지 않는 환경이면 무시)"""
+    try:
+        if os.name == 'nt':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), -2)  # THREAD_PRIORITY_LOWEST
+        elif hasattr(os, 'setpriority') and hasattr(threading, 'get_native_id'):
+            # Linux에서는 스레드 id에 nice가 적용됨
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except Exception:
+        pass
+
+
+def _write_json_atomic(path: Path, data):
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class _OwnerLock:
+    """manifest 소유 표시 - 살아 있는 동안 잠금 파일에 배타 잠금을 쥠 (프로세스가 죽으면 OS가 풀어 줌)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        """잠금을 얻으면 True, 다른 실행이 쥐고 있으면 False"""
+        f = open(self.path, 'a+b')
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self, remove: bool = False):
+        if self._file is None:
+            return
+        try:
+            if os.name == 'nt':
+                import msvcrt
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        except OSError:
+            pass
+        self._file.close()
+        self._file = None
+        if remove:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+def _lock_path(manifest_path: Path) -> Path:
+    return manifest_path.with_name(manifest_path.name[:-len(_MANIFEST_SUFFIX)] + '.manifest.lock')
+
+
+def resolve_codec(name: str) -> Optional[str]:
+    """설정값(auto/gzip/zstd/none)을 실제 압축 방식으로 변환"""
+    if name in (None, 'none', False):
+        return None
+    if name == 'zstd' and zstandard is None:
+        print("[WARN] zstandard is not installed, compressing output segments with gzip")
+        return 'gzip'
+    if name == 'auto':
+        return 'zstd' if zstandard else 'gzip'
+    if name not in _EXTENSIONS:
+        print(f"[WARN] Unknown compression '{name}', using gzip")
+        return 'gzip'
+    return name
+
+
+class SegmentCompressor:
+    """봉인된 세그먼트를 낮은 우선순위 스레드에서 하나씩 압축"""
+
+    def __init__(self, codec: str, on_done=None):
+        """
+        Args:
+            codec: 'gzip' 또는 'zstd'
+            on_done: 압축 후 호출 (원본 경로, 압축 파일 경로)
+        """
+        self.codec = codec
+        self.on_done = on_done
+        self._jobs = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self.compressed = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def submit(self, path: Path):
+        self._jobs.put(Path(path))
+
+    def _open_output(self, f, name: str):
+        if self.codec == 'zstd':
+            return zstandard.ZstdCompressor(level=3).stream_writer(f)
+        # 헤더에 .tmp 이름이 들어가지 않도록 최종 파일명을 넘김
+        return gzip.GzipFile(filename=name, fileobj=f, mode='wb', compresslevel=6)
+
+    def _compress(self, path: Path) -> Path:
+        target = path.with_name(path.name + _EXTENSIONS[self.codec])
+        tmp_path = target.with_name(target.name + '.tmp')
+        with open(path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            out = self._open_output(dst, target.name)
+            while True:
+                chunk = src.read(_CHUNK)
+                if not chunk:
+                    break
+                out.write(chunk)
+                time.sleep(0)  # 청크마다 GIL을 양보해 쓰기 스레드를 막지 않음
+            if self.codec == 'zstd':
+                out.flush(zstandard.FLUSH_FRAME)
+            else:
+                out.close()
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, target)
+        self.bytes_in += path.stat().st_size
+        self.bytes_out += target.stat().st_size
+        os.remove(path)
+        return target
+
+    def _run(self):
+        _lower_thread_priority()
+        while True:
+            path = self._jobs.get()
+            try:
+                if path is None:
+                    return
+                if path.exists():
+                    target = self._compress(path)
+                    self.compressed += 1
+                    if self.on_done:
+                        self.on_done(path, target)
+            except Exception as e:
+                print(f"[ERROR] Segment compression error ({path}): {e}")
+            finally:
+                self._jobs.task_done()
+
+    def close(self, timeout: float = 60.0):
+        """남은 압축을 마칠 때까지 최대 timeout초 대기"""
+        self._jobs.put(None)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print("[WARN] Segment compression still running; remaining segments stay uncompressed")
+
+
+class RotatingOutput:
+    """
+    세그먼트 단위로 회전하는 출력 파일 (쓰기 스레드 전용)
+    회전 조건: max_bytes를 넘거나 interval('hour'/'day')의 시각 구간이 바뀌면 봉인 후 새 세그먼트
+    """
+
+    def __init__(self, output_dir: Path, stem: str, suffix: str, encoding: str = 'utf-8',
+                 max_bytes: int = 0, interval: Optional[str] = None, compression: str = 'auto'):
+        """
+        Args:
+            output_dir: 출력 디렉토리
+            stem / suffix: 실행별 파일명 (filename_format으로 만든 이름의 앞부분 / 확장자)
+            max_bytes: 세그먼트 최대 크기 (0이면 크기로 회전하지 않음)
+            interval: 'hour', 'day' 또는 None
+            compression: 'auto', 'gzip', 'zstd', 'none'
+        """
+        if interval not in (None, *_PERIODS):
+            print(f"[WARN] Unknown rotation interval '{interval}', rotating by size only")
+            interval = None
+        self.output_dir = Path(output_dir)
+        self.stem = stem
+        self.suffix = suffix
+        self.encoding = encoding
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.codec = resolve_codec(compression)
+
+        self.manifest_path = self.output_dir / f"{stem}{_MANIFEST_SUFFIX}"
+        self._owner = _OwnerLock(_lock_path(self.manifest_path))
+        self._manifest_lock = threading.Lock()  # 쓰기 스레드 / 압축 스레드
+        self._segments: List[Dict] = []
+        self._compressor = SegmentCompressor(self.codec, self._on_compressed) if self.codec else None
+
+        self._file = None
+        self._entry = None
+        self._period = None
+        self._size = 0
+        self.rotations = 0
+
+    # ----- 세그먼트 -----
+
+    @property
+    def current_path(self) -> Optional[Path]:
+        return self.output_dir / self._entry['file'] if self._entry else None
+
+    def _period_key(self) -> Optional[str]:
+        return datetime.now().strftime(_PERIODS[self.interval]) if self.interval else None
+
+    def open(self):
+        """이전 실행에서 남은 세그먼트를 정리하고 첫 세그먼트를 엶"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if not self._owner.acquire():
+            print(f"[WARN] Another running writer owns {self.manifest_path.name}")
+        pending = self._recover_previous()
+        # 같은 초에 시작한 이전 실행과 stem이 같으면 그 manifest를 이어 써서 번호가 겹치지 않게 함
+        if self.manifest_path.exists():
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    self._segments = json.load(f).get('segments', [])
+            except Exception as e:
+                print(f"[WARN] Could not continue manifest {self.manifest_path}: {e}")
+        if self._compressor:
+            for path in pending:
+                self._compressor.submit(path)
+        self._open_segment()
+
+    def _open_segment(self):
+        index = max((entry['index'] for entry in self._segments), default=0) + 1
+        name = f"{self.stem}.{index:04d}{self.suffix}"
+        self._file = open(self.output_dir / (name + '.part'), 'ab')
+        self._size = 0
+        self._period = self._period_key()
+        self._entry = {
+            'file': name, 'index': index, 'state': 'open',
+            'opened': datetime.now().isoformat(), 'sealed': None,
+            'first_message': None, 'last_message': None,
+            'messages': 0, 'bytes': 0,
+        }
+        with self._manifest_lock:
+            self._segments.append(self._entry)
+            self._save_manifest()
+
+    def _seal(self):
+        """현재 세그먼트를 fsync 후 봉인 이름으로 rename하고 압축을 예약"""
+        if self._file is None:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        entry = self._entry
+        sealed_path = self.output_dir / entry['file']
+        os.replace(sealed_path.with_name(entry['file'] + '.part'), sealed_path)
+        with self._manifest_lock:
+            entry['state'] = 'sealed'
+            entry['sealed'] = datetime.now().isoformat()
+            entry['bytes'] = self._size
+            self._save_manifest()
+        if not entry['messages']:
+            # 빈 세그먼트는 남기지 않음
+            os.remove(sealed_path)
+            with self._manifest_lock:
+                self._segments.remove(entry)
+                self._save_manifest()
+        elif self._compressor:
+            self._compressor.submit(sealed_path)
+
+    def _on_compressed(self, path: Path, target: Path):
+        with self._manifest_lock:
+            for entry in self._segments:
+                if entry['file'] == path.name and entry['state'] == 'sealed':
+                    entry['state'] = 'compressed'
+                    entry['file'] = target.name
+                    entry['compressed_bytes'] = target.stat().st_size
+                    self._save_manifest()
+                    return
+        # 이전 실행의 세그먼트는 해당 manifest를 갱신
+        _update_manifest_entry(path, target)
+
+    def _save_manifest(self):
+        try:
+            _write_json_atomic(self.manifest_path, {
+                'stem': self.stem,
+                'compression': self.codec,
+                'segments': self._segments,
+            })
+        except Exception as e:
+            print(f"[ERROR] Manifest write error: {e}")
+
+    def _recover_previous(self):
+        """
+        비정상 종료로 남은 .part 세그먼트를 봉인하고, 압축되지 않은 세그먼트 목록을 반환
+        다른 실행이 잠금을 쥔 manifest(지금 기록 중인 출력)는 건드리지 않음
+        """
+        pending = []
+        for manifest_path in sorted(self.output_dir.glob("*" + _MANIFEST_SUFFIX)):
+            owner = None
+            if manifest_path != self.manifest_path:
+                owner = _OwnerLock(_lock_path(manifest_path))
+                if not owner.acquire():
+                    continue
+            try:
+                pending.extend(self._recover_manifest(manifest_path))
+            finally:
+                if owner:
+                    owner.release(remove=True)
+        return pending
+
+    def _recover_manifest(self, manifest_path: Path) -> List[Path]:
+        pending = []
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Skipping unreadable manifest {manifest_path}: {e}")
+            return pending
+        changed = False
+        for entry in manifest.get('segments', []):
+            path = self.output_dir / entry['file']
+            if entry['state'] == 'open':
+                part_path = path.with_name(entry['file'] + '.part')
+                if not part_path.exists():
+                    continue
+                os.replace(part_path, path)
+                entry['state'] = 'sealed'
+                entry['bytes'] = path.stat().st_size
+                changed = True
+                print(f"[INFO] Sealed segment left open by a previous run: {path.name}")
+            if entry['state'] == 'sealed' and path.exists():
+                pending.append(path)
+        if changed:
+            _write_json_atomic(manifest_path, manifest)
+        return pending
+
+    # ----- 쓰기 -----
+
+    def write(self, text, first: datetime = None, last: datetime = None, count: int = 1):
+        """텍스트(또는 binary 형식의 bytes)를 현재 세그먼트에 기록 (필요하면 먼저 회전)"""
+        data = text if isinstance(text, bytes) else text.encode(self.encoding)
+        if self._size and (
+            (self.max_bytes and self._size + len(data) > self.max_bytes)
+            or (self.interval and self._period_key() != self._period)
+        ):
+            self.rotate()
+        self._file.write(data)
+        self._size += len(data)
+        entry = self._entry
+        entry['messages'] += count
+        entry['bytes'] = self._size
+        if first is not None and entry['first_message'] is None:
+            entry['first_message'] = first.isoformat()
+        if last is not None:
+            entry['last_message'] = last.isoformat()
+
+    def rotate(self):
+        self._seal()
+        self._open_segment()
+        self.rotations += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self, compress_timeout: float = 60.0):
+        """마지막 세그먼트를 봉인하고 압축이 끝날 때까지 대기"""
+        self._seal()
+        self._entry = None
+        if self._compressor:
+            self._compressor.close(compress_timeout)
+        with self._manifest_lock:
+            self._save_manifest()
+        self._owner.release(remove=True)
+
+    def stats(self) -> dict:
+        return {
+            'segments': len(self._segments),
+            'rotations': self.rotations,
+            'compressed': self._compressor.compressed if self._compressor else 0,
+            'bytes_in': self._compressor.bytes_in if self._compressor else 0,
+            'bytes_out': self._compressor.bytes_out if self._compressor else 0,
+        }
+
+
+def _update_manifest_entry(path: Path, target: Path):
+    """이전 실행의 manifest에서 압축된 세그먼트 항목을 갱신"""
+    for manifest_path in path.parent.glob("*" + _MANIFEST_SUFFIX):
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            for entry in manifest.get('segments', []):
+                if entry['file'] == path.name and entry['state'] == 'sealed':
+                    entry['state'] = 'compressed'
+                    entry['file'] = target.name
+                    entry['compressed_bytes'] = target.stat().st_size
+                    _write_json_atomic(manifest_path, manifest)
+                    return
+        except Exception as e:
+            print(f"[WARN] Manifest update error ({manifest_path}): {e}")
+
+
+def create_rotating_output(config: dict, output_file: Path) -> Optional[RotatingOutput]:
+    """output.rotation 설정으로 회전 출력 생성 (비활성화 시 None)"""
+    output_config = config['output']
+    rotation = output_config.get('rotation', {})
+    if not rotation.get('enabled', False):
+        return None
+    output_file = Path(output_file)
+    return RotatingOutput(
+        output_file.parent,
+        output_file.stem,
+        output_file.suffix,
+        encoding=output_config['encoding'],
+        max_bytes=int(rotation.get('max_mb', 0) * 1024 * 1024),
+        interval=rotation.get('interval'),
+        compression=rotation.get('compression', 'auto'),
+    )
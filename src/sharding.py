@@ -0,0 +1,165 @@
+"""
+대화방별 출력 파일 분리 (sharding)
+방(또는 방 그룹)마다 파일을 따로 두고, 열린 파일 핸들 수는 LRU로 제한
+
+파일명: output.filename_format에 {room}이 있으면 그대로 사용,
+        없으면 확장자 앞에 방 이름을 붙임 (kbond_messages_{timestamp}.채권데스크.txt)
+"""
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .record_format import create_formatter
+
+_UNSAFE = re.compile(r'[\x00-\x1f<>:"/\\|?*]+')
+_MAX_NAME = 80
+
+
+def room_slug(room: str, unique: bool = False) -> str:
+    """
+    방 이름을 파일명에 쓸 수 있게 변환
+    바꾸거나 자른 이름(또는 unique=True)에는 원래 이름의 짧은 해시를 붙여 다른 방과 겹치지 않게 함
+    ("a/b"와 "a:b"는 둘 다 "a_b"가 되므로 "a_b-a7e86136"처럼 구분)
+    """
+    slug = _UNSAFE.sub('_', room).strip(' ._')
+    if slug == room and len(slug) <= _MAX_NAME and slug and not unique:
+        return slug
+    digest = hashlib.md5(room.encode('utf-8')).hexdigest()[:8]
+    return f"{slug[:_MAX_NAME - len(digest) - 1] or 'unknown'}-{digest}"
+
+
+class ShardedOutput:
+    """방별 출력 파일 (쓰기 스레드 전용), 최대 max_open개의 핸들만 열어 둠"""
+
+    def __init__(self, output_dir: Path, filename_format: str, timestamp: str, encoding: str = 'utf-8',
+                 max_open: int = 64, groups: Dict[str, List[str]] = None, sync_on_close: bool = False,
+                 binary: bool = False):
+        """
+        Args:
+            output_dir: 출력 디렉토리
+            filename_format: output.filename_format ({timestamp}, 선택적으로 {room})
+            timestamp: 실행 시작 시각 문자열
+            max_open: 동시에 열어 둘 파일 핸들 수
+            groups: 그룹 이름 -> 방 제목에 포함되는 키워드 목록 (해당 방들은 한 파일에 기록)
+            sync_on_close: 핸들을 닫을 때 fsync (durability가 flush가 아닐 때)
+            binary: bytes로 기록 (output.format이 binary일 때)
+        """
+        self.output_dir = Path(output_dir)
+        self.filename_format = filename_format
+        self.timestamp = timestamp
+        self.encoding = encoding
+        self.max_open = max(1, max_open)
+        self.groups = groups or {}
+        self.sync_on_close = sync_on_close
+        self.binary = binary
+
+        self._handles: "OrderedDict[Path, object]" = OrderedDict()
+        self._paths: Dict[str, Path] = {}  # 방 제목 -> 파일 경로
+        self._slugs: Dict[str, str] = {}  # 소문자 slug -> 방(그룹) 이름 (대소문자를 구분하지 않는 파일 시스템)
+        self._dirty = set()  # flush 이후 fsync되지 않은 경로
+
+        self.opens = 0
+        self.evictions = 0
+        self.messages: Dict[Path, int] = {}
+
+    def shard_name(self, room: str) -> str:
+        for group, keywords in self.groups.items():
+            if any(keyword in room for keyword in keywords):
+                return group
+        return room
+
+    def path_for(self, room: str) -> Path:
+        path = self._paths.get(room)
+        if path is None:
+            name = self.shard_name(room)
+            slug = room_slug(name)
+            if self._slugs.setdefault(slug.lower(), name) != name:
+                # "Desk"와 "desk"처럼 대소문자만 다른 방은 Windows에서 같은 파일이 됨
+                slug = room_slug(name, unique=True)
+            if '{room}' in self.filename_format:
+                filename = self.filename_format.format(timestamp=self.timestamp, room=slug)
+            else:
+                base = Path(self.filename_format.format(timestamp=self.timestamp))
+                filename = f"{base.stem}.{slug}{base.suffix}"
+            path = self._paths[room] = self.output_dir / filename
+        return path
+
+    def _handle(self, path: Path):
+        f = self._handles.get(path)
+        if f is not None:
+            self._handles.move_to_end(path)
+            return f
+        while len(self._handles) >= self.max_open:
+            old_path, old = self._handles.popitem(last=False)
+            self._close(old_path, old)
+            self.evictions += 1
+        if self.binary:
+            f = self._handles[path] = open(path, 'ab')
+        else:
+            f = self._handles[path] = open(path, 'a', encoding=self.encoding)
+        self.opens += 1
+        return f
+
+    def _close(self, path: Path, f):
+        try:
+            f.flush()
+            if self.sync_on_close and path in self._dirty:
+                os.fsync(f.fileno())
+        finally:
+            f.close()
+            self._dirty.discard(path)
+
+    def open(self):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(self, room: str, text, count: int = 1):
+        path = self.path_for(room)
+        self._handle(path).write(text)
+        self._dirty.add(path)
+        self.messages[path] = self.messages.get(path, 0) + count
+
+    def flush(self):
+        for f in self._handles.values():
+            f.flush()
+
+    def sync(self):
+        """열린 핸들 중 기록이 있는 파일만 fsync"""
+        for path, f in self._handles.items():
+            if path in self._dirty:
+                f.flush()
+                os.fsync(f.fileno())
+        self._dirty.clear()
+
+    def close(self):
+        while self._handles:
+            path, f = self._handles.popitem(last=False)
+            self._close(path, f)
+
+    def stats(self) -> dict:
+        return {
+            'shards': len(self.messages),
+            'open': len(self._handles),
+            'opens': self.opens,
+            'evictions': self.evictions,
+        }
+
+
+def create_sharded_output(config: dict, timestamp: str) -> Optional[ShardedOutput]:
+    """output.sharding 설정으로 방별 출력 생성 (비활성화 시 None)"""
+    output_config = config['output']
+    sharding = output_config.get('sharding', {})
+    if not sharding.get('enabled', False):
+        return None
+    return ShardedOutput(
+        Path(output_config['directory']),
+        output_config['filename_format'],
+        timestamp,
+        encoding=output_config['encoding'],
+        max_open=sharding.get('max_open_files', 64),
+        groups=sharding.get('groups', {}),
+        sync_on_close=output_config.get('durability', 'flush') != 'flush',
+        binary=create_formatter(config).binary,
+    )
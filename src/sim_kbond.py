@@ -0,0 +1,390 @@
+"""
+프로세스 내 KBond 시뮬레이터 (WindowBackend 구현)
+대화방 창 트리, 늘어나는 대화 내역, 응답 지연, 응답 없음(hung) 창을 흉내 내어
+Windows 없이 캡처 경로를 실행하고 프로파일링/벤치마크할 수 있게 함
+"""
+import itertools
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .window_backend import (
+    WindowBackend, WM_GETTEXTLENGTH, EM_GETSEL, ES_READONLY,
+    EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY, EVENT_OBJECT_SHOW, EVENT_OBJECT_HIDE,
+    EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_VALUECHANGE, OBJID_WINDOW, CHILDID_SELF
+)
+
+CHAT_CLASS = "TfrmDccChat"
+HISTORY_CLASS = "RichEdit20W"
+WS_VISIBLE = 0x10000000
+
+
+class _SimWindow:
+    __slots__ = ('hwnd', 'cls', 'title', 'parent', 'style', 'visible', 'text', 'room')
+
+    def __init__(self, hwnd, cls, title="", parent=0, style=WS_VISIBLE, room=0):
+        self.hwnd = hwnd
+        self.cls = cls
+        self.title = title
+        self.parent = parent
+        self.style = style
+        self.visible = True
+        self.text = ""  # RichEdit 내부 형식: 문단 구분은 '\r' 한 글자
+        self.room = room
+
+
+class _SimRoom:
+    __slots__ = ('hwnd', 'history', 'input', 'windows', 'latency', 'hung')
+
+    def __init__(self, hwnd, history, input_hwnd, windows, latency):
+        self.hwnd = hwnd
+        self.history = history
+        self.input = input_hwnd
+        self.windows = windows
+        self.latency = latency
+        self.hung = False
+
+
+class SimEventHook:
+    """WinEventHookThread와 같은 인터페이스 - 시뮬레이터가 이벤트를 직접 전달"""
+
+    def __init__(self, sim: 'SimulatedKBond', handler: Callable[[int, int, int, int], None]):
+        self.sim = sim
+        self.handler = handler
+        self._ranges: List[Tuple[int, int]] = []
+        self.installed = False
+
+    def add_range(self, event_min: int, event_max: int = None):
+        self._ranges.append((event_min, event_max if event_max is not None else event_min))
+
+    def wants(self, event: int) -> bool:
+        return any(lo <= event <= hi for lo, hi in self._ranges)
+
+    def start(self, timeout: float = 2.0) -> bool:
+        self.sim._add_hook(self)
+        self.installed = bool(self._ranges)
+        return self.installed
+
+    def stop(self):
+        self.sim._remove_hook(self)
+        self.installed = False
+
+
+class SimulatedKBond(WindowBackend):
+    """
+    KBond 채팅창(TfrmDccChat) 아래에 대화 내역(읽기 전용 RichEdit)과 입력창을 가진 방을 흉내 냄
+
+    - WM_GETTEXTLENGTH/WM_GETTEXT는 문단 구분을 CRLF로 세고, RichEdit 문자 위치는 한 글자로 셈
+    - 읽기마다 방의 latency만큼 지연되며, timeout_ms보다 길면 시간 초과로 실패
+    - hung 상태의 방은 SMTO_ABORTIFHUNG처럼 즉시 실패
+    - 창 생성/소멸/제목 변경/내용 변경 시 등록된 훅으로 WinEvent를 전달
+    """
+
+    name = "simulated"
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency: 방별 기본 응답 지연 (초)
+        """
+        self.latency = latency
+        self._lock = threading.RLock()
+        self._windows: Dict[int, _SimWindow] = {}
+        self._rooms: Dict[int, _SimRoom] = {}
+        self._hwnds = itertools.count(0x10010, 4)
+        self._hooks: List[SimEventHook] = []
+        self.stats = {'reads': 0, 'range_reads': 0, 'timeouts': 0, 'chars_read': 0}
+
+    # ----- 시뮬레이션 조작 -----
+
+    def _new_window(self, cls, title="", parent=0, style=WS_VISIBLE, room=0) -> _SimWindow:
+        window = _SimWindow(next(self._hwnds), cls, title, parent, style, room)
+        self._windows[window.hwnd] = window
+        return window
+
+    def open_room(self, title: str, history: str = "", latency: float = None) -> int:
+        """대화방 창을 열고 hwnd 반환 (history는 기존 대화 내역, 실제 창처럼 마지막 줄도 문단 끝으로 닫음)"""
+        with self._lock:
+            chat = self._new_window(CHAT_CLASS, title)
+            panel = self._new_window("TPanel", parent=chat.hwnd, room=chat.hwnd)
+            chat.room = chat.hwnd
+            history_ctrl = self._new_window(HISTORY_CLASS, parent=panel.hwnd,
+                                            style=WS_VISIBLE | ES_READONLY, room=chat.hwnd)
+            input_ctrl = self._new_window(HISTORY_CLASS, parent=panel.hwnd, room=chat.hwnd)
+            history_ctrl.text = self._internal(history)
+            if history_ctrl.text and not history_ctrl.text.endswith("\r"):
+                history_ctrl.text += "\r"
+            windows = [chat.hwnd, panel.hwnd, history_ctrl.hwnd, input_ctrl.hwnd]
+            self._rooms[chat.hwnd] = _SimRoom(chat.hwnd, history_ctrl.hwnd, input_ctrl.hwnd, windows,
+                                              self.latency if latency is None else latency)
+        for hwnd in windows:
+            self._post(EVENT_OBJECT_CREATE, hwnd)
+        for hwnd in windows:
+            self._post(EVENT_OBJECT_SHOW, hwnd)
+        return chat.hwnd
+
+    def close_room(self, hwnd: int):
+        with self._lock:
+            room = self._rooms.pop(hwnd, None)
+            if room is None:
+                return
+            for child in room.windows:
+                self._windows.pop(child, None)
+        for child in reversed(room.windows):
+            self._post(EVENT_OBJECT_DESTROY, child)
+
+    def hide_room(self, hwnd: int, hidden: bool = True):
+        with self._lock:
+            self._windows[hwnd].visible = not hidden
+        self._post(EVENT_OBJECT_HIDE if hidden else EVENT_OBJECT_SHOW, hwnd)
+
+    def rename_room(self, hwnd: int, title: str):
+        with self._lock:
+            self._windows[hwnd].title = title
+        self._post(EVENT_OBJECT_NAMECHANGE, hwnd)
+
+    def rooms(self) -> List[int]:
+        with self._lock:
+            return list(self._rooms)
+
+    def history_control(self, hwnd: int) -> int:
+        return self._rooms[hwnd].history
+
+    def append(self, hwnd: int, text: str):
+        """대화 내역 끝에 텍스트 추가 (여러 줄 가능, 줄 끝은 자동으로 붙음)"""
+        with self._lock:
+            room = self._rooms.get(hwnd)
+            if room is None:
+                return
+            ctrl = self._windows[room.history]
+            ctrl.text += self._internal(text.rstrip("\r\n")) + "\r"
+        self._post(EVENT_OBJECT_VALUECHANGE, room.history)
+
+    def clear(self, hwnd: int, text: str = ""):
+        """대화 내역을 지우거나 text로 바꿈 (내역 재작성 상황)"""
+        with self._lock:
+            room = self._rooms[hwnd]
+            self._windows[room.history].text = self._internal(text)
+        self._post(EVENT_OBJECT_VALUECHANGE, room.history)
+
+    def set_hung(self, hwnd: int, hung: bool = True):
+        with self._lock:
+            self._rooms[hwnd].hung = hung
+
+    def set_latency(self, hwnd: int, latency: float):
+        with self._lock:
+            self._rooms[hwnd].latency = latency
+
+    def transcript(self, hwnd: int) -> str:
+        """WM_GETTEXT가 돌려줄 대화 내역 전체 (CRLF)"""
+        with self._lock:
+            return self._external(self._windows[self._rooms[hwnd].history].text)
+
+    @staticmethod
+    def _internal(text: str) -> str:
+        return text.replace("\r\n", "\r").replace("\n", "\r")
+
+    @staticmethod
+    def _external(text: str) -> str:
+        return text.replace("\r", "\r\n")
+
+    # ----- 이벤트 -----
+
+    def _add_hook(self, hook: SimEventHook):
+        with self._lock:
+            if hook not in self._hooks:
+                self._hooks.append(hook)
+
+    def _remove_hook(self, hook: SimEventHook):
+        with self._lock:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+    def _post(self, event: int, hwnd: int):
+        # 실제 WinEvent처럼 창 상태를 바꾼 뒤, 잠금 밖에서 전달
+        with self._lock:
+            hooks = [hook for hook in self._hooks if hook.wants(event)]
+        for hook in hooks:
+            try:
+                hook.handler(event, hwnd, OBJID_WINDOW, CHILDID_SELF)
+            except Exception:
+                pass
+
+    def event_hook(self, handler):
+        return SimEventHook(self, handler)
+
+    # ----- WindowBackend -----
+
+    def _window(self, hwnd: int) -> Optional[_SimWindow]:
+        return self._windows.get(hwnd)
+
+    def _wait(self, hwnd: int, timeout_ms: int) -> Optional[_SimWindow]:
+        """읽기 지연을 흉내 냄. 응답하지 못하면 None"""
+        with self._lock:
+            window = self._windows.get(hwnd)
+            room = self._rooms.get(window.room) if window else None
+            if window is None:
+                return None
+            hung, latency = (room.hung, room.latency) if room else (False, 0.0)
+        if hung:
+            self.stats['timeouts'] += 1
+            return None
+        if latency * 1000 > timeout_ms:
+            time.sleep(timeout_ms / 1000)
+            self.stats['timeouts'] += 1
+            return None
+        if latency > 0:
+            time.sleep(latency)
+        return window
+
+    def top_level_windows(self) -> List[int]:
+        with self._lock:
+            return [hwnd for hwnd, window in self._windows.items() if not window.parent]
+
+    def child_windows(self, hwnd: int) -> List[int]:
+        with self._lock:
+            room = self._rooms.get(hwnd)
+            if room is not None:
+                return room.windows[1:]
+            return [h for h, window in self._windows.items() if window.parent == hwnd]
+
+    def is_window(self, hwnd: int) -> bool:
+        return hwnd in self._windows
+
+    def is_visible(self, hwnd: int) -> bool:
+        window = self._window(hwnd)
+        return bool(window and window.visible)
+
+    def is_enabled(self, hwnd: int) -> bool:
+        return self.is_window(hwnd)
+
+    def class_name(self, hwnd: int) -> str:
+        window = self._window(hwnd)
+        return window.cls if window else ""
+
+    def window_text(self, hwnd: int) -> str:
+        window = self._window(hwnd)
+        return window.title if window else ""
+
+    def style(self, hwnd: int) -> int:
+        window = self._window(hwnd)
+        return window.style if window else 0
+
+    def parent(self, hwnd: int) -> int:
+        window = self._window(hwnd)
+        return window.parent if window else 0
+
+    def root(self, hwnd: int) -> int:
+        window = self._window(hwnd)
+        return window.room if window and window.room else hwnd
+
+    def is_hung(self, hwnd: int) -> bool:
+        with self._lock:
+            window = self._windows.get(hwnd)
+            room = self._rooms.get(window.room) if window else None
+            return bool(room and room.hung)
+
+    def window_from_point(self, x: int, y: int) -> Optional[int]:
+        return None
+
+    def send_message(self, hwnd: int, msg: int, wparam, lparam, timeout_ms: int = 100) -> int:
+        if msg == WM_GETTEXTLENGTH:
+            return self.text_length(hwnd, timeout_ms)
+        if msg == EM_GETSEL:
+            self._wait(hwnd, timeout_ms)  # 선택 영역은 항상 비어 있음
+        return 0
+
+    def text_length(self, hwnd: int, timeout_ms: int) -> int:
+        window = self._wait(hwnd, timeout_ms)
+        if window is None:
+            return 0
+        text = window.text
+        return len(text) + text.count("\r")
+
+    def get_text(self, hwnd: int, length: int, timeout_ms: int) -> Optional[str]:
+        if length <= 0:
+            return ""
+        window = self._wait(hwnd, timeout_ms)
+        if window is None:
+            return None
+        text = self._external(window.text)[:length]
+        self.stats['reads'] += 1
+        self.stats['chars_read'] += len(text)
+        return text
+
+    def get_text_range(self, hwnd: int, start: int, end: int, timeout_ms: int) -> Optional[str]:
+        if end <= start:
+            return ""
+        window = self._wait(hwnd, timeout_ms)
+        if window is None:
+            return None
+        part = window.text[start:end]
+        if not part:
+            return None
+        self.stats['range_reads'] += 1
+        self.stats['chars_read'] += len(part)
+        return part  # RichEdit처럼 문단 끝은 CR 하나 (WM_GETTEXT만 CRLF)
+
+    def get_selection(self, hwnd: int, timeout_ms: int) -> Tuple[int, int]:
+        return 0, 0
+
+
+class SimTraffic:
+    """
+    시뮬레이터 방에 일정 속도로 메시지를 넣는 백그라운드 스레드
+    메시지는 '발신자 (HH:MM:SS) 본문' 헤더 형식이며 일부는 여러 줄로 만듦
+    """
+
+    def __init__(self, sim: SimulatedKBond, rate: float = 50.0, multiline_ratio: float = 0.1,
+                 senders: List[str] = None, seed: int = None):
+        """
+        Args:
+            sim: 대상 시뮬레이터
+            rate: 초당 메시지 수 (전체 방 합계)
+            multiline_ratio: 여러 줄 메시지 비율
+            senders: 발신자 이름 목록
+        """
+        self.sim = sim
+        self.rate = rate
+        self.multiline_ratio = multiline_ratio
+        self.senders = senders or ["홍길동", "김철수", "이영희", "박민수"]
+        self.random = random.Random(seed)
+        self.sent: Dict[str, float] = {}  # 메시지 id(msg-00000001) -> 넣은 시각
+        self.count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def send_one(self, hwnd: int = None) -> str:
+        """메시지 하나를 넣고 id 반환"""
+        rooms = self.sim.rooms()
+        if not rooms:
+            return ""
+        hwnd = hwnd or self.random.choice(rooms)
+        self.count += 1
+        msg_id = f"msg-{self.count:08d}"
+        lines = [f"{self.random.choice(self.senders)} ({datetime.now():%H:%M:%S}) {msg_id} 채권 호가 {self.random.randint(1, 999)}"]
+        if self.random.random() < self.multiline_ratio:
+            lines.append(f"  추가 내용 {self.count}")
+        self.sent[msg_id] = time.time()
+        self.sim.append(hwnd, "\r\n".join(lines))
+        return msg_id
+
+    def _run(self):
+        interval = 1.0 / self.rate
+        next_send = time.time()
+        while not self._stop.is_set():
+            self.send_one()
+            next_send += interval
+            self._stop.wait(max(0.0, next_send - time.time()))
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
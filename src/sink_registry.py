@@ -0,0 +1,330 @@
+"""
+출력 sink 레지스트리 (fan-out)
+config.json의 sinks 목록마다 별도의 큐와 쓰기 스레드를 두어, 느리거나 멈춘 sink가
+다른 sink나 캡처 스레드를 막지 않게 함
+
+sink 설정:
+    name, type (file / sqlite / tcp)
+    queue_size, overflow_policy (block/spill/drop, 기본 spill), batch_size
+    max_retries, retry_backoff_ms, on_failure (drop: 재시도 후 배치를 버림, retry: 성공할 때까지 재시도)
+    output: 이 sink에만 적용할 output 설정 (format, directory 등)
+    host, port (tcp)
+"""
+import copy
+import queue
+import socket
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from .record_format import JsonlFormat, create_formatter, with_format_extension
+from .sqlite_sink import SQLiteMessageWriter
+from .write_queue import BackpressureQueue
+from .spool import create_spool
+from .span_tracer import span
+
+SINK_TYPES: Dict[str, Callable] = {}
+
+
+def register_sink_type(name: str):
+    """sink 종류 등록 (factory(sink_config, config) -> open_sink/write_batch/close_sink를 가진 객체)"""
+    def decorator(factory):
+        SINK_TYPES[name] = factory
+        return factory
+    return decorator
+
+
+def _sink_output_config(sink_config: dict, config: dict) -> dict:
+    """sink별 output 설정을 합친 config (sink는 자체 큐/스풀을 쓰지 않으므로 꺼 둠)"""
+    merged = copy.deepcopy(config)
+    merged['output'].update(sink_config.get('output', {}))
+    merged['output']['spool'] = {'enabled': False}
+    merged['output']['overflow_policy'] = 'block'
+    return merged
+
+
+@register_sink_type('file')
+def _file_sink(sink_config: dict, config: dict):
+    from .message_writer import GroupCommitWriter
+    merged = _sink_output_config(sink_config, config)
+    output = merged['output']
+    output['filename_format'] = with_format_extension(output['filename_format'], create_formatter(merged))
+    return GroupCommitWriter(merged)
+
+
+@register_sink_type('sqlite')
+def _sqlite_sink(sink_config: dict, config: dict):
+    return SQLiteMessageWriter(_sink_output_config(sink_config, config))
+
+
+@register_sink_type('tcp')
+class TcpSink:
+    """JSON Lines 레코드를 TCP로 전송 (끊기면 다음 배치에서 다시 연결)"""
+
+    def __init__(self, sink_config: dict, config: dict):
+        self.host = sink_config.get('host', '127.0.0.1')
+        self.port = sink_config['port']
+        self.timeout = sink_config.get('timeout_ms', 1000) / 1000
+        self.formatter = JsonlFormat()
+        self._sock = None
+
+    def open_sink(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+
+    def write_batch(self, messages: List[dict]):
+        if self._sock is None:
+            self.open_sink()
+        data = "".join(self.formatter.encode(message) for message in messages).encode('utf-8')
+        try:
+            self._sock.sendall(data)
+        except OSError:
+            self.close_sink()
+            raise
+
+    def close_sink(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+class SinkWorker:
+    """sink 하나의 큐 + 쓰기 스레드 + 재시도 정책 + 지연 통계"""
+
+    def __init__(self, name: str, sink, sink_config: dict, config: dict, on_done: Callable = None):
+        """
+        Args:
+            name: sink 이름
+            sink: open_sink / write_batch / close_sink를 가진 객체
+            sink_config: sinks 항목
+            on_done: 메시지 처리가 끝나면(기록 또는 버림) 스풀 seq로 호출
+        """
+        self.name = name
+        self.sink = sink
+        self.batch_size = sink_config.get('batch_size', config['output'].get('max_batch', 1024))
+        self.max_retries = sink_config.get('max_retries', 3)
+        self.retry_backoff = sink_config.get('retry_backoff_ms', 200) / 1000
+        self.max_backoff = sink_config.get('max_backoff_ms', 5000) / 1000
+        self.on_failure = sink_config.get('on_failure', 'drop')
+        self.on_done = on_done
+
+        output_dir = Path(config['output']['directory'])
+        self.message_queue = BackpressureQueue(
+            maxsize=sink_config.get('queue_size', config['performance']['buffer_size']),
+            policy=sink_config.get('overflow_policy', 'spill'),
+            block_timeout=sink_config.get('block_timeout_ms', 0) / 1000,
+            spill_path=output_dir / f"sink_{name}.overflow",
+            drop_watermark=sink_config.get('drop_watermark', 1.0),
+        )
+        self.is_running = False
+        self.thread = None
+
+        # 통계
+        self.delivered = 0
+        self.failed_batches = 0
+        self.dropped = 0
+        self.retries = 0
+        self.last_success = None
+        self.last_error = None
+        self._failing = False  # 실패가 이어지는 동안 로그를 한 번만 남김
+        self._inflight_since = None  # 처리 중인 배치의 가장 오래된 메시지가 큐에 들어간 시각
+        self.latencies = deque(maxlen=1000)
+
+    def put(self, message: dict, enqueued: float, seq: int):
+        if not self.message_queue.put((message, enqueued, seq), message.get('window', '')):
+            self.dropped += 1
+            if self.on_done:
+                self.on_done(seq)
+
+    def _deliver(self, batch: List) -> bool:
+        """재시도 정책에 따라 배치 기록. 기록했으면 True, 버렸으면 False"""
+        messages = [message for message, _, _ in batch]
+        attempt = 0
+        backoff = self.retry_backoff
+        while True:
+            try:
+                with span('write_batch', 'sink', sink=self.name, messages=len(messages), attempt=attempt):
+                    self.sink.write_batch(messages)
+                if self._failing:
+                    print(f"[INFO] Sink '{self.name}' recovered")
+                    self._failing = False
+                return True
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                attempt += 1
+                if not self._failing:
+                    policy = "retrying" if self.on_failure == 'retry' else f"dropping after {self.max_retries} retries"
+                    print(f"[WARN] Sink '{self.name}' write failed ({policy}): {self.last_error}")
+                    self._failing = True
+                if self.on_failure != 'retry' and attempt > self.max_retries:
+                    return False
+                if not self.is_running and self.on_failure == 'retry':
+                    return False  # 종료 중: 스풀에 남겨 다음 시작 때 다시 보냄
+                self.retries += 1
+                time.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def _run(self):
+        try:
+            self.sink.open_sink()
+        except Exception as e:
+            # 연결형 sink는 write_batch에서 다시 연결
+            self.last_error = f"{type(e).__name__}: {e}"
+            print(f"[WARN] Sink '{self.name}' failed to open: {self.last_error}")
+            self._failing = True
+        while self.is_running:
+            try:
+                batch = [self.message_queue.get(timeout=0.1)]
+            except queue.Empty:
+                idle = getattr(self.sink, 'idle_sink', None)
+                if idle:
+                    idle()
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.message_queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._inflight_since = batch[0][1]
+            delivered = self._deliver(batch)
+            now = time.time()
+            self._inflight_since = None
+            if delivered:
+                self.delivered += len(batch)
+                self.last_success = now
+                for _, enqueued, _ in batch:
+                    self.latencies.append(now - enqueued)
+            else:
+                self.failed_batches += 1
+                if self.on_failure == 'retry':
+                    # 종료 중에 포기한 배치는 ack하지 않음
+                    for _ in batch:
+                        self.message_queue.task_done()
+                    continue
+                self.dropped += len(batch)
+            for _, _, seq in batch:
+                if self.on_done:
+                    self.on_done(seq)
+                self.message_queue.task_done()
+        try:
+            self.sink.close_sink()
+        except Exception as e:
+            print(f"[ERROR] Sink '{self.name}' close error: {e}")
+
+    def start(self):
+        self.is_running = True
+        self.thread = threading.Thread(target=self._run, name=f"sink-{self.name}", daemon=True)
+        self.thread.start()
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        inflight = self._inflight_since
+        return {
+            'queued': self.message_queue.unfinished(),
+            'lag_seconds': time.time() - inflight if inflight else 0.0,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'failed_batches': self.failed_batches,
+            'retries': self.retries,
+            'latency_p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+            'latency_p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+            if latencies else 0.0,
+            'last_success': self.last_success,
+            'last_error': self.last_error,
+        }
+
+
+class FanOutWriter:
+    """
+    sinks 설정의 모든 sink로 메시지를 보내는 writer (기존 writer와 같은 인터페이스)
+    스풀이 켜져 있으면 메시지를 한 번만 기록하고, 모든 sink가 처리한 뒤 ack
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.drain_timeout = config['output'].get('drain_timeout', 10.0)
+        self.spool = create_spool(config, Path(config['output']['directory']))
+        self._remaining: Dict[int, int] = {}  # 스풀 seq -> 아직 처리하지 않은 sink 수
+        self._remaining_lock = threading.Lock()
+        self.workers: List[SinkWorker] = []
+        for i, sink_config in enumerate(config['sinks']):
+            if not sink_config.get('enabled', True):
+                continue
+            name = sink_config.get('name') or f"{sink_config['type']}{i}"
+            factory = SINK_TYPES.get(sink_config['type'])
+            if factory is None:
+                print(f"[WARN] Unknown sink type '{sink_config['type']}' for sink '{name}', skipped")
+                continue
+            sink = factory(sink_config, config)
+            self.workers.append(SinkWorker(name, sink, sink_config, config, on_done=self._sink_done))
+        print(f"[INFO] Sinks: {', '.join(worker.name for worker in self.workers)}")
+
+    def _sink_done(self, seq: int):
+        if not self.spool:
+            return
+        with self._remaining_lock:
+            left = self._remaining.get(seq, 1) - 1
+            if left > 0:
+                self._remaining[seq] = left
+                return
+            self._remaining.pop(seq, None)
+        self.spool.ack(seq)
+
+    def _dispatch(self, message: dict, seq: int):
+        if self.spool:
+            with self._remaining_lock:
+                self._remaining[seq] = len(self.workers)
+        enqueued = time.time()
+        for worker in self.workers:
+            worker.put(message, enqueued, seq)
+
+    def write_message(self, message: dict):
+        # 같은 메시지를 여러 sink가 기록하므로 단계별 지연은 sink별 통계(get_statistics)로 봄
+        message.pop('trace', None)
+        seq = self.spool.append(message) if self.spool else 0
+        self._dispatch(message, seq)
+
+    def start(self):
+        replay = []
+        if self.spool:
+            replay = self.spool.recover()
+            self.spool.start()
+        for worker in self.workers:
+            worker.start()
+        for seq, message in replay:
+            self._dispatch(message, seq)
+        print("[INFO] Fan-out writer started")
+
+    def stop(self):
+        print("[INFO] Saving remaining messages...")
+        # sink마다 따로 기다리되 전체 대기 시간은 drain_timeout으로 제한
+        deadline = time.time() + self.drain_timeout
+        for worker in self.workers:
+            while not worker.message_queue.join(timeout=0.1):
+                if time.time() >= deadline or not worker.thread.is_alive():
+                    print(f"[WARN] Sink '{worker.name}' did not drain, {worker.message_queue.unfinished()} "
+                          f"messages {'kept in the spool' if self.spool else 'lost'}")
+                    break
+        for worker in self.workers:
+            worker.is_running = False
+        for worker in self.workers:
+            worker.thread.join(timeout=2)
+            worker.message_queue.close()
+        if self.spool:
+            self.spool.close()
+        self.print_summary()
+
+    def get_statistics(self) -> Dict[str, dict]:
+        """sink별 큐 길이, 지연, 처리/버림/재시도 수"""
+        return {worker.name: worker.stats() for worker in self.workers}
+
+    def print_summary(self):
+        for name, stats in self.get_statistics().items():
+            print(f"[INFO] Sink '{name}': delivered {stats['delivered']}, dropped {stats['dropped']}, "
+                  f"failed batches {stats['failed_batches']}, retries {stats['retries']}, "
+                  f"latency p50 {stats['latency_p50_ms']:.2f}ms / p99 {stats['latency_p99_ms']:.2f}ms")
+            if stats['last_error']:
+                print(f"[INFO]   last error: {stats['last_error']}")
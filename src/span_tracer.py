@@ -0,0 +1,256 @@
+"""
+구간(span) 추적기 - 링 버퍼에 기록하고 요청 시 Chrome trace-event JSON으로 내보냄
+내보낸 파일은 Perfetto(ui.perfetto.dev)나 chrome://tracing에서 스레드별 타임라인으로 열 수 있음
+
+    with span('read_room', 'capture', room=title):   # 끝날 때 (이름, 분류, 시작, 길이, 스레드, 인자) 한 건 기록
+        ...
+    instant('WM_RBUTTONDOWN', 'hook', x=x, y=y)      # 순간 이벤트
+
+꺼져 있으면 span()은 공유 빈 객체를 돌려주고 instant()/complete()는 바로 반환
+기록은 deque(maxlen) append 한 번이라 잠금이 없고, 가득 차면 가장 오래된 구간부터 버림
+
+내보내기: 시그널(Windows는 Ctrl+Break = SIGBREAK, 그 외 SIGUSR2), 전역 단축키(Windows), 종료 시(dump_on_exit)
+"""
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+_tracer: Optional["SpanTracer"] = None
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'args', 'start')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.cat, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+    def set(self, **args):
+        """구간이 끝나기 전에 알게 된 값을 인자로 추가"""
+        self.args.update(args)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class SpanTracer:
+    """스레드 안전 구간 링 버퍼 (perf_counter_ns 기준)"""
+
+    def __init__(self, capacity: int = 200000, directory: Path = Path("traces")):
+        """
+        Args:
+            capacity: 보관할 최대 이벤트 수
+            directory: 내보낸 JSON을 둘 폴더
+        """
+        self.capacity = capacity
+        self.directory = Path(directory)
+        self.events = deque(maxlen=capacity)  # (ph, 이름, 분류, 시작 ns, 끝 ns, 스레드 id, 인자)
+        self.thread_names = {}  # 스레드 id -> 이름 (끝난 작업 스레드도 이름을 남기기 위해 기록 시점에 저장)
+        self.origin_ns = time.perf_counter_ns()
+        self.origin_wall = time.time()
+        self._dump_lock = threading.Lock()
+
+    def _thread(self) -> int:
+        tid = threading.get_ident()
+        if tid not in self.thread_names:
+            self.thread_names[tid] = threading.current_thread().name
+        return tid
+
+    def record(self, name: str, cat: str, start_ns: int, end_ns: int, args: dict = None):
+        self.events.append(('X', name, cat, start_ns, end_ns, self._thread(), args))
+
+    def instant(self, name: str, cat: str, args: dict = None):
+        now = time.perf_counter_ns()
+        self.events.append(('i', name, cat, now, now, self._thread(), args))
+
+    def _snapshot(self):
+        # 다른 스레드가 append하는 중에 복사가 실패하면 다시 시도
+        for _ in range(10):
+            try:
+                return list(self.events)
+            except RuntimeError:
+                continue
+        return []
+
+    def trace_events(self) -> dict:
+        pid = os.getpid()
+        events = []
+        for tid, name in list(self.thread_names.items()):
+            events.append({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid, 'args': {'name': name}})
+        for ph, name, cat, start, end, tid, args in self._snapshot():
+            event = {'ph': ph, 'name': name, 'cat': cat, 'pid': pid, 'tid': tid,
+                     'ts': (start - self.origin_ns) / 1000}
+            if ph == 'X':
+                event['dur'] = (end - start) / 1000
+            else:
+                event['s'] = 't'
+            if args:
+                event['args'] = args
+            events.append(event)
+        return {
+            'traceEvents': events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'started': datetime.fromtimestamp(self.origin_wall).isoformat(),
+                          'capacity': self.capacity},
+        }
+
+    def dump(self, path: Path = None) -> Optional[Path]:
+        """버퍼 내용을 JSON 파일로 내보냄 (버퍼는 비우지 않음)"""
+        with self._dump_lock:
+            if path is None:
+                path = self.directory / f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+            path = Path(path)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                data = self.trace_events()
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, default=str)
+            except Exception as e:
+                print(f"[ERROR] Trace dump failed: {e}")
+                return None
+        print(f"[INFO] Trace saved ({len(data['traceEvents'])} events): {path}")
+        return path
+
+    def dump_async(self):
+        threading.Thread(target=self.dump, name="trace-dump", daemon=True).start()
+
+
+class _HotkeyListener:
+    """Windows 전역 단축키 (RegisterHotKey는 등록한 스레드의 메시지 큐로 WM_HOTKEY를 보냄)"""
+
+    WM_HOTKEY = 0x0312
+    MODIFIERS = {'alt': 0x0001, 'ctrl': 0x0002, 'shift': 0x0004, 'win': 0x0008}
+
+    def __init__(self, hotkey: str, callback):
+        self.hotkey = hotkey
+        self.callback = callback
+        self.thread = None
+
+    def _parse(self):
+        modifiers, vk = 0, None
+        for part in self.hotkey.lower().replace(' ', '').split('+'):
+            if part in self.MODIFIERS:
+                modifiers |= self.MODIFIERS[part]
+            elif len(part) == 1 and part.isalnum():
+                vk = ord(part.upper())
+            elif part.startswith('f') and part[1:].isdigit():
+                vk = 0x6F + int(part[1:])  # VK_F1 = 0x70
+        if vk is None:
+            raise ValueError(f"unsupported hotkey: {self.hotkey}")
+        return modifiers | 0x4000, vk  # MOD_NOREPEAT
+
+    def _run(self):
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        modifiers, vk = self._parse()
+        if not user32.RegisterHotKey(None, 1, modifiers, vk):
+            print(f"[WARN] Trace hotkey {self.hotkey} could not be registered (already in use?)")
+            return
+        msg = wintypes.MSG()
+        try:
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                if msg.message == self.WM_HOTKEY:
+                    self.callback()
+        finally:
+            user32.UnregisterHotKey(None, 1)
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="trace-hotkey", daemon=True)
+        self.thread.start()
+
+
+# ----- 전역 추적기 -----
+
+def enable_tracing(config: dict) -> Optional[SpanTracer]:
+    """
+    tracing 설정으로 추적기를 켜고 내보내기 트리거를 등록 (비활성화 시 None)
+    시그널 처리기는 메인 스레드에서만 등록할 수 있으므로 메인 스레드에서 호출
+    """
+    global _tracer
+    tracing_config = config.get('tracing', {})
+    if not tracing_config.get('enabled', False):
+        _tracer = None
+        return None
+    output_dir = config.get('output', {}).get('directory', "output")
+    _tracer = SpanTracer(
+        capacity=tracing_config.get('capacity', 200000),
+        directory=Path(tracing_config.get('directory') or Path(output_dir) / "traces"),
+    )
+
+    dump_signal = getattr(signal, 'SIGBREAK', None) or getattr(signal, 'SIGUSR2', None)
+    if tracing_config.get('signal', True) and dump_signal is not None:
+        try:
+            signal.signal(dump_signal, lambda signum, frame: _tracer and _tracer.dump_async())
+            print(f"[INFO] Tracing on: send {signal.Signals(dump_signal).name} to save a trace")
+        except ValueError:
+            pass  # 메인 스레드가 아님
+    hotkey = tracing_config.get('hotkey')
+    if hotkey and sys.platform == 'win32':
+        listener = _HotkeyListener(hotkey, _tracer.dump_async)
+        listener.start()
+        print(f"[INFO] Tracing on: press {hotkey} to save a trace")
+    return _tracer
+
+
+def tracer() -> Optional[SpanTracer]:
+    return _tracer
+
+
+def span(name: str, cat: str = "app", **args):
+    """with 문으로 쓰는 구간 (꺼져 있으면 아무것도 기록하지 않는 공유 객체)"""
+    t = _tracer
+    if t is None:
+        return _NULL_SPAN
+    return _Span(t, name, cat, args)
+
+
+def instant(name: str, cat: str = "app", **args):
+    t = _tracer
+    if t is not None:
+        t.instant(name, cat, args)
+
+
+def complete(name: str, cat: str, start_ns: int, end_ns: int = None, **args):
+    """다른 곳에서 시작 시각을 잰 구간 기록 (예: 보낸 뒤 다른 스레드에서 확인한 배치)"""
+    t = _tracer
+    if t is not None:
+        t.record(name, cat, start_ns, time.perf_counter_ns() if end_ns is None else end_ns, args)
+
+
+def dump_on_exit(config: dict):
+    """tracing.dump_on_exit이면 종료 시 버퍼를 내보냄"""
+    if _tracer is not None and config.get('tracing', {}).get('dump_on_exit', False):
+        _tracer.dump()
@@ -0,0 +1,344 @@
+"""
+쓰기 전 기록(write-ahead) 스풀
+큐에 넣기 전에 메시지를 체크섬이 붙은 레코드로 append-only 세그먼트에 기록하고,
+최종 출력 파일에 기록된 뒤 ack. 시작 시 ack되지 않은 메시지를 다시 내보냄 (at-least-once)
+
+레코드: type(1) + seq(8) + length(4) + crc32(4) + payload
+    type 'M': 메시지 (payload는 JSON), type 'A': 이 seq까지 모두 ack됨 (payload 없음)
+
+호출(캡처) 스레드는 seq를 받고 레코드를 메모리 버퍼에 넣기만 하며, 스풀 스레드가 버퍼를
+모아 write 한 번으로 세그먼트(OS 페이지 캐시)에 기록. 정전에 대비한 fsync는 같은 스레드가
+fsync_interval_ms마다 수행. 아직 버퍼에만 있던 메시지(보통 1ms 이내)는 프로세스가 죽으면 잃음
+"""
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import List, Tuple
+
+from .stage_latency import StageTrace
+
+_HEADER = struct.Struct('<cQII')
+_MESSAGE = b'M'
+_ACK = b'A'
+_MAX_RECORD = 16 * 1024 * 1024
+_O_BINARY = getattr(os, 'O_BINARY', 0)
+
+
+def _encode(message: dict) -> bytes:
+    def default(value):
+        if isinstance(value, datetime):
+            return {'__datetime__': value.isoformat()}
+        if isinstance(value, StageTrace):
+            return None  # 지연 측정용, 다시 내보낼 때는 쓰지 않음
+        return str(value)
+    return json.dumps(message, ensure_ascii=False, default=default).encode('utf-8')
+
+
+def _decode(payload: bytes) -> dict:
+    def hook(obj):
+        if len(obj) == 1 and '__datetime__' in obj:
+            return datetime.fromisoformat(obj['__datetime__'])
+        return obj
+    return json.loads(payload.decode('utf-8'), object_hook=hook)
+
+
+def _frame(kind: bytes, seq: int, payload: bytes = b"") -> bytes:
+    crc = zlib.crc32(payload, zlib.crc32(kind + struct.pack('<QI', seq, len(payload))))
+    return _HEADER.pack(kind, seq, len(payload), crc) + payload
+
+
+def _scan(data: bytes):
+    """유효한 레코드를 (type, seq, payload)로 순회. 잘린/깨진 레코드에서 멈춤"""
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        kind, seq, length, crc = _HEADER.unpack_from(data, pos)
+        end = pos + _HEADER.size + length
+        if kind not in (_MESSAGE, _ACK) or length > _MAX_RECORD or end > len(data):
+            return
+        payload = data[pos + _HEADER.size:end]
+        if zlib.crc32(payload, zlib.crc32(kind + struct.pack('<QI', seq, length))) != crc:
+            return
+        yield kind, seq, payload
+        pos = end
+
+
+class WriteAheadSpool:
+    def __init__(self, directory: Path, fsync_interval: float = 0.2,
+                 segment_bytes: int = 16 * 1024 * 1024, ack_interval: float = 0.05):
+        """
+        Args:
+            directory: 스풀 세그먼트 디렉토리
+            fsync_interval: fsync 주기 (초, 0이면 fsync하지 않음)
+            segment_bytes: 세그먼트를 새로 여는 크기
+            ack_interval: ack 레코드를 남기는 최소 간격 (초)
+        """
+        self.directory = Path(directory)
+        self.fsync_interval = fsync_interval
+        self.segment_bytes = segment_bytes
+        self.ack_interval = ack_interval
+
+        self._lock = threading.Lock()  # 세그먼트 fd
+        self._fd = None
+        self._segment = None
+        self._segment_size = 0
+        self._segment_index = 0
+        self._segments: List[Tuple[Path, int]] = []  # 닫힌 세그먼트 (경로, 최대 메시지 seq)
+        self._segment_max_seq = 0
+        self._dirty = False
+
+        self._buffer_lock = threading.Lock()  # seq와 아직 기록하지 않은 레코드 (호출 스레드는 이 잠금만 잡음)
+        self._buffer: List[bytes] = []
+        self._buffer_max_seq = 0
+        self._next_seq = 1
+        self._wake = threading.Event()
+
+        self._ack_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # flush_acks는 여러 sink 스레드에서 호출될 수 있음
+        self._acked = 0  # 이 seq까지 모두 ack됨
+        self._ack_pending = set()  # 순서를 건너뛰어 ack된 seq
+        self._ack_written = 0
+        self._last_ack_write = 0.0
+
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.appended = 0
+        self.replayed = 0
+
+    # ----- 시작 / 복구 -----
+
+    def _segment_path(self, index: int) -> Path:
+        return self.directory / f"spool-{index:06d}.wal"
+
+    def recover(self) -> List[Tuple[int, dict]]:
+        """기존 세그먼트를 읽어 ack되지 않은 (seq, 메시지) 목록을 반환하고 새 세그먼트를 엶"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        pending = {}
+        acked = 0
+        max_seq = 0
+        for path in sorted(self.directory.glob("spool-*.wal")):
+            try:
+                self._segment_index = max(self._segment_index, int(path.stem.split('-')[1]))
+                data = path.read_bytes()
+            except (OSError, ValueError) as e:
+                print(f"[WARN] Skipping unreadable spool segment {path}: {e}")
+                continue
+            segment_max = 0
+            for kind, seq, payload in _scan(data):
+                if kind == _ACK:
+                    acked = max(acked, seq)
+                    continue
+                max_seq = max(max_seq, seq)
+                segment_max = max(segment_max, seq)
+                try:
+                    pending[seq] = _decode(payload)
+                except Exception:
+                    continue
+            self._segments.append((path, segment_max))
+
+        replay = sorted((seq, msg) for seq, msg in pending.items() if seq > acked)
+        self._acked = self._ack_written = acked
+        self._next_seq = max(max_seq, acked) + 1
+        # 깨진 레코드로 빠진 seq는 ack된 것으로 보고 건너뜀 (ack 위치가 멈추지 않도록)
+        if replay:
+            first = replay[0][0]
+            self._acked = first - 1
+            self._ack_pending = set(range(first + 1, self._next_seq)) - {seq for seq, _ in replay}
+        else:
+            self._acked = self._next_seq - 1
+        self.replayed = len(replay)
+        self._open_segment()
+        # 새 세그먼트의 첫 ack 레코드가 디스크에 남은 뒤 이전 실행에서 모두 ack된 세그먼트를 지움
+        os.fsync(self._fd)
+        self._prune()
+        if replay:
+            print(f"[INFO] Spool: replaying {len(replay)} unacknowledged messages")
+        return replay
+
+    def _open_segment(self):
+        self._segment_index += 1
+        path = self._segment_path(self._segment_index)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | _O_BINARY, 0o644)
+        # 새 세그먼트만 남아도 ack 위치를 알 수 있도록 첫 레코드로 기록
+        record = _frame(_ACK, self._ack_written)
+        os.write(fd, record)
+        self._fd, self._segment, self._segment_size = fd, path, len(record)
+        self._segment_max_seq = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="spool", daemon=True)
+            self._thread.start()
+
+    # ----- 호출 스레드 -----
+
+    def append(self, message: dict) -> int:
+        """메시지를 버퍼에 넣고 seq 반환 (파일 I/O 없음, 스풀 스레드가 기록)"""
+        payload = _encode(message)
+        with self._buffer_lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._buffer.append(_frame(_MESSAGE, seq, payload))
+            self._buffer_max_seq = seq
+            self.appended += 1
+        self._wake.set()
+        return seq
+
+    # ----- 스풀 스레드 -----
+
+    def _drain_locked(self):
+        """버퍼의 레코드를 write 한 번으로 현재 세그먼트에 기록 (_lock을 잡고 호출)"""
+        with self._buffer_lock:
+            if not self._buffer:
+                return
+            records, self._buffer = self._buffer, []
+            max_seq = self._buffer_max_seq
+        data = b"".join(records)
+        os.write(self._fd, data)
+        self._segment_size += len(data)
+        self._segment_max_seq = max_seq
+        self._dirty = True
+
+    def drain(self):
+        with self._lock:
+            if self._fd is not None:
+                self._drain_locked()
+
+    def _run(self):
+        next_sync = time.time() + self.fsync_interval
+        while not self._stop.is_set():
+            timeout = max(0.0, next_sync - time.time()) if self.fsync_interval > 0 else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+            try:
+                self.drain()
+            except OSError as e:
+                print(f"[ERROR] Spool write error: {e}")
+            if self.fsync_interval > 0 and time.time() >= next_sync:
+                self.sync()
+                next_sync = time.time() + self.fsync_interval
+
+    # ----- 쓰기 스레드 -----
+
+    def ack(self, seq: int, flush: bool = True):
+        """
+        seq 메시지가 최종 출력에 기록됨 (또는 정책에 따라 버려짐)
+        flush=False면 메모리에만 반영 (호출 스레드에서 사용)
+        """
+        with self._ack_lock:
+            if seq == self._acked + 1:
+                self._acked = seq
+                while self._acked + 1 in self._ack_pending:
+                    self._acked += 1
+                    self._ack_pending.discard(self._acked)
+            elif seq > self._acked:
+                self._ack_pending.add(seq)
+        if flush and time.time() - self._last_ack_write >= self.ack_interval:
+            self.flush_acks()
+
+    def flush_acks(self):
+        """ack 위치를 기록하고, 다 찬 세그먼트를 교체하고, 모두 ack된 세그먼트를 삭제"""
+        with self._flush_lock:
+            self._flush_acks()
+
+    def _flush_acks(self):
+        with self._ack_lock:
+            acked = self._acked
+        if acked == self._ack_written and self._segment_size < self.segment_bytes:
+            return
+        old_fd = None
+        with self._lock:
+            # ack보다 먼저 받은 메시지가 먼저 기록되고, 회전 전 세그먼트의 최대 seq가 맞도록 버퍼부터 비움
+            self._drain_locked()
+            if acked > self._ack_written:
+                record = _frame(_ACK, acked)
+                os.write(self._fd, record)
+                self._segment_size += len(record)
+                self._ack_written = acked
+                self._dirty = True
+            if self._segment_size >= self.segment_bytes:
+                old_fd = self._fd
+                self._segments.append((self._segment, self._segment_max_seq))
+                self._open_segment()
+        self._last_ack_write = time.time()
+
+        if old_fd is not None:
+            try:
+                os.fsync(old_fd)
+            finally:
+                os.close(old_fd)
+        self._prune()
+
+    def _prune(self):
+        """기록된 ack 위치까지 모두 ack된 닫힌 세그먼트 삭제"""
+        keep = []
+        for path, max_seq in self._segments:
+            if max_seq <= self._ack_written:
+                try:
+                    os.remove(path)
+                except OSError:
+                    keep.append((path, max_seq))
+            else:
+                keep.append((path, max_seq))
+        self._segments = keep
+
+    def unacked(self) -> int:
+        with self._ack_lock:
+            acked = self._acked
+        with self._buffer_lock:
+            return self._next_seq - 1 - acked
+
+    def sync(self):
+        with self._lock:
+            fd, dirty = self._fd, self._dirty
+            self._dirty = False
+        if dirty and fd is not None:
+            try:
+                os.fsync(fd)
+            except OSError as e:
+                print(f"[ERROR] Spool fsync error: {e}")
+
+    def close(self):
+        """ack를 기록하고 fsync 후 닫음 (ack되지 않은 메시지는 다음 시작 때 다시 나감)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+        if self._fd is None:
+            return
+        self.drain()
+        with self._flush_lock:
+            self._flush_acks()
+            self._prune()  # ack 위치가 그대로면 _flush_acks가 정리하지 않고 돌아옴
+        with self._lock:
+            fd, self._fd = self._fd, None
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def stats(self) -> dict:
+        return {
+            'appended': self.appended,
+            'replayed': self.replayed,
+            'acked': self._acked,
+            'unacked': self.unacked() if self._fd is not None else self._next_seq - 1 - self._acked,
+            'segments': len(self._segments) + (1 if self._fd is not None else 0),
+        }
+
+
+def create_spool(config: dict, output_dir: Path):
+    """output.spool 설정으로 스풀 생성 (비활성화 시 None)"""
+    spool_config = config['output'].get('spool', {})
+    if not spool_config.get('enabled', False):
+        return None
+    return WriteAheadSpool(
+        Path(spool_config.get('directory') or Path(output_dir) / "spool"),
+        fsync_interval=spool_config.get('fsync_interval_ms', 200) / 1000,
+        segment_bytes=spool_config.get('segment_mb', 16) * 1024 * 1024,
+    )
@@ -0,0 +1,299 @@
+"""
+SQLite 메시지 저장소
+WAL 모드 DB에 쓰기 스레드가 큐를 비울 때마다 한 트랜잭션으로 배치 삽입하고,
+FTS5 전문 검색 테이블에는 한글을 2글자 단위(bigram)로 나눈 텍스트를 넣음
+
+테이블:
+    messages      (id, room, sender, captured, source_time, seq, hash, type, continued, text)
+    messages_fts  FTS5 (contentless, rowid = messages.id)
+"""
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .write_queue import create_write_queue, drain_queue
+from .stage_latency import mark, mark_batch, finish_batch
+from .span_tracer import span
+
+# 한글/한자/가나는 bigram, 나머지는 단어 단위 (영문은 소문자)
+_CJK_RUN = re.compile(r'[\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7a3]+')
+_WORD = re.compile(r'\w+')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    room TEXT NOT NULL,
+    sender TEXT,
+    captured TEXT NOT NULL,
+    source_time TEXT,
+    seq INTEGER,
+    hash TEXT,
+    type TEXT,
+    continued INTEGER NOT NULL DEFAULT 0,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_room_captured ON messages(room, captured);
+CREATE INDEX IF NOT EXISTS idx_messages_captured ON messages(captured);
+"""
+_FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(grams, content='', tokenize='unicode61')"
+
+_INSERT = ("INSERT INTO messages (id, room, sender, captured, source_time, seq, hash, type, continued, text) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+_INSERT_FTS = "INSERT INTO messages_fts (rowid, grams) VALUES (?, ?)"
+
+
+def bigram_tokens(text: str, index: bool = True) -> List[str]:
+    """
+    검색용 토큰: 한글 등은 겹치는 2글자 단위, 나머지는 단어 단위
+    index=True면 연속 구간의 마지막 글자를 한 글자 토큰으로 더 넣어 한 글자 검색어가 끝 글자와도 일치하게 함
+    """
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        pos = 0
+        for m in _CJK_RUN.finditer(word):
+            if m.start() > pos:
+                tokens.append(word[pos:m.start()])
+            run = m.group()
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+                if index:
+                    tokens.append(run[-1])
+            pos = m.end()
+        if pos < len(word):
+            tokens.append(word[pos:])
+    return tokens
+
+
+def fts_query(query: str) -> str:
+    """
+    검색어를 FTS5 MATCH 식으로 변환 (단어마다 bigram 구(phrase), 단어끼리는 AND)
+    저장할 때와 같은 bigram_tokens로 나누되, 끝의 한 글자 한글 구간(예: "3년"의 "년")은
+    저장된 텍스트에서 뒤에 글자가 이어지면("3년물") bigram의 앞 글자이므로 접두어로 검색
+    """
+    phrases = []
+    for word in query.split():
+        tokens = bigram_tokens(word, index=False)
+        if not tokens:
+            continue
+        phrase = '"' + " ".join(t.replace('"', '""') for t in tokens) + '"'
+        last = tokens[-1]
+        if len(last) == 1 and _CJK_RUN.fullmatch(last):
+            phrase += '*'
+        phrases.append(phrase)
+    return " AND ".join(phrases)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat(sep=' ') if value else None
+
+
+class SQLiteMessageWriter:
+    """
+    SQLite 저장소 writer (AsyncMessageWriter와 같은 start/write_message/stop 인터페이스)
+    write_message는 큐에 넣기만 하고, DB 연결과 트랜잭션은 쓰기 스레드만 사용
+    """
+
+    def __init__(self, config: dict):
+        """
+        Args:
+            config: 출력 설정 (output.sqlite)
+        """
+        self.config = config
+        output_config = config['output']
+        sqlite_config = output_config.get('sqlite', {})
+        self.output_dir = Path(output_config['directory'])
+        self.db_path = Path(sqlite_config.get('path') or self.output_dir / "messages.db")
+        self.synchronous = sqlite_config.get('synchronous', 'NORMAL')
+        self.fts_enabled = sqlite_config.get('fts', True)
+        self.max_batch = output_config.get('max_batch', 1024)
+        self.drain_timeout = output_config.get('drain_timeout', 10.0)
+
+        self.is_running = False
+        self.writer_thread = None
+        self._conn = None
+        self._next_id = 1
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.message_queue = create_write_queue(config, self.db_path)
+
+        # 통계
+        self.transactions = 0
+        self.rows = 0
+        self.commit_times = deque(maxlen=1000)
+        print(f"[INFO] SQLite output: {self.db_path}")
+
+    # ----- 쓰기 스레드 -----
+
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.executescript(_SCHEMA)
+        if self.fts_enabled:
+            try:
+                conn.execute(_FTS_SCHEMA)
+            except sqlite3.OperationalError as e:
+                print(f"[WARN] FTS5 is not available in this SQLite build, full-text search disabled: {e}")
+                self.fts_enabled = False
+        # 쓰기 스레드만 삽입하므로 id를 직접 매겨 FTS rowid와 맞춤
+        self._next_id = (conn.execute("SELECT MAX(id) FROM messages").fetchone()[0] or 0) + 1
+        return conn
+
+    def _row(self, message: Dict) -> tuple:
+        return (
+            message.get('window', ''),
+            message.get('sender'),
+            _iso(message['timestamp']),
+            _iso(message.get('source_time')),
+            message.get('seq'),
+            message.get('hash'),
+            message.get('type', 'line'),
+            1 if message.get('continued') else 0,
+            message.get('body', message['text']),
+        )
+
+    def write_batch(self, messages: List[Dict]):
+        """메시지 목록을 한 트랜잭션으로 삽입 (실패 시 롤백 후 예외)"""
+        first_id = self._next_id
+        rows = []
+        grams = []
+        for i, message in enumerate(messages):
+            row = (first_id + i,) + self._row(message)
+            rows.append(row)
+            if self.fts_enabled:
+                grams.append((first_id + i, " ".join(bigram_tokens(row[-1]))))
+        conn = self._conn
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(_INSERT, rows)
+            if grams:
+                conn.executemany(_INSERT_FTS, grams)
+            conn.execute("COMMIT")
+        except Exception:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            raise
+        self._next_id = first_id + len(rows)
+        self.transactions += 1
+        self.rows += len(rows)
+
+    def _commit(self, batch: List[Dict]):
+        started = time.time()
+        mark_batch(batch, 'queue')
+        try:
+            with span('sqlite_transaction', 'writer', messages=len(batch)):
+                self.write_batch(batch)
+            mark_batch(batch, 'write')
+            finish_batch(batch)
+        except Exception as e:
+            print(f"[ERROR] SQLite write error: {e}")
+        self.commit_times.append(time.time() - started)
+
+    def open_sink(self):
+        self._conn = self._connect()
+
+    def close_sink(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        self._conn.close()
+        self._conn = None
+
+    def writer_loop(self):
+        """큐를 비울 때마다 한 트랜잭션으로 기록"""
+        self.open_sink()
+        while self.is_running:
+            try:
+                batch = [self.message_queue.get(timeout=0.1)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self.message_queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(batch)
+            for _ in batch:
+                self.message_queue.task_done()
+        self.close_sink()
+
+    # ----- 호출 스레드 -----
+
+    def write_message(self, message: Dict):
+        """메시지를 큐에 추가 (호출 스레드에서는 DB 작업을 하지 않음)"""
+        mark(message, 'callback')
+        self.message_queue.put(message, message.get('window', ''))
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self.writer_thread = threading.Thread(target=self.writer_loop, daemon=True)
+        self.writer_thread.start()
+        print("[INFO] SQLite writer started")
+
+    def stop(self):
+        print("[INFO] Saving remaining messages...")
+        if not drain_queue(self.message_queue, self.writer_thread, self.drain_timeout):
+            print(f"[WARN] SQLite writer did not drain within {self.drain_timeout}s; remaining messages lost")
+        self.is_running = False
+        if self.writer_thread:
+            self.writer_thread.join(timeout=5)
+        self.message_queue.close()
+        self.message_queue.print_summary()
+        if self.transactions:
+            commits = sorted(self.commit_times)
+            print(f"[INFO] SQLite: {self.rows} rows in {self.transactions} transactions, "
+                  f"commit p50 {commits[len(commits) // 2] * 1000:.2f}ms / "
+                  f"p99 {commits[min(len(commits) - 1, int(len(commits) * 0.99))] * 1000:.2f}ms")
+        print(f"[INFO] All messages saved: {self.db_path}")
+
+
+def search_messages(db_path, query: str = None, room: str = None, since: datetime = None,
+                    until: datetime = None, limit: int = 100) -> List[dict]:
+    """
+    저장된 메시지 검색 (최신순)
+
+    Args:
+        db_path: SQLite 파일
+        query: 검색어 (공백으로 나눈 단어를 모두 포함, 한글은 부분 일치)
+        room: 방 이름 (정확히 일치)
+        since / until: 캡처 시각 범위
+    """
+    conn = sqlite3.connect(f"file:{Path(db_path)}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        where, params = [], []
+        if query:
+            where.append("m.id IN (SELECT rowid FROM messages_fts WHERE messages_fts MATCH ?)")
+            params.append(fts_query(query))
+        if room is not None:
+            where.append("m.room = ?")
+            params.append(room)
+        if since is not None:
+            where.append("m.captured >= ?")
+            params.append(_iso(since))
+        if until is not None:
+            where.append("m.captured < ?")
+            params.append(_iso(until))
+        sql = "SELECT m.* FROM messages m"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY m.captured DESC LIMIT ?"
+        params.append(limit)
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
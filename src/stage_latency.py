@@ -0,0 +1,222 @@
+"""
+처리 단계별 지연 측정 (캡처 → diff → 큐 → 디스크)
+메시지마다 단조 시계(time.perf_counter) 시각을 담은 StageTrace가 함께 전달되고,
+각 단계가 끝날 때 시각을 찍은 뒤 writer가 디스크 기록을 마치면 단계별/방별 히스토그램에 기록
+
+단계 (앞 단계가 끝난 시각부터 이 단계가 끝난 시각까지):
+    enumerate   캡처 주기 시작 → 창 목록 확보
+    read        → 방 텍스트 읽기 결과 적용 시작 (같은 주기에 읽은 다른 방을 기다린 시간 포함)
+    diff        → diff/지문/파싱을 거쳐 메시지 생성
+    callback    → 콜백(표시 문자열 등)을 거쳐 writer.write_message 호출
+    queue       → 스풀 기록, 쓰기 큐 대기 후 쓰기 스레드가 꺼냄
+    format      → 출력 형식으로 변환
+    write       → write + flush (그룹 커밋/SQLite/쓰기 프로세스는 배치 단위)
+    end_to_end  캡처 주기 시작 → write 완료
+"""
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+
+from .latency_histogram import LatencyHistogram, WindowedHistogram
+
+STAGES = ('enumerate', 'read', 'diff', 'callback', 'queue', 'format', 'write')
+END_TO_END = 'end_to_end'
+_OTHER_ROOMS = "(other)"
+
+_tracker: Optional["StageLatency"] = None
+
+
+class StageTrace:
+    """메시지와 함께 전달되는 단계 종료 시각 목록 (perf_counter 기준)"""
+
+    __slots__ = ('origin', 'marks')
+
+    def __init__(self, origin: float = None, marks: List = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.marks = marks if marks is not None else []  # [(단계, 종료 시각)]
+
+    def mark(self, stage: str, now: float = None):
+        self.marks.append((stage, time.perf_counter() if now is None else now))
+
+    def fork(self) -> "StageTrace":
+        """같은 읽기에서 나온 메시지마다 따로 이어 갈 사본"""
+        return StageTrace(self.origin, list(self.marks))
+
+    def durations(self):
+        previous = self.origin
+        for stage, at in self.marks:
+            yield stage, at - previous
+            previous = at
+
+    def elapsed(self) -> float:
+        return (self.marks[-1][1] if self.marks else self.origin) - self.origin
+
+
+class StageLatency:
+    """단계별(최근 구간 포함) / 방별 지연 히스토그램과 목표 초과 원인 집계"""
+
+    def __init__(self, window: float = 60.0, per_room: bool = True, max_rooms: int = 256,
+                 target: float = None):
+        """
+        Args:
+            window: 단계별 최근 구간 통계의 길이 (초)
+            per_room: 방별 히스토그램도 기록 (방별은 전체 기간만, 낮은 해상도)
+            max_rooms: 방별로 따로 셀 최대 방 수 (넘으면 "(other)"에 합산)
+            target: 종단 간 목표 지연 (초과한 메시지는 가장 오래 걸린 단계를 집계)
+        """
+        self.window = window
+        self.per_room = per_room
+        self.max_rooms = max_rooms
+        self.target = target
+        self.stages: Dict[str, WindowedHistogram] = {}
+        self.rooms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self.over_target = 0
+        self.blame = Counter()  # 목표를 넘긴 메시지에서 가장 오래 걸린 단계
+        self.listeners: List[Callable[[float], None]] = []  # 종단 간 지연을 받을 함수
+        self._lock = threading.Lock()
+
+    def _stage(self, stage: str) -> WindowedHistogram:
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, WindowedHistogram(self.window, max_seconds=60.0))
+        return histogram
+
+    def _room(self, room: str) -> Dict[str, LatencyHistogram]:
+        histograms = self.rooms.get(room)
+        if histograms is None:
+            if len(self.rooms) >= self.max_rooms:
+                room = _OTHER_ROOMS
+            histograms = self.rooms.setdefault(room, {})
+        return histograms
+
+    def finish(self, trace: StageTrace, room: str = ""):
+        """기록을 마친 메시지의 단계별 소요 시간과 종단 간 지연을 기록"""
+        durations = list(trace.durations())
+        total = trace.elapsed()
+        now = time.time()
+        for stage, seconds in durations:
+            self._stage(stage).record(seconds, now)
+        self._stage(END_TO_END).record(total, now)
+        with self._lock:
+            if self.per_room:
+                histograms = self._room(room)
+                for stage, seconds in durations + [(END_TO_END, total)]:
+                    histogram = histograms.get(stage)
+                    if histogram is None:
+                        histogram = histograms[stage] = LatencyHistogram(60.0, sub_bucket_bits=5)
+                    histogram.record(seconds)
+            if self.target is not None and total > self.target and durations:
+                self.over_target += 1
+                self.blame[max(durations, key=lambda item: item[1])[0]] += 1
+        for listener in self.listeners:
+            listener(total)
+
+    def snapshot(self) -> dict:
+        """단계별 전체/최근 구간 요약, 방별 요약, 목표 초과 원인 (밀리초)"""
+        stages = {}
+        for stage in _ordered(self.stages):
+            lifetime, window = self.stages[stage].snapshot()
+            stages[stage] = {'lifetime': lifetime.summary(), 'window': window.summary()}
+        with self._lock:
+            rooms = {room: {stage: histogram.copy() for stage, histogram in histograms.items()}
+                     for room, histograms in self.rooms.items()}
+            blame = dict(self.blame)
+            over_target = self.over_target
+        return {
+            'window_seconds': self.window,
+            'target_ms': self.target * 1000 if self.target is not None else None,
+            'stages': stages,
+            'rooms': {room: {stage: histogram.summary() for stage, histogram in histograms.items()}
+                      for room, histograms in rooms.items()},
+            'over_target': over_target,
+            'blame': blame,
+        }
+
+    def histograms(self) -> Dict[str, LatencyHistogram]:
+        """단계별 전체 기간 히스토그램 사본 (메트릭 내보내기용)"""
+        return {stage: self.stages[stage].snapshot()[0] for stage in _ordered(self.stages)}
+
+    def print_report(self, top_rooms: int = 5):
+        snapshot = self.snapshot()
+        if not snapshot['stages']:
+            return
+        print("\n" + "=" * 60)
+        print("📊 단계별 지연 (전체 기간)")
+        print("=" * 60)
+        print(f"{'단계':<12}{'건수':>10}{'P50':>11}{'P99':>11}{'최대':>11}")
+        for stage, stats in snapshot['stages'].items():
+            s = stats['lifetime']
+            print(f"{stage:<12}{s['count']:>10,}{s['p50_ms']:>9.2f}ms{s['p99_ms']:>9.2f}ms{s['max_ms']:>9.2f}ms")
+        if snapshot['target_ms'] is not None:
+            blame = ", ".join(f"{stage} {count:,}" for stage, count in
+                              sorted(snapshot['blame'].items(), key=lambda item: -item[1]))
+            print(f"목표({snapshot['target_ms']:.0f}ms) 초과: {snapshot['over_target']:,}건"
+                  + (f" (가장 오래 걸린 단계: {blame})" if blame else ""))
+        rooms = sorted(((stats[END_TO_END]['p99_ms'], room) for room, stats in snapshot['rooms'].items()
+                        if END_TO_END in stats), reverse=True)[:top_rooms]
+        if rooms:
+            print("종단 간 P99가 큰 방: " + ", ".join(f"{room} {p99:.1f}ms" for p99, room in rooms))
+        print("=" * 60 + "\n")
+
+
+def _ordered(stages) -> List[str]:
+    order = {stage: i for i, stage in enumerate(STAGES + (END_TO_END,))}
+    return sorted(stages, key=lambda stage: order.get(stage, len(order)))
+
+
+# ----- 전역 측정기 (캡처 쪽과 writer 쪽이 메시지의 trace로만 연결됨) -----
+
+def enable_stage_latency(config: dict) -> Optional[StageLatency]:
+    """performance.stage_latency 설정으로 측정기를 켬 (비활성화 시 None)"""
+    global _tracker
+    performance = config.get('performance', {})
+    settings = performance.get('stage_latency', {})
+    if not settings.get('enabled', False):
+        _tracker = None
+        return None
+    _tracker = StageLatency(
+        window=settings.get('window', 60.0),
+        per_room=settings.get('per_room', True),
+        max_rooms=settings.get('max_rooms', 256),
+        target=performance.get('max_response_time'),
+    )
+    return _tracker
+
+
+def stage_latency() -> Optional[StageLatency]:
+    return _tracker
+
+
+def mark(message: dict, stage: str, now: float = None):
+    """메시지에 trace가 있으면 단계 종료 시각을 찍음"""
+    trace = message.get('trace')
+    if trace is not None and _tracker is not None:
+        trace.mark(stage, now)
+
+
+def mark_batch(messages, stage: str):
+    if _tracker is None:
+        return
+    now = time.perf_counter()
+    for message in messages:
+        trace = message.get('trace')
+        if trace is not None:
+            trace.mark(stage, now)
+
+
+def finish(message: dict):
+    """디스크 기록을 마친 메시지의 trace를 히스토그램에 기록"""
+    trace = message.get('trace')
+    if trace is not None and _tracker is not None:
+        _tracker.finish(trace, message.get('window', ''))
+
+
+def finish_batch(messages):
+    if _tracker is None:
+        return
+    for message in messages:
+        trace = message.get('trace')
+        if trace is not None:
+            _tracker.finish(trace, message.get('window', ''))
@@ -0,0 +1,331 @@
+"""
+스트리밍 압축 출력
+출력 파일을 나중에 압축하는 대신 기록하면서 gzip(zstandard가 있으면 zstd)으로 압축하고,
+flush_interval_ms마다 sync flush 지점을 만들어 읽는 쪽이 압축된 파일을 tail할 수 있게 함
+
+파일:
+    {출력 파일}.gz / .zst  (실행이나 재시작마다 gzip member / zstd frame이 이어 붙음)
+
+sync flush 이전까지 기록된 내용은 모두 압축 해제할 수 있으므로 tail 지연은 flush 간격 이내
+비정상 종료로 마지막 member가 닫히지 않은 파일은 이어 쓰기 전에 정리함
+(gzip은 마지막 sync flush 지점에서 member를 닫고, 그럴 수 없으면 그 member/frame만 .broken 파일로 옮김)
+"""
+import io
+import os
+import struct
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .rotation import resolve_codec, _EXTENSIONS
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+_READ_CHUNK = 256 * 1024
+_SYNC_MARKER = b"\x00\x00\xff\xff"  # sync flush가 남기는 빈 stored 블록
+_FINAL_BLOCK = b"\x03\x00"  # 빈 마지막 블록 (고정 허프만)
+
+
+class CompressedStream:
+    """
+    압축하며 기록하는 출력 파일 (쓰기 스레드 전용)
+    file 객체처럼 write / flush / fileno / close를 제공하며, flush는 sync flush 지점을 만듦
+    """
+
+    def __init__(self, path: Path, codec: str, level: int = None, flush_interval: float = 1.0,
+                 encoding: str = 'utf-8', append: bool = True):
+        """
+        Args:
+            path: 압축 파일 경로 (확장자 포함)
+            codec: 'gzip' 또는 'zstd'
+            level: 압축 수준 (기본값 gzip 6, zstd 3)
+            flush_interval: due()가 True가 되는 sync flush 간격 (초)
+            append: 기존 파일 뒤에 새 member/frame으로 이어 씀
+        """
+        self.path = Path(path)
+        self.codec = codec
+        self.level = level
+        self.flush_interval = flush_interval
+        self.encoding = encoding
+        self.append = append
+        self._file = None
+        self._compressor = None
+        self._dirty = False
+        self._last_flush = time.time()
+
+        # 통계
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.flushes = 0
+
+    def open(self):
+        if self.append and self.path.exists() and self.path.stat().st_size:
+            self._repair_tail()
+        self._file = open(self.path, 'ab' if self.append else 'wb')
+        if self.codec == 'zstd':
+            level = 3 if self.level is None else self.level
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        else:
+            level = 6 if self.level is None else self.level
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip 헤더
+        self._last_flush = time.time()
+        return self
+
+    def _repair_tail(self):
+        """앞선 실행이 마지막 member/frame을 닫지 못하고 끝났으면 이어 쓸 수 있게 정리"""
+        try:
+            start, terminated = _last_member(self.path, self.codec)
+        except Exception as e:
+            print(f"[WARN] Could not check compressed output {self.path}: {e}")
+            return
+        if terminated:
+            return
+        if self.codec == 'gzip' and _close_gzip_member(self.path, start):
+            print(f"[WARN] Closed the unterminated gzip member in {self.path.name} at its last sync flush")
+            return
+        # 닫을 수 없는 마지막 member/frame만 옆 파일로 옮기고 앞의 완성된 부분은 그대로 둠
+        aside = self.path.with_name(f"{self.path.name}.broken-{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        with open(self.path, 'r+b') as f:
+            f.seek(start)
+            with open(aside, 'wb') as out:
+                out.write(f.read())
+            f.truncate(start)
+        print(f"[WARN] {self.path.name} ended in an unterminated {self.codec} stream; "
+              f"moved the last {'frame' if self.codec == 'zstd' else 'member'} to {aside.name}")
+
+    def write(self, data):
+        """텍스트(또는 bytes)를 압축기에 넣음 (출력은 압축기가 블록을 채울 때만 생김)"""
+        if not isinstance(data, bytes):
+            data = data.encode(self.encoding)
+        self.bytes_in += len(data)
+        out = self._compressor.compress(data)
+        if out:
+            self._file.write(out)
+            self.bytes_out += len(out)
+        self._dirty = True
+
+    def due(self) -> bool:
+        """마지막 sync flush 이후 기록이 있고 flush_interval이 지났는지"""
+        return self._dirty and time.time() - self._last_flush >= self.flush_interval
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def flush(self):
+        """sync flush: 지금까지 기록한 내용을 읽는 쪽이 모두 풀 수 있게 내보냄 (압축 사전은 유지)"""
+        if self._dirty:
+            if self.codec == 'zstd':
+                out = self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            else:
+                out = self._compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._file.write(out)
+            self.bytes_out += len(out)
+            self._dirty = False
+            self.flushes += 1
+        self._file.flush()
+        self._last_flush = time.time()
+
+    def fileno(self) -> int:
+        return self._file.fileno()
+
+    def close(self):
+        """스트림을 끝내고(gzip trailer / zstd frame 끝) fsync 후 닫기"""
+        if self._file is None:
+            return
+        try:
+            out = self._compressor.flush()
+            self._file.write(out)
+            self.bytes_out += len(out)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        finally:
+            self._file.close()
+            self._file = None
+            self._compressor = None
+            self._dirty = False
+
+    def stats(self) -> dict:
+        return {
+            'codec': self.codec,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'flushes': self.flushes,
+        }
+
+
+def create_compressed_stream(config: dict, output_file: Path) -> Optional[CompressedStream]:
+    """output.stream_compression 설정으로 압축 출력 생성 (codec이 none이면 None)"""
+    output_config = config['output']
+    stream_config = output_config.get('stream_compression', {})
+    codec = resolve_codec(stream_config.get('codec', 'none'))
+    if codec is None:
+        return None
+    path = Path(output_file)
+    return CompressedStream(
+        path.with_name(path.name + _EXTENSIONS[codec]),
+        codec,
+        level=stream_config.get('level'),
+        flush_interval=stream_config.get('flush_interval_ms', 1000) / 1000,
+        encoding=output_config['encoding'],
+        append=output_config.get('append_mode', True),
+    )
+
+
+def print_stream_summary(stream: CompressedStream):
+    stats = stream.stats()
+    ratio = stats['bytes_in'] / stats['bytes_out'] if stats['bytes_out'] else 0.0
+    print(f"[INFO] Stream compression ({stats['codec']}): {stats['bytes_in']} -> {stats['bytes_out']} bytes "
+          f"({ratio:.1f}x), {stats['flushes']} sync flushes")
+
+
+# ----- 읽기 (tail) -----
+
+def _decompressor(codec: str):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read .zst output")
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+
+def _last_member(path: Path, codec: str):
+    """(마지막 member/frame의 시작 위치, 파일 끝에서 닫혀 있는지) - 손상된 member도 닫히지 않은 것으로 봄"""
+    start = 0
+    pos = 0
+    decompressor = _decompressor(codec)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(_READ_CHUNK)
+            if not chunk:
+                return start, start == pos
+            pos += len(chunk)
+            while chunk:
+                try:
+                    decompressor.decompress(chunk)
+                except Exception:
+                    return start, False
+                if not decompressor.eof:
+                    break
+                chunk = decompressor.unused_data
+                start = pos - len(chunk)
+                decompressor = _decompressor(codec)
+
+
+def _close_gzip_member(path: Path, start: int, attempts: int = 8) -> bool:
+    """
+    닫히지 않은 gzip member를 마지막 sync flush 지점에서 잘라 빈 마지막 블록과 trailer를 붙임
+    압축 데이터 안에 우연히 같은 바이트열이 있을 수 있으므로 붙인 결과가 풀리는지 확인하고, 아니면 앞 지점을 시도
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        member = f.read()
+    cut = len(member)
+    for _ in range(attempts):
+        cut = member.rfind(_SYNC_MARKER, 0, cut)
+        if cut < 0:
+            return False
+        body = member[:cut + len(_SYNC_MARKER)]
+        try:
+            data = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(body)
+        except zlib.error:
+            continue
+        closed = body + _FINAL_BLOCK + struct.pack('<II', zlib.crc32(data) & 0xffffffff, len(data) & 0xffffffff)
+        check = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            if check.decompress(closed) != data or not check.eof or check.unused_data:
+                continue
+        except zlib.error:
+            continue
+        with open(path, 'r+b') as f:
+            f.truncate(start + len(body))
+            f.seek(start + len(body))
+            f.write(closed[len(body):])
+            f.flush()
+            os.fsync(f.fileno())
+        return True
+    return False
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    .gz / .zst 파일을 이어 붙은 member/frame까지 차례로 푸는 raw 스트림
+    기록 중인 파일은 마지막 sync flush까지 읽으면 EOF를 반환 (파일이 커지면 다시 읽을 수 있음)
+    """
+
+    def __init__(self, path, codec: str = None):
+        self.path = Path(path)
+        self.codec = codec or ('zstd' if self.path.suffix == '.zst' else 'gzip')
+        self._decompressor = _decompressor(self.codec)
+        self._file = open(self.path, 'rb')
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def read_chunk(self) -> bytes:
+        """파일의 다음 부분을 풀어 반환 (지금은 더 풀 것이 없으면 b"")"""
+        while True:
+            chunk = self._file.read(_READ_CHUNK)
+            if not chunk:
+                return b""
+            data = b""
+            while chunk:
+                data += self._decompressor.decompress(chunk)
+                if not self._decompressor.eof:
+                    break
+                # member/frame이 끝나면 이어 붙은 다음 member/frame을 새 압축 해제기로 읽음
+                chunk = self._decompressor.unused_data
+                self._decompressor = _decompressor(self.codec)
+            if data:
+                return data
+
+    def readinto(self, b) -> int:
+        if not self._buffer:
+            self._buffer = self.read_chunk()
+            if not self._buffer:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+def follow(path, poll_interval: float = 0.5, from_start: bool = True, stop=None,
+           encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    기록 중인 .gz / .zst 출력 파일의 완성된 줄을 계속 읽음 (text / jsonl 형식)
+
+    Args:
+        path: 압축 출력 파일
+        poll_interval: 새 데이터가 없을 때 다시 확인할 간격 (초)
+        from_start: False면 지금까지의 내용은 건너뛰고 새로 기록되는 줄만 반환
+        stop: 호출하면 True를 반환하는 함수 (None이면 계속 따라감)
+    """
+    pending = b""
+    skipping = not from_start
+    with DecompressingReader(path) as reader:
+        while True:
+            data = reader.read_chunk()
+            if not data:
+                skipping = False
+                if stop is not None and stop():
+                    return
+                time.sleep(poll_interval)
+                continue
+            lines = (pending + data).split(b"\n")
+            pending = lines.pop()
+            if skipping:
+                continue
+            for line in lines:
+                yield line.decode(encoding, errors='replace')
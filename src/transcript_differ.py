@@ -0,0 +1,115 @@
+"""
+순서 기반 대화 내역 비교기
+방별로 마지막으로 본 K줄(앵커)을 기억하고, 새 텍스트에서 앵커 뒤에 붙은 줄만 추출
+같은 내용의 메시지가 반복되어도("ㅇㅋ", "확인했습니다") 누락 없이 그대로 내보냄
+"""
+from typing import Dict, List, Optional, Tuple
+
+from .dedup_store import fingerprint
+
+_MASK = (1 << 64) - 1
+_BASE = 0x100000001B3  # 홀수여야 2^64에 대한 역원이 존재
+_BASE_INV = pow(_BASE, -1, 1 << 64)
+
+
+def _window_hash(fps: List[int]) -> int:
+    h = 0
+    for fp in fps:
+        h = (h * _BASE + fp) & _MASK
+    return h
+
+
+class TranscriptDiffer:
+    def __init__(self, anchor_lines: int = 4):
+        """
+        Args:
+            anchor_lines: 앵커로 사용할 마지막 줄 수 (K)
+        """
+        self.anchor_lines = anchor_lines
+        self._anchors: Dict[str, List[int]] = {}  # room -> 마지막 K줄 지문
+        self._counts: Dict[str, Optional[int]] = {}  # room -> 지금까지 본 전체 줄 수 (모르면 None)
+
+    def __contains__(self, room: str) -> bool:
+        return room in self._anchors
+
+    def anchor(self, room: str) -> List[int]:
+        return list(self._anchors.get(room, []))
+
+    def line_count(self, room: str) -> Optional[int]:
+        return self._counts.get(room)
+
+    def anchor_start(self, room: str) -> Optional[int]:
+        """앵커 첫 줄의 전체 내역 기준 위치 (증분 읽기 꼬리가 여기서 시작함)"""
+        count = self._counts.get(room)
+        if count is None:
+            return None
+        return count - len(self._anchors.get(room, []))
+
+    def set_anchor(self, room: str, fps: List[int], count: Optional[int] = None):
+        self._anchors[room] = list(fps[-self.anchor_lines:])
+        self._counts[room] = count
+
+    def reset(self, room: str, lines: List[str], start: Optional[int] = 0):
+        """lines까지 모두 본 것으로 간주하고 앵커를 다시 잡음 (start를 모르면 None)"""
+        count = start + len(lines) if start is not None else None
+        self.set_anchor(room, [fingerprint(line) for line in lines[-self.anchor_lines:]], count)
+
+    def forget(self, room: str):
+        self._anchors.pop(room, None)
+        self._counts.pop(room, None)
+
+    def diff(self, room: str, lines: List[str], start: Optional[int] = None) -> Optional[List[Tuple[str, int]]]:
+        """
+        앵커 이후에 추가된 줄을 (줄, 지문) 목록으로 반환
+
+        lines는 앵커 위치 또는 그 이전부터 시작하는 대화 내역의 뒷부분이면 됨
+        (전체 텍스트든 증분 읽기 꼬리든 상관없음). start에 lines[0]의 전체 내역
+        기준 위치를 주면 앵커가 있어야 할 자리부터 확인하고, 아니면 뒤에서부터
+        앵커를 찾음. 어느 쪽이든 비용은 새 줄 수 + K에 비례.
+        앵커를 찾지 못하면(내역이 지워지거나 바뀜) None.
+        """
+        n = len(lines)
+        count = start + n if start is not None else None
+        anchor = self._anchors.get(room)
+        if not anchor:
+            appended = [(line, fingerprint(line)) for line in lines]
+            self.set_anchor(room, [fp for _, fp in appended], count)
+            return appended
+
+        a = len(anchor)
+        if n < a:
+            return None
+
+        fps: Dict[int, int] = {}
+
+        def fp_at(i):
+            fp = fps.get(i)
+            if fp is None:
+                fp = fps[i] = fingerprint(lines[i])
+            return fp
+
+        def matches(end):
+            return all(fp_at(end - a + 1 + t) == anchor[t] for t in range(a))
+
+        end = None
+        known = self._counts.get(room)
+        if start is not None and known is not None:
+            expected = known - 1 - start
+            if a - 1 <= expected < n and matches(expected):
+                end = expected
+
+        if end is None:
+            # 끝에서부터 길이 a 창을 한 칸씩 앞으로 밀며 rolling hash 비교
+            target = _window_hash(anchor)
+            top = pow(_BASE, a - 1, 1 << 64)
+            end = n - 1
+            h = _window_hash([fp_at(i) for i in range(end - a + 1, end + 1)])
+            while not (h == target and matches(end)):
+                if end == a - 1:
+                    return None
+                h = ((h - fp_at(end)) * _BASE_INV + fp_at(end - a) * top) & _MASK
+                end -= 1
+
+        appended = [(lines[i], fp_at(i)) for i in range(end + 1, n)]
+        self.set_anchor(room, anchor + [fp for _, fp in appended], count)
+        return appended
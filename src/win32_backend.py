@@ -0,0 +1,212 @@
+"""
+Win32 창 백엔드
+win32gui와 SendMessageTimeout으로 실제 KBond 창을 다룸
+"""
+import ctypes
+import struct
+import threading
+from typing import List, Optional, Tuple
+
+import win32gui
+import win32process
+
+from .window_backend import (
+    WindowBackend, WM_GETTEXT, WM_GETTEXTLENGTH, EM_GETSEL, EM_GETTEXTRANGE, GWL_STYLE, GA_ROOT
+)
+
+user32 = ctypes.windll.user32
+kernel32 = ctypes.windll.kernel32
+kernel32.OpenProcess.restype = ctypes.c_void_p
+kernel32.OpenProcess.argtypes = [ctypes.c_ulong, ctypes.c_int, ctypes.c_ulong]
+kernel32.VirtualAllocEx.restype = ctypes.c_void_p
+kernel32.VirtualAllocEx.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_ulong, ctypes.c_ulong]
+kernel32.VirtualFreeEx.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_ulong]
+kernel32.WriteProcessMemory.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t)]
+kernel32.ReadProcessMemory.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t)]
+kernel32.IsWow64Process.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]
+kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+
+SMTO_ABORTIFHUNG = 0x0002
+PROCESS_VM_OPERATION = 0x0008
+PROCESS_VM_READ = 0x0010
+PROCESS_VM_WRITE = 0x0020
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+MEM_COMMIT = 0x1000
+MEM_RESERVE = 0x2000
+MEM_RELEASE = 0x8000
+PAGE_READWRITE = 0x04
+
+
+def send_message_timeout(hwnd, msg, wparam, lparam, timeout_ms=100):
+    """SendMessageTimeout wrapper (SMTO_ABORTIFHUNG, 실패 시 0)"""
+    if not win32gui.IsWindow(hwnd):
+        return 0
+    result = ctypes.c_ulong()
+    success = user32.SendMessageTimeoutW(
+        hwnd, msg, wparam, lparam,
+        SMTO_ABORTIFHUNG, timeout_ms,
+        ctypes.byref(result)
+    )
+    if success:
+        return result.value
+    return 0
+
+
+class RichEditRangeReader:
+    """
+    Reads a character range from a RichEdit control owned by another process.
+
+    EM_GETTEXTRANGE is not marshalled across processes, so the TEXTRANGE
+    struct and its buffer are allocated inside the KBond process.
+    """
+
+    def __init__(self):
+        self._processes = {} # pid -> (process handle, target is 32-bit)
+        self._lock = threading.Lock()
+
+    def _open(self, hwnd):
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        with self._lock:
+            if pid in self._processes:
+                return self._processes[pid]
+            return self._open_process(pid)
+
+    def _open_process(self, pid):
+        access = PROCESS_VM_OPERATION | PROCESS_VM_READ | PROCESS_VM_WRITE | PROCESS_QUERY_LIMITED_INFORMATION
+        handle = kernel32.OpenProcess(access, False, pid)
+        if not handle:
+            return None
+        is_32bit = ctypes.sizeof(ctypes.c_void_p) == 4
+        if not is_32bit:
+            wow64 = ctypes.c_int(0)
+            if kernel32.IsWow64Process(handle, ctypes.byref(wow64)):
+                is_32bit = bool(wow64.value)
+        self._processes[pid] = (handle, is_32bit)
+        return self._processes[pid]
+
+    def read(self, hwnd, start, end, timeout_ms=200):
+        """Returns text[start:end] in RichEdit character positions, or None if unavailable."""
+        if end <= start:
+            return ""
+        proc = self._open(hwnd)
+        if proc is None:
+            return None
+        handle, is_32bit = proc
+        count = end - start
+        header = 16  # sizeof(TEXTRANGEW) rounded up for both 32/64-bit targets
+        remote = kernel32.VirtualAllocEx(handle, None, header + (count + 1) * 2,
+                                         MEM_COMMIT | MEM_RESERVE, PAGE_READWRITE)
+        if not remote:
+            return None
+        try:
+            if is_32bit:
+                packed = struct.pack('<iiI', start, end, remote + header)
+            else:
+                packed = struct.pack('<iiQ', start, end, remote + header)
+            written = ctypes.c_size_t()
+            if not kernel32.WriteProcessMemory(handle, remote, packed, len(packed), ctypes.byref(written)):
+                return None
+            copied = send_message_timeout(hwnd, EM_GETTEXTRANGE, 0, remote, timeout_ms)
+            if copied <= 0:
+                return None  # timed out, or nothing where text was expected
+            buffer = ctypes.create_string_buffer(copied * 2)
+            read = ctypes.c_size_t()
+            if not kernel32.ReadProcessMemory(handle, remote + header, buffer, copied * 2, ctypes.byref(read)):
+                return None
+            return buffer.raw[:read.value].decode('utf-16-le', errors='replace')
+        finally:
+            kernel32.VirtualFreeEx(handle, remote, 0, MEM_RELEASE)
+
+    def close(self):
+        with self._lock:
+            for handle, _ in self._processes.values():
+                kernel32.CloseHandle(handle)
+            self._processes.clear()
+
+
+class Win32Backend(WindowBackend):
+    name = "win32"
+
+    def __init__(self):
+        self.range_reader = RichEditRangeReader()
+
+    def top_level_windows(self) -> List[int]:
+        hwnds = []
+        def enum_cb(hwnd, param):
+            hwnds.append(hwnd)
+            return True
+        win32gui.EnumWindows(enum_cb, None)
+        return hwnds
+
+    def child_windows(self, hwnd: int) -> List[int]:
+        hwnds = []
+        def enum_cb(child, param):
+            hwnds.append(child)
+            return True
+        win32gui.EnumChildWindows(hwnd, enum_cb, None)
+        return hwnds
+
+    def is_window(self, hwnd: int) -> bool:
+        return bool(win32gui.IsWindow(hwnd))
+
+    def is_visible(self, hwnd: int) -> bool:
+        return bool(win32gui.IsWindowVisible(hwnd))
+
+    def is_enabled(self, hwnd: int) -> bool:
+        return bool(win32gui.IsWindowEnabled(hwnd))
+
+    def class_name(self, hwnd: int) -> str:
+        return win32gui.GetClassName(hwnd)
+
+    def window_text(self, hwnd: int) -> str:
+        return win32gui.GetWindowText(hwnd)
+
+    def style(self, hwnd: int) -> int:
+        return win32gui.GetWindowLong(hwnd, GWL_STYLE)
+
+    def parent(self, hwnd: int) -> int:
+        return win32gui.GetParent(hwnd)
+
+    def root(self, hwnd: int) -> int:
+        return win32gui.GetAncestor(hwnd, GA_ROOT)
+
+    def is_hung(self, hwnd: int) -> bool:
+        return bool(user32.IsHungAppWindow(hwnd))
+
+    def window_from_point(self, x: int, y: int) -> Optional[int]:
+        return win32gui.WindowFromPoint((x, y))
+
+    def send_message(self, hwnd: int, msg: int, wparam, lparam, timeout_ms: int = 100) -> int:
+        return send_message_timeout(hwnd, msg, wparam, lparam, timeout_ms)
+
+    def text_length(self, hwnd: int, timeout_ms: int) -> int:
+        try:
+            return send_message_timeout(hwnd, WM_GETTEXTLENGTH, 0, 0, timeout_ms)
+        except Exception:
+            return 0
+
+    def get_text(self, hwnd: int, length: int, timeout_ms: int) -> Optional[str]:
+        if length <= 0:
+            return ""
+        try:
+            buffer = ctypes.create_unicode_buffer(length + 1)
+            copied = send_message_timeout(hwnd, WM_GETTEXT, length + 1, buffer, timeout_ms)
+            if copied == 0:
+                return None
+            return buffer.value
+        except Exception:
+            return None
+
+    def get_text_range(self, hwnd: int, start: int, end: int, timeout_ms: int) -> Optional[str]:
+        return self.range_reader.read(hwnd, start, end, timeout_ms)
+
+    def get_selection(self, hwnd: int, timeout_ms: int) -> Tuple[int, int]:
+        result = send_message_timeout(hwnd, EM_GETSEL, 0, 0, timeout_ms)
+        return result & 0xFFFF, (result >> 16) & 0xFFFF
+
+    def event_hook(self, handler):
+        from .win_event_hook import WinEventHookThread
+        return WinEventHookThread(handler)
+
+    def close(self):
+        self.range_reader.close()
@@ -0,0 +1,103 @@
+"""
+SetWinEventHook 기반 이벤트 수신 스레드
+out-of-context 훅은 등록한 스레드의 메시지 루프로 전달되므로 전용 스레드에서 펌프를 돌림
+"""
+import ctypes
+from ctypes import wintypes
+import threading
+from typing import Callable, List, Tuple
+
+# 이벤트 상수는 window_backend에 정의 (기존처럼 이 모듈에서도 import 가능)
+from .window_backend import (
+    EVENT_OBJECT_CREATE, EVENT_OBJECT_DESTROY, EVENT_OBJECT_SHOW, EVENT_OBJECT_HIDE,
+    EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_VALUECHANGE, EVENT_OBJECT_CONTENTSCROLLED,
+    OBJID_WINDOW, CHILDID_SELF
+)
+
+user32 = ctypes.windll.user32
+
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+
+WM_QUIT = 0x0012
+
+WINEVENTPROC = ctypes.WINFUNCTYPE(
+    None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+    wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD
+)
+
+user32.SetWinEventHook.argtypes = [
+    wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WINEVENTPROC,
+    wintypes.DWORD, wintypes.DWORD, wintypes.DWORD
+]
+user32.SetWinEventHook.restype = wintypes.HANDLE
+user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+user32.PostThreadMessageW.argtypes = [wintypes.DWORD, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+
+
+class WinEventHookThread:
+    """
+    WinEvent 훅을 설치하고 메시지 루프를 도는 백그라운드 스레드
+
+    handler(event, hwnd, id_object, id_child)는 훅 스레드에서 호출되므로
+    짧게 끝내고 무거운 작업은 다른 스레드로 넘겨야 합니다.
+    """
+
+    def __init__(self, handler: Callable[[int, int, int, int], None]):
+        self.handler = handler
+        self._ranges: List[Tuple[int, int]] = []
+        self._hooks = []
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self.installed = False
+        # ctypes 콜백 객체가 GC되지 않도록 참조 유지
+        self._proc = WINEVENTPROC(self._on_event)
+
+    def add_range(self, event_min: int, event_max: int = None):
+        """수신할 이벤트 범위 등록 (start() 이전에 호출)"""
+        self._ranges.append((event_min, event_max if event_max is not None else event_min))
+
+    def _on_event(self, hook, event, hwnd, id_object, id_child, thread_id, event_time):
+        try:
+            self.handler(event, hwnd, id_object, id_child)
+        except Exception:
+            pass
+
+    def _run(self):
+        self._thread_id = threading.get_native_id()
+        for event_min, event_max in self._ranges:
+            hook = user32.SetWinEventHook(
+                event_min, event_max, None, self._proc, 0, 0,
+                WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+            )
+            if hook:
+                self._hooks.append(hook)
+        self.installed = len(self._hooks) == len(self._ranges) and bool(self._hooks)
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        try:
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            for hook in self._hooks:
+                user32.UnhookWinEvent(hook)
+            self._hooks = []
+
+    def start(self, timeout: float = 2.0) -> bool:
+        """훅 스레드 시작. 모든 훅이 설치되면 True"""
+        if self._thread:
+            return self.installed
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout)
+        return self.installed
+
+    def stop(self):
+        if self._thread and self._thread_id:
+            user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread.join(timeout=1)
+        self._thread = None
+        self.installed = False
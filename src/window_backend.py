@@ -0,0 +1,123 @@
+"""
+창 백엔드 인터페이스
+캡처 모듈이 win32gui/ctypes를 직접 부르지 않고 이 인터페이스를 통해 창을 다루도록 함
+Win32Backend(실제 KBond)와 SimulatedKBond(리눅스 벤치마크용) 중 하나를 골라 사용
+"""
+from typing import Callable, List, Optional, Tuple
+
+# 창 메시지 / 스타일
+WM_GETTEXT = 0x000D
+WM_GETTEXTLENGTH = 0x000E
+WM_USER = 0x0400
+EM_GETSEL = 0x00B0
+EM_GETTEXTRANGE = WM_USER + 75
+GWL_STYLE = -16
+ES_READONLY = 0x0800
+GA_ROOT = 2
+
+# WinEvent
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+EVENT_OBJECT_VALUECHANGE = 0x800E
+EVENT_OBJECT_CONTENTSCROLLED = 0x8015
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+
+
+class WindowBackend:
+    """
+    캡처 경로가 사용하는 창 조작 모음
+
+    읽기 함수는 SendMessageTimeout과 같은 의미를 가짐: 창이 응답하지 않거나
+    timeout_ms 안에 답하지 않으면 text_length는 0, get_text/get_text_range는 None.
+    """
+
+    name = "base"
+
+    # 창 열거
+    def top_level_windows(self) -> List[int]:
+        raise NotImplementedError
+
+    def child_windows(self, hwnd: int) -> List[int]:
+        """모든 하위 창 (EnumChildWindows와 같이 손자 창 포함)"""
+        raise NotImplementedError
+
+    # 창 속성
+    def is_window(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def is_visible(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def is_enabled(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def class_name(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+    def window_text(self, hwnd: int) -> str:
+        """창 제목 (GetWindowText)"""
+        raise NotImplementedError
+
+    def style(self, hwnd: int) -> int:
+        raise NotImplementedError
+
+    def parent(self, hwnd: int) -> int:
+        raise NotImplementedError
+
+    def root(self, hwnd: int) -> int:
+        """최상위 조상 창 (GetAncestor GA_ROOT)"""
+        raise NotImplementedError
+
+    def is_hung(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def window_from_point(self, x: int, y: int) -> Optional[int]:
+        raise NotImplementedError
+
+    # 텍스트 읽기
+    def send_message(self, hwnd: int, msg: int, wparam, lparam, timeout_ms: int = 100) -> int:
+        """정수 결과만 필요한 메시지 전송 (실패 시 0)"""
+        raise NotImplementedError
+
+    def text_length(self, hwnd: int, timeout_ms: int) -> int:
+        raise NotImplementedError
+
+    def get_text(self, hwnd: int, length: int, timeout_ms: int) -> Optional[str]:
+        """WM_GETTEXT 전체 읽기 (length는 text_length 결과, 문단 끝은 CRLF)"""
+        raise NotImplementedError
+
+    def get_text_range(self, hwnd: int, start: int, end: int, timeout_ms: int) -> Optional[str]:
+        """RichEdit 문자 위치 [start, end) 구간 읽기 (EM_GETTEXTRANGE, 문단 끝은 CR 하나)"""
+        raise NotImplementedError
+
+    def get_selection(self, hwnd: int, timeout_ms: int) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    # 이벤트
+    def event_hook(self, handler: Callable[[int, int, int, int], None]):
+        """add_range/start/stop/installed를 가진 WinEvent 훅 객체"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def create_backend(name: str = "win32", **options) -> WindowBackend:
+    """
+    이름으로 백엔드 생성
+
+    Args:
+        name: 'win32' 또는 'simulated'
+        options: 백엔드 생성자 인자
+    """
+    if name == "win32":
+        from .win32_backend import Win32Backend
+        return Win32Backend(**options)
+    if name == "simulated":
+        from .sim_kbond import SimulatedKBond
+        return SimulatedKBond(**options)
+    raise ValueError(f"Unknown window backend: {name}")
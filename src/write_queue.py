@@ -0,0 +1,314 @@
+"""
+쓰기 큐 과부하 정책
+큐가 가득 찼을 때 호출 스레드(캡처 루프)에서 파일 I/O를 하지 않고 처리
+
+정책:
+    block: 자리가 날 때까지 block_timeout 동안 대기, 넘기면 버리고 집계
+    spill: 넘친 메시지를 디스크 overflow 세그먼트로 보내고, 쓰기 스레드가 순서대로 다시 꺼냄
+    drop: 우선순위가 낮은 방의 메시지는 큐가 drop_watermark 이상 차면 버리고 방별로 집계
+          (우선순위 방은 큐 끝까지 사용하고, 그래도 가득 차면 block과 같이 대기)
+"""
+import os
+import pickle
+import queue
+import struct
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+_FRAME = struct.Struct('<I')
+
+
+class SpillSegment:
+    """넘친 메시지를 길이 접두사 + pickle 프레임으로 쌓는 임시 파일 (쓰기/읽기 위치를 따로 관리)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self.write_pos = 0
+        self.read_pos = 0
+        self.max_bytes = 0
+
+    def append(self, items: List):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'w+b')
+        data = bytearray()
+        for item in items:
+            payload = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+            data += _FRAME.pack(len(payload))
+            data += payload
+        self._file.seek(self.write_pos)
+        self._file.write(data)
+        self._file.flush()
+        self.write_pos += len(data)
+        self.max_bytes = max(self.max_bytes, self.write_pos)
+
+    def has_unread(self) -> bool:
+        return self.read_pos < self.write_pos
+
+    def read(self):
+        self._file.seek(self.read_pos)
+        (size,) = _FRAME.unpack(self._file.read(_FRAME.size))
+        item = pickle.loads(self._file.read(size))
+        self.read_pos += _FRAME.size + size
+        return item
+
+    def reset(self):
+        """모두 읽었으면 비우고 처음부터 다시 사용"""
+        if self._file is not None:
+            self._file.seek(0)
+            self._file.truncate()
+        self.write_pos = self.read_pos = 0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class BackpressureQueue:
+    """
+    queue.Queue와 같은 get/get_nowait/task_done/join 인터페이스에 과부하 정책을 더한 쓰기 큐
+    put은 메모리 작업만 하므로 호출 스레드가 디스크를 기다리지 않음
+    """
+
+    POLICIES = ('block', 'spill', 'drop')
+
+    def __init__(self, maxsize: int, policy: str = 'block', block_timeout: float = 0.5,
+                 spill_path: Optional[Path] = None, priority_rooms: List[str] = None,
+                 drop_watermark: float = 0.8):
+        """
+        Args:
+            maxsize: 메모리 큐 크기
+            policy: 'block', 'spill', 'drop'
+            block_timeout: block 정책(및 drop 정책의 우선순위 방)에서 기다리는 최대 시간 (초)
+            spill_path: spill 정책의 overflow 세그먼트 경로
+            priority_rooms: drop 정책에서 버리지 않을 방 이름 (제목에 포함되면 해당)
+            drop_watermark: drop 정책에서 일반 방 메시지를 받는 큐 사용률 상한
+        """
+        if policy not in self.POLICIES:
+            print(f"[WARN] Unknown overflow policy '{policy}', using 'block'")
+            policy = 'block'
+        if policy == 'spill' and spill_path is None:
+            raise ValueError("spill policy needs a spill_path")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.priority_rooms = list(priority_rooms or [])
+        self.low_priority_limit = max(1, int(self.maxsize * drop_watermark))
+
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._unfinished = 0
+
+        # spill: 넘치기 시작한 뒤의 메시지는 순서를 지키기 위해 모두 overflow로 보냄
+        self._spilling = False
+        self._overflow = deque()  # 아직 디스크로 옮기지 않은 넘친 메시지
+        self._spill_lock = threading.Lock()  # 세그먼트 + overflow 꺼내기 (백그라운드 스레드끼리만 사용)
+        self._segment = SpillSegment(spill_path) if policy == 'spill' else None
+        self._spill_wake = threading.Event()
+        self._spill_thread = None
+        self._closed = False
+        if self._segment is not None:
+            self._spill_thread = threading.Thread(target=self._spill_loop, daemon=True)
+            self._spill_thread.start()
+
+        # 통계
+        self.accepted = 0
+        self.spilled = 0
+        self.dropped: Dict[str, int] = {}  # room -> 버린 메시지 수 (drop 정책)
+        self.timed_out = 0  # 대기 시간 초과로 버린 메시지 수
+        self.blocked_seconds = 0.0
+
+    # ----- 호출 스레드 -----
+
+    def is_priority(self, room: str) -> bool:
+        return any(name in room for name in self.priority_rooms)
+
+    def put(self, item, room: str = "") -> bool:
+        """메시지 추가. 정책에 따라 버려지면 False"""
+        with self._cond:
+            if self._segment is not None and (self._spilling or len(self._items) >= self.maxsize):
+                self._spilling = True
+                self._overflow.append(item)
+                self._unfinished += 1
+                self.accepted += 1
+                self.spilled += 1
+                self._spill_wake.set()
+                self._cond.notify()
+                return True
+
+            limit = self.maxsize
+            if self.policy == 'drop' and not self.is_priority(room):
+                limit = self.low_priority_limit
+                if len(self._items) >= limit:
+                    if room not in self.dropped:
+                        print(f"[WARN] Writer queue over {limit} messages, dropping messages from '{room}'")
+                    self.dropped[room] = self.dropped.get(room, 0) + 1
+                    return False
+
+            if len(self._items) >= limit:
+                started = time.time()
+                deadline = started + self.block_timeout
+                while len(self._items) >= limit:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self.blocked_seconds += time.time() - started
+                        self.timed_out += 1
+                        return False
+                    self._cond.wait(remaining)
+                self.blocked_seconds += time.time() - started
+
+            self._items.append(item)
+            self._unfinished += 1
+            self.accepted += 1
+            self._cond.notify()
+            return True
+
+    # ----- spill 스레드 -----
+
+    def _spill_loop(self):
+        while not self._closed:
+            self._spill_wake.wait(0.1)
+            self._spill_wake.clear()
+            with self._spill_lock:
+                batch = []
+                while self._overflow:
+                    batch.append(self._overflow.popleft())
+                if batch:
+                    try:
+                        self._segment.append(batch)
+                    except Exception as e:
+                        # 디스크에 못 쓰면 메모리에 되돌려 순서를 유지
+                        print(f"[ERROR] Overflow spill error: {e}")
+                        self._overflow.extendleft(reversed(batch))
+
+    # ----- 쓰기 스레드 -----
+
+    def _next_spilled(self):
+        """spill 중일 때 다음 메시지 (세그먼트 → 아직 옮기지 않은 overflow 순)"""
+        with self._spill_lock:
+            if self._segment.has_unread():
+                return True, self._segment.read()
+            if self._overflow:
+                return True, self._overflow.popleft()
+            with self._cond:
+                drained = not self._overflow
+                if drained:
+                    # 모두 비웠으므로 다시 메모리 큐 사용
+                    self._spilling = False
+            if drained:
+                self._segment.reset()
+            return False, None
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            with self._cond:
+                if self._items:
+                    item = self._items.popleft()
+                    self._cond.notify_all()
+                    return item
+                spilling = self._spilling
+                if not spilling:
+                    if not block:
+                        raise queue.Empty
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise queue.Empty
+                    self._cond.wait(remaining)
+                    continue
+            found, item = self._next_spilled()
+            if found:
+                return item
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def task_done(self):
+        with self._cond:
+            self._unfinished -= 1
+            if self._unfinished <= 0:
+                self._unfinished = 0
+                self._cond.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """모든 메시지가 처리될 때까지 대기. timeout 안에 끝나면 True"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while self._unfinished:
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def unfinished(self) -> int:
+        """아직 task_done되지 않은 메시지 수 (큐 + 처리 중)"""
+        with self._cond:
+            return self._unfinished
+
+    def full(self) -> bool:
+        with self._cond:
+            return len(self._items) >= self.maxsize
+
+    def close(self):
+        self._closed = True
+        self._spill_wake.set()
+        if self._spill_thread:
+            self._spill_thread.join(timeout=1)
+        if self._segment is not None:
+            with self._spill_lock:
+                self._segment.close()
+
+    def stats(self) -> dict:
+        return {
+            'policy': self.policy,
+            'accepted': self.accepted,
+            'depth': self.unfinished(),
+            'spilled': self.spilled,
+            'spill_bytes': self._segment.write_pos - self._segment.read_pos if self._segment else 0,
+            'spill_max_bytes': self._segment.max_bytes if self._segment else 0,
+            'dropped': dict(self.dropped),
+            'timed_out': self.timed_out,
+            'blocked_seconds': self.blocked_seconds,
+        }
+
+    def print_summary(self):
+        stats = self.stats()
+        dropped = sum(stats['dropped'].values())
+        if stats['spilled'] or dropped or stats['timed_out']:
+            print(f"[INFO] Writer queue ({stats['policy']}): spilled {stats['spilled']} "
+                  f"(max {stats['spill_max_bytes']} bytes), dropped {dropped}, "
+                  f"timed out {stats['timed_out']}, blocked {stats['blocked_seconds']:.2f}s")
+            for room, count in sorted(stats['dropped'].items(), key=lambda kv: -kv[1]):
+                print(f"[INFO]   dropped {count} from '{room}'")
+
+
+def drain_queue(message_queue, writer_thread, timeout: float) -> bool:
+    """쓰기 스레드가 큐를 비울 때까지 최대 timeout초 대기 (스레드가 죽었으면 바로 포기)"""
+    deadline = time.time() + timeout
+    while not message_queue.join(timeout=0.1):
+        if time.time() >= deadline or not (writer_thread and writer_thread.is_alive()):
+            return False
+    return True
+
+
+def create_write_queue(config: dict, output_file: Path) -> BackpressureQueue:
+    """output / performance 설정으로 쓰기 큐 생성"""
+    output_config = config['output']
+    return BackpressureQueue(
+        maxsize=config['performance']['buffer_size'],
+        policy=output_config.get('overflow_policy', 'block'),
+        block_timeout=output_config.get('block_timeout_ms', 500) / 1000,
+        spill_path=Path(output_file).with_suffix('.overflow'),
+        priority_rooms=output_config.get('priority_rooms', config.get('kbond', {}).get('priority_rooms', [])),
+        drop_watermark=output_config.get('drop_watermark', 0.8),
+    )
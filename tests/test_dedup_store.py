@@ -0,0 +1,50 @@
+import random
+from collections import deque
+
+from src.dedup_store import DedupStore, RoomFingerprints
+
+
+def test_backward_shift_keeps_probe_chains_after_delete():
+    fps = RoomFingerprints(capacity=100, initial_slots=16)
+    # 16/32/48은 모두 0번 슬롯, 15/31은 15번 슬롯이 자기 자리 (31은 테이블 끝을 넘어 0번으로)
+    for fp in (15, 31, 16, 32, 48):
+        assert fps.add(fp)
+    assert list(fps._table[:4]) == [31, 16, 32, 48]
+    fps._remove(31)
+    assert list(fps._table[:4]) == [16, 32, 48, 0]  # 뒤의 항목이 당겨짐 (tombstone 없음)
+    assert 31 not in fps
+    assert all(fp in fps for fp in (15, 16, 32, 48))
+    fps._remove(16)
+    assert list(fps._table[:4]) == [32, 48, 0, 0]
+    assert all(fp in fps for fp in (15, 32, 48))
+
+
+def test_matches_fifo_window_with_collisions():
+    rng = random.Random(3)
+    capacity = 20
+    fps = RoomFingerprints(capacity=capacity, initial_slots=8)
+    window = deque()
+    for _ in range(5000):
+        fp = rng.randint(1, 200) * 16 + rng.choice((0, 15))  # 슬롯이 몰리고 테이블 끝을 넘어가게 함
+        expected = fp not in window
+        assert fps.add(fp) == expected
+        if expected:
+            window.append(fp)
+            if len(window) > capacity:
+                window.popleft()
+        assert fps.size == len(window)
+    assert sorted(v for v in fps._table if v) == sorted(window)
+    assert all(fp in fps for fp in window)
+
+
+def test_store_evicts_oldest_at_capacity():
+    store = DedupStore(capacity_per_room=3)
+    for fp in (1, 2, 3):
+        assert store.check_and_add('room', fp)
+    assert not store.check_and_add('room', 1)
+    assert store.check_and_add('room', 4)  # 1이 가장 오래되어 제거됨
+    assert not store.seen('room', 1)
+    assert all(store.seen('room', fp) for fp in (2, 3, 4))
+    assert not store.seen('other', 2)  # 방별로 따로 보관
+    stats = store.stats()
+    assert stats['entries'] == 3 and stats['evictions'] == 1
@@ -0,0 +1,39 @@
+"""시뮬레이터에 메시지를 넣는 동안 캡처해 잘린 줄이 나가지 않는지 확인"""
+import re
+import time
+
+import pytest
+
+from src.kbond_monitor import KBondMonitor
+from src.sim_kbond import SimulatedKBond, SimTraffic
+
+_MESSAGE = re.compile(r'^\S+ \(\d{2}:\d{2}:\d{2}\) (msg-\d{8}) 채권 호가 \d+$|^추가 내용 \d+$')
+
+
+@pytest.mark.parametrize('mode', ['polling', 'event'])
+def test_concurrent_appends_emit_whole_lines(tmp_path, mode):
+    sim = SimulatedKBond(latency=0.01)
+    for i in range(6):
+        sim.open_room(f"room {i}")
+    config = {
+        'kbond': {'capture_mode': mode, 'monitoring_interval': 0.05, 'min_poll_interval': 0.02},
+        'output': {'directory': str(tmp_path)},
+        'checkpoint': {'interval': 100},
+    }
+    emitted = []
+    monitor = KBondMonitor(lambda msg: emitted.append(msg['text']), config, backend=sim)
+    traffic = SimTraffic(sim, rate=200, seed=1)
+    monitor.start()
+    try:
+        time.sleep(0.3)  # 첫 읽기로 방을 모두 등록
+        traffic.start()
+        time.sleep(2.0)
+        traffic.stop()
+        time.sleep(1.0)  # 마지막 메시지까지 읽을 시간
+    finally:
+        monitor.stop()
+
+    fragments = [text for text in emitted if not _MESSAGE.match(text)]
+    assert fragments == []
+    captured = [m.group(1) for m in map(_MESSAGE.match, emitted) if m.group(1)]
+    assert sorted(captured) == sorted(traffic.sent)
@@ -0,0 +1,42 @@
+"""KBond 헤더 패턴 샘플 줄 확인"""
+from datetime import datetime, time as dtime
+
+from src.kbond_parser import KBondTranscriptParser, parse_clock
+
+
+def _parse(*lines):
+    parser = KBondTranscriptParser()
+    meta = {'timestamp': datetime(2026, 1, 30, 9, 0)}
+    return list(parser.parse_lines("room", ((line, meta) for line in lines)))
+
+
+def _header(line):
+    m = KBondTranscriptParser()._match_header(line)
+    return (m.group('sender').strip(), m.group('time')) if m else None
+
+
+def test_header_lines():
+    assert _header("홍길동 (14:35:12) 3년물 2.85 bid") == ("홍길동", "14:35:12")
+    assert _header("[홍길동] (오후 2:35)") == ("홍길동", "오후 2:35")
+    assert _header("[14:35:12] 홍길동 : 본문") == ("홍길동", "14:35:12")
+    assert _header("[홍길동] [오후 2:35] 본문") == ("홍길동", "오후 2:35")
+
+
+def test_body_lines_with_a_time_are_not_headers():
+    assert _header("내일 회의 (14:00) 참석 부탁드립니다") is None
+    assert _header("마감 (15:30) 전까지 확인") is None
+    assert _header("[공지] (오후 3:00) 이후 호가 중단") is None
+    assert _header("변경 시각 (14:35:12) 기준 두 분 이상") is None
+
+
+def test_body_line_stays_in_the_message():
+    records = _parse("홍길동 (14:35:12) 호가 정정", "내일 회의 (14:00) 참석 부탁드립니다")
+    assert len(records) == 1
+    assert records[0]['sender'] == "홍길동"
+    assert records[0]['text'] == "호가 정정\n내일 회의 (14:00) 참석 부탁드립니다"
+    assert records[0]['source_time'] == datetime(2026, 1, 30, 14, 35, 12)
+
+
+def test_parse_clock():
+    assert parse_clock("오후 2:35") == dtime(14, 35)
+    assert parse_clock("오전 12:05:09") == dtime(0, 5, 9)
@@ -0,0 +1,31 @@
+from src.message_writer import AsyncMessageWriter, SyncMessageWriter, create_writer
+from src.metrics_server import writer_metrics
+
+
+def make_config(tmp_path, **output):
+    return {
+        'output': dict({
+            'directory': str(tmp_path),
+            'filename_format': 'messages_{timestamp}.txt',
+            'encoding': 'utf-8',
+            'append_mode': True,
+        }, **output),
+        'performance': {'use_async': False, 'buffer_size': 100},
+    }
+
+
+def test_sync_writer_metrics_without_queue(tmp_path):
+    writer = create_writer(make_config(tmp_path))
+    assert isinstance(writer, SyncMessageWriter)
+    families = writer_metrics(writer)([])
+    assert [family.name for family in families][:4] == [
+        'messenger_writer_queue_depth', 'messenger_writer_spill_bytes',
+        'messenger_writer_spilled', 'messenger_writer_dropped']
+
+
+def test_sync_writer_falls_back_to_async_for_layouts(tmp_path, capsys):
+    for output in ({'spool': {'enabled': True}}, {'stream_compression': {'codec': 'gzip'}},
+                   {'rotation': {'enabled': True}}, {'sharding': {'enabled': True}}):
+        writer = create_writer(make_config(tmp_path, **output))
+        assert isinstance(writer, AsyncMessageWriter)
+        assert "performance.use_async=false is ignored" in capsys.readouterr().out
@@ -0,0 +1,25 @@
+from src import performance_monitor
+from src.performance_monitor import PerformanceMonitor
+
+
+def test_pending_violations_are_reported(monkeypatch, capsys):
+    clock = [1000.0]
+    monkeypatch.setattr(performance_monitor.time, 'time', lambda: clock[0])
+    monitor = PerformanceMonitor(max_response_time=0.1, report_interval=10.0)
+
+    monitor.record_response_time(0.2)
+    assert "응답 시간 초과: 200.0ms" in capsys.readouterr().out
+    monitor.record_response_time(0.3)
+    monitor.record_response_time(0.4)
+    assert capsys.readouterr().out == ""
+
+    # 간격이 지난 뒤의 정상 기록에서 모아 둔 두 번을 알림
+    clock[0] += 11
+    monitor.record_response_time(0.01)
+    assert "응답 시간 초과 2회 (최대 400.0ms" in capsys.readouterr().out
+
+    # 간격 안에 남은 초과는 통계 출력 때 알림
+    monitor.record_response_time(0.5)
+    monitor.print_statistics()
+    out = capsys.readouterr().out
+    assert out.index("응답 시간 초과: 500.0ms") < out.index("성능 통계")
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import deque
+
+from src.process_writer import ProcessWriter
+
+
+class FakeChild:
+    """파이프 대신 쓰는 가짜 자식: 받은 순서대로 기록하고, 한 배치는 한 번 실패시킴"""
+
+    def __init__(self, fail_message, hold_until):
+        self.fail_message = fail_message
+        self.hold_until = hold_until  # 실패 응답을 보내기 전에 더 받아야 할 배치 수
+        self.failed_id = None
+        self.received_after = 0
+        self.written = []
+        self.replies = deque()
+        self.lock = threading.Lock()
+
+    def send(self, request):
+        with self.lock:
+            _, batch_id, messages = request
+            texts = [m['text'] for m in messages]
+            if self.failed_id is None and self.fail_message in texts:
+                self.failed_id = batch_id
+                self.replies.append(('failed', batch_id, "OSError: disk full"))
+                return
+            if self.failed_id is not None:
+                self.received_after += 1
+            self.written.extend(texts)
+            self.replies.append(('ack', batch_id))
+
+    def poll(self, timeout=0):
+        with self.lock:
+            ready = bool(self.replies) and not (
+                self.replies[0][0] == 'failed' and self.received_after < self.hold_until)
+        if not ready and timeout:
+            time.sleep(min(timeout, 0.01))
+        return ready
+
+    def recv(self):
+        with self.lock:
+            return self.replies.popleft()
+
+
+class FakeProcess:
+    pid = 0
+
+    def is_alive(self):
+        return True
+
+
+def test_failed_batch_resends_later_inflight_batches_in_order(tmp_path):
+    config = {
+        'output': {
+            'directory': str(tmp_path),
+            'filename_format': 'messages_{timestamp}.txt',
+            'process': {'max_batch': 1, 'max_inflight_batches': 4, 'retry_backoff_ms': 10},
+        },
+        'performance': {'buffer_size': 100},
+    }
+    writer = ProcessWriter(config)
+    child = FakeChild(fail_message='m2', hold_until=3)
+    writer._spawn = lambda: None
+    writer._shutdown_child = lambda: None
+    writer._conn = child
+    writer.process = FakeProcess()
+    for i in range(8):
+        writer.write_message({'text': f'm{i}', 'window': 'room'})
+
+    writer.is_running = True
+    supervisor = threading.Thread(target=writer.supervise, daemon=True)
+    supervisor.start()
+    deadline = time.time() + 5
+    while writer.messages < 8 and time.time() < deadline:
+        time.sleep(0.01)
+    writer.is_running = False
+    supervisor.join(timeout=2)
+
+    # m3..m5는 실패한 m2보다 먼저 기록됐지만, m2 뒤에 다시 기록되어 순서가 이어짐
+    assert child.written == ['m0', 'm1', 'm3', 'm4', 'm5', 'm2', 'm3', 'm4', 'm5', 'm6', 'm7']
+    assert writer.messages == 8
+    assert writer.failed_batches == 1
+    assert writer.retries == 4
+    assert not writer._inflight and not writer._retry
@@ -0,0 +1,20 @@
+from src.sharding import ShardedOutput, room_slug
+
+
+def test_room_slug_keeps_plain_titles():
+    assert room_slug("채권데스크") == "채권데스크"
+
+
+def test_room_slug_separates_sanitized_titles():
+    slugs = {room_slug(room) for room in ["a/b", "a:b", "a?b", "a_b", "", "?"]}
+    assert len(slugs) == 6
+    assert len(room_slug("가" * 200)) <= 80
+    assert room_slug("가" * 200) != room_slug("가" * 201)
+
+
+def test_shard_paths_differ_by_case(tmp_path):
+    shards = ShardedOutput(tmp_path, "messages_{timestamp}.txt", "20260101_090000")
+    upper, lower = shards.path_for("Desk"), shards.path_for("desk")
+    assert upper.name == "messages_20260101_090000.Desk.txt"
+    assert upper.name.lower() != lower.name.lower()
+    assert shards.path_for("desk") == lower
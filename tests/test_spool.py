@@ -0,0 +1,81 @@
+import os
+
+from src.spool import WriteAheadSpool
+
+
+def make_spool(directory):
+    return WriteAheadSpool(directory, fsync_interval=0, ack_interval=0)
+
+
+def test_recover_and_close_prune_fully_acked_segments(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.recover()
+    seqs = [spool.append({'text': f'm{i}'}) for i in range(3)]
+    for seq in seqs:
+        spool.ack(seq)
+    spool.close()
+
+    # 이전 실행의 세그먼트는 모두 ack되었으므로 복구 후 새 세그먼트만 남음
+    spool = make_spool(tmp_path)
+    assert spool.recover() == []
+    assert len(list(tmp_path.glob("spool-*.wal"))) == 1
+
+    # ack 위치가 바뀌지 않은 채로 닫아도 정리됨
+    spool.close()
+    spool = make_spool(tmp_path)
+    spool.recover()
+    spool.close()
+    assert len(list(tmp_path.glob("spool-*.wal"))) == 1
+
+
+def crash(spool):
+    """close 없이 끝남 (스풀 스레드가 기록한 데까지만 남음)"""
+    spool.drain()
+    os.close(spool._fd)
+
+
+def segments(directory):
+    return sorted(directory.glob("spool-*.wal"))
+
+
+def test_replay_after_crash_skips_out_of_order_acks(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.recover()
+    seqs = [spool.append({'text': f'm{i}'}) for i in range(6)]
+    # 3, 1, 5 순서로 기록됨: 1까지만 연속이므로 ack 레코드는 1
+    for seq in (seqs[2], seqs[0], seqs[4]):
+        spool.ack(seq)
+    spool.flush_acks()
+    crash(spool)
+
+    spool = make_spool(tmp_path)
+    replay = spool.recover()
+    # 순서를 건너뛴 ack는 기록되지 않으므로 다시 나감 (at-least-once)
+    assert [msg['text'] for _, msg in replay] == ['m1', 'm2', 'm3', 'm4', 'm5']
+    assert [seq for seq, _ in replay] == seqs[1:]
+    for seq, _ in replay:
+        spool.ack(seq)
+    assert spool.append({'text': 'm6'}) == seqs[-1] + 1
+    spool.close()
+
+    spool = make_spool(tmp_path)
+    assert [msg['text'] for _, msg in spool.recover()] == ['m6']
+    spool.close()
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    spool = make_spool(tmp_path)
+    spool.recover()
+    for i in range(3):
+        spool.append({'text': f'm{i}', 'room': '채권'})
+    crash(spool)
+    path = segments(tmp_path)[-1]
+    data = path.read_bytes()
+    path.write_bytes(data[:-5])  # 마지막 레코드를 쓰는 중에 죽음
+
+    spool = make_spool(tmp_path)
+    replay = spool.recover()
+    assert [msg['text'] for _, msg in replay] == ['m0', 'm1']
+    # 잘린 레코드는 없던 것이 되어 그 seq부터 이어서 씀
+    assert spool.append({'text': 'm3'}) == replay[-1][0] + 1
+    spool.close()
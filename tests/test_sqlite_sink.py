@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pytest
+
+from src.sqlite_sink import SQLiteMessageWriter, search_messages
+
+
+@pytest.fixture
+def db(tmp_path):
+    config = {
+        'output': {'directory': str(tmp_path), 'sqlite': {}},
+        'performance': {'buffer_size': 100},
+    }
+    writer = SQLiteMessageWriter(config)
+    writer.open_sink()
+    now = datetime(2026, 1, 5, 9, 0, 0)
+    texts = ["3년물 국고채 3.25 매수", "국고채권 10년 2.9", "5y IRS 비드", "통안채 1년"]
+    writer.write_batch([{'window': 'room', 'timestamp': now, 'text': text} for text in texts])
+    writer.close_sink()
+    return writer.db_path
+
+
+def found(db, query):
+    return sorted(row['text'] for row in search_messages(db, query))
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("3년", ["3년물 국고채 3.25 매수"]),
+    ("3년물", ["3년물 국고채 3.25 매수"]),
+    ("년물", ["3년물 국고채 3.25 매수"]),
+    ("10년", ["국고채권 10년 2.9"]),
+    ("1년", ["통안채 1년"]),
+    ("국고채", ["3년물 국고채 3.25 매수", "국고채권 10년 2.9"]),
+    ("채권", ["국고채권 10년 2.9"]),
+    ("5y 비드", ["5y IRS 비드"]),
+    ("3년 매수", ["3년물 국고채 3.25 매수"]),
+    ("5년", []),
+])
+def test_search_mixed_digits_and_hangul(db, query, expected):
+    assert found(db, query) == expected
@@ -0,0 +1,67 @@
+import random
+
+from src.dedup_store import fingerprint
+from src.transcript_differ import TranscriptDiffer
+
+
+def new_lines(result):
+    return [line for line, _ in result]
+
+
+def test_first_read_emits_everything_then_only_appended_lines():
+    differ = TranscriptDiffer(anchor_lines=3)
+    assert new_lines(differ.diff('room', ['a', 'b', 'c'])) == ['a', 'b', 'c']
+    # 같은 내용이 반복되어도 새로 붙은 줄은 모두 내보냄
+    assert new_lines(differ.diff('room', ['a', 'b', 'c', 'ㅇㅋ', 'ㅇㅋ'])) == ['ㅇㅋ', 'ㅇㅋ']
+    assert new_lines(differ.diff('room', ['a', 'b', 'c', 'ㅇㅋ', 'ㅇㅋ', 'ㅇㅋ'])) == ['ㅇㅋ']
+    assert new_lines(differ.diff('room', ['c', 'ㅇㅋ', 'ㅇㅋ', 'ㅇㅋ'])) == []
+
+
+def test_rolling_hash_finds_the_last_anchor_occurrence():
+    rng = random.Random(7)
+    for _ in range(200):
+        k = rng.randint(1, 4)
+        history = [rng.choice('xyz') for _ in range(rng.randint(k, 12))]
+        appended = [rng.choice('xyz') for _ in range(rng.randint(0, 12))]
+        differ = TranscriptDiffer(anchor_lines=k)
+        differ.reset('room', history, start=None)
+        lines = history + appended
+        # 앵커와 같은 마지막 창을 직접 찾은 결과와 같아야 함
+        anchor = history[-k:]
+        end = max(i for i in range(k - 1, len(lines)) if lines[i - k + 1:i + 1] == anchor)
+        result = differ.diff('room', lines)
+        assert new_lines(result) == lines[end + 1:]
+        assert [fp for _, fp in result] == [fingerprint(line) for line in lines[end + 1:]]
+
+
+def test_lost_anchor_then_reanchor():
+    differ = TranscriptDiffer(anchor_lines=2)
+    differ.diff('room', ['a', 'b', 'c'])
+    # 내역이 지워지거나 바뀌면 None, 짧은 텍스트도 None
+    assert differ.diff('room', ['x', 'y', 'z']) is None
+    assert differ.diff('room', ['c']) is None
+    differ.reset('room', ['x', 'y', 'z'])
+    assert new_lines(differ.diff('room', ['x', 'y', 'z', 'w'])) == ['w']
+    assert differ.line_count('room') is None  # start를 주지 않았으므로 위치를 모름
+
+
+def test_line_count_resume_uses_expected_position():
+    differ = TranscriptDiffer(anchor_lines=2)
+    differ.diff('room', ['a', 'ㅇㅋ', 'ㅇㅋ'], start=0)
+    assert differ.line_count('room') == 3
+    assert differ.anchor_start('room') == 1
+
+    # 체크포인트에서 복원한 앵커와 줄 수로 이어서 읽음
+    resumed = TranscriptDiffer(anchor_lines=2)
+    resumed.set_anchor('room', differ.anchor('room'), differ.line_count('room'))
+    tail = ['ㅇㅋ', 'ㅇㅋ', 'ㅇㅋ', 'ㅇㅋ']  # 증분 읽기 꼬리 (앵커 첫 줄부터)
+    # 위치를 알면 뒤에서 찾은 마지막 "ㅇㅋ ㅇㅋ"가 아니라 원래 앵커 자리 뒤의 두 줄을 내보냄
+    assert new_lines(resumed.diff('room', tail, start=resumed.anchor_start('room'))) == ['ㅇㅋ', 'ㅇㅋ']
+    assert resumed.line_count('room') == 5
+    assert resumed.anchor_start('room') == 3
+
+    # 위치가 맞지 않으면 뒤에서부터 찾음
+    other = TranscriptDiffer(anchor_lines=2)
+    other.set_anchor('room', [fingerprint('a'), fingerprint('b')], 10)
+    assert new_lines(other.diff('room', ['a', 'b', 'c'], start=0)) == ['c']
+    assert other.line_count('room') == 3
@@ -0,0 +1,59 @@
+import queue
+import time
+
+import pytest
+
+from src.write_queue import BackpressureQueue
+
+
+def drain(q):
+    items = []
+    while True:
+        try:
+            items.append(q.get_nowait())
+        except queue.Empty:
+            return items
+        q.task_done()
+
+
+def test_spill_round_trip_keeps_order(tmp_path):
+    q = BackpressureQueue(maxsize=3, policy='spill', spill_path=tmp_path / "out.overflow")
+    try:
+        items = [({'text': f'm{i}', 'room': '채권'}, float(i), i) for i in range(50)]
+        assert all(q.put(item, '채권') for item in items)
+        deadline = time.time() + 2
+        while q.stats()['spill_bytes'] == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        stats = q.stats()
+        assert stats['spilled'] == 47 and stats['spill_bytes'] > 0
+        assert drain(q) == items  # 메모리 3개 다음 디스크에서 읽은 순서 그대로
+        assert q.join(timeout=0)
+
+        # 다 비우면 다시 메모리 큐를 사용
+        assert q.put(('after', 0.0, 0))
+        assert q.stats()['spilled'] == 47
+        assert drain(q) == [('after', 0.0, 0)]
+    finally:
+        q.close()
+    assert not (tmp_path / "out.overflow").exists()
+
+
+def test_drop_watermark_spares_priority_rooms():
+    q = BackpressureQueue(maxsize=10, policy='drop', block_timeout=0.05,
+                          priority_rooms=['국고'], drop_watermark=0.5)
+    assert all(q.put(i, '일반') for i in range(5))
+    assert not q.put(5, '일반')
+    assert not q.put(6, '일반')
+    assert all(q.put(i, '국고채 데스크') for i in range(5))  # 우선순위 방은 큐 끝까지 사용
+    assert not q.put(99, '국고채 데스크')  # 가득 차면 block_timeout만큼 기다린 뒤 포기
+    stats = q.stats()
+    assert stats['dropped'] == {'일반': 2}
+    assert stats['timed_out'] == 1
+    assert len(drain(q)) == 10
+    assert q.put(7, '일반')
+
+
+def test_unknown_policy_and_missing_spill_path():
+    assert BackpressureQueue(maxsize=1, policy='nope').policy == 'block'
+    with pytest.raises(ValueError):
+        BackpressureQueue(maxsize=1, policy='spill')